@@ -1,52 +1,72 @@
 import json
-from typing import Any, List, Dict
+import base64
+import binascii
+import numbers
+import struct
+from array import array
+from typing import Any, List, Dict, Tuple
 
 from datamodel import Listing, Observation, Order, OrderDepth, ProsperityEncoder, Symbol, Trade, TradingState
 
 
 class Logger:
-    def __init__(self) -> None:
-        self.logs = ""
+    def __init__(self, compact: bool = False) -> None:
+        self.logs: List[str] = []
         self.max_log_length = 3750
+        # compact mode only sends listings once and the depths/positions that changed since the last tick
+        self.compact = compact
+        self.sent_listings = False
+        self.last_depths: Dict[Symbol, str] = {}
+        self.last_position: Dict[Symbol, int] = {}
 
     def print(self, *objects: Any, sep: str = " ", end: str = "\n") -> None:
-        self.logs += sep.join(map(str, objects)) + end
-
-    def flush(self, state: TradingState, orders: dict[Symbol, list[Order]], conversions: int, trader_data: str) -> None:
-        base_length = len(self.to_json([
-            self.compress_state(state, ""),
-            self.compress_orders(orders),
-            conversions,
-            "",
-            "",
-        ]))
+        self.logs.append(sep.join(map(str, objects)) + end)
+
+    def flush(self, state: TradingState, orders: Dict[Symbol, List[Order]], conversions: int, trader_data: str) -> None:
+        # every section is serialized once; only the three free-text fields are sized to the budget
+        head = "[[" + str(state.timestamp) + ","
+        middle = ("," + ",".join(self.compress_sections(state)) + "],"
+                  + self.to_json(self.compress_orders(orders)) + "," + self.to_json(conversions) + ",")
+        base_length = len(head) + len(middle) + len(",]") + 3 * len('""')
         max_item_length = (self.max_log_length - base_length) // 3
 
-        print(self.to_json([
-            self.compress_state(state, self.truncate(state.traderData, max_item_length)),
-            self.compress_orders(orders),
-            conversions,
-            self.truncate(trader_data, max_item_length),
-            self.truncate(self.logs, max_item_length),
-        ]))
+        print(head + self.to_json(self.truncate(state.traderData, max_item_length)) + middle
+              + self.to_json(self.truncate(trader_data, max_item_length)) + ","
+              + self.to_json(self.truncate("".join(self.logs), max_item_length)) + "]")
 
-        self.logs = ""
+        self.logs = []
+
+    def compress_sections(self, state: TradingState) -> List[str]:
+        listings = "[]"
+        if not (self.compact and self.sent_listings):
+            listings = self.to_json([[l.symbol, l.product, l.denomination] for l in state.listings.values()])
+            self.sent_listings = True
+
+        depths = []
+        for symbol, od in state.order_depths.items():
+            encoded = self.to_json([od.buy_orders, od.sell_orders])
+            if not self.compact or self.last_depths.get(symbol) != encoded:
+                depths.append(self.to_json(symbol) + ":" + encoded)
+            self.last_depths[symbol] = encoded
+
+        position = state.position
+        if self.compact:
+            position = {p: q for p, q in state.position.items() if self.last_position.get(p) != q}
+            position.update({p: 0 for p in self.last_position if p not in state.position})
+            self.last_position = dict(state.position)
 
-    def compress_state(self, state: TradingState, trader_data: str) -> list[Any]:
         return [
-            state.timestamp,
-            trader_data,
-            [[l.symbol, l.product, l.denomination] for l in state.listings.values()],
-            {s: [od.buy_orders, od.sell_orders] for s, od in state.order_depths.items()},
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades],
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades],
-            state.position,
-            [state.observations.plainValueObservations,
-             {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
-              for p, o in state.observations.conversionObservations.items()}]
+            listings,
+            "{" + ",".join(depths) + "}",
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades]),
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades]),
+            self.to_json(position),
+            self.to_json([state.observations.plainValueObservations,
+                          {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
+                           for p, o in state.observations.conversionObservations.items()}]),
         ]
 
-    def compress_orders(self, orders: dict[Symbol, list[Order]]) -> list[list[Any]]:
+    def compress_orders(self, orders: Dict[Symbol, List[Order]]) -> List[List[Any]]:
         return [[o.symbol, o.price, o.quantity] for ol in orders.values() for o in ol]
 
     def to_json(self, value: Any) -> str:
@@ -57,9 +77,73 @@ class Logger:
 
 logger = Logger()
 
+class BookView:
+    """Sorted snapshot of one ``OrderDepth``; levels are (price, positive volume), best first.
+
+    Levels quoted with no volume are dropped, as ``backtester.l2`` does offline.
+    """
+
+    def __init__(self, order_depth: OrderDepth):
+        self.bids = sorted(((price, volume) for price, volume in order_depth.buy_orders.items() if volume > 0),
+                           reverse=True)
+        self.asks = sorted((price, -volume) for price, volume in order_depth.sell_orders.items() if volume < 0)
+        self.best_bid = self.bids[0][0] if self.bids else None
+        self.best_ask = self.asks[0][0] if self.asks else None
+        if self.bids and self.asks:
+            self.mid = (self.best_bid + self.best_ask) / 2
+            self.spread = self.best_ask - self.best_bid
+        else:
+            self.mid = None
+            self.spread = None
+
+    def microprice(self):
+        if self.mid is None:
+            return None
+        bid_volume = self.bids[0][1]
+        ask_volume = self.asks[0][1]
+        if bid_volume + ask_volume <= 0:
+            return self.mid
+        return (self.best_bid * ask_volume + self.best_ask * bid_volume) / (bid_volume + ask_volume)
+
+    def depth(self, levels: int):
+        return self.bids[:levels], self.asks[:levels]
+
+    def cumulative_volume(self, levels: int):
+        return sum(v for _, v in self.bids[:levels]), sum(v for _, v in self.asks[:levels])
+
+
+class BookCache:
+    """One ``BookView`` per symbol per tick, shared by everything that reads the book."""
+
+    def __init__(self):
+        self.state = None
+        self.views = {}
+
+    def get(self, state: TradingState, symbol: str):
+        if state is not self.state:
+            self.state = state
+            self.views = {}
+        if symbol in self.views:
+            return self.views[symbol]
+        order_depth = state.order_depths.get(symbol)
+        view = BookView(order_depth) if order_depth is not None else None
+        self.views[symbol] = view
+        return view
+
+    def mid(self, state: TradingState, symbol: str):
+        view = self.get(state, symbol)
+        return view.mid if view is not None else None
+
+books = BookCache()
+
+
 RAINFOREST = "RAINFOREST_RESIN"
 KELP = "KELP"
 JAMS = "JAMS"
+CROISSANTS = "CROISSANTS"
+DJEMBES = "DJEMBES"
+PICNIC_BASKET1 = "PICNIC_BASKET1"
+PICNIC_BASKET2 = "PICNIC_BASKET2"
 
 PRODUCTS = [
     RAINFOREST,
@@ -67,13 +151,292 @@ PRODUCTS = [
     JAMS
 ]
 
+# products ema_strategy trades; only their EMAs are carried in traderData
+EMA_PRODUCTS = [KELP, JAMS]
+
+BASKETS = {
+    PICNIC_BASKET1: {CROISSANTS: 6, JAMS: 3, DJEMBES: 1},
+    PICNIC_BASKET2: {CROISSANTS: 4, JAMS: 2},
+}
+
+# Tunable knobs, overridable per instance with ``Trader(params)``.
+PARAMS = {
+    "ema_param": 0.5,
+    "rainforest_spread": 1,
+    "kelp_spread": 1,
+    "jams_spread": 1,
+    "basket_window": 500,
+    "basket_entry": 2.0,
+    "basket_exit": 0.5,
+    # 1: trade the constituents against the basket, sized by what every leg can execute (the basket
+    # engine then owns JAMS); 0: trade the basket alone against its z-score
+    "basket_hedge": 1,
+}
+
+
+# fixed-width fields of the traderData encoding
+INT64 = struct.Struct("<q")
+DOUBLE = struct.Struct("<d")
+LENGTH = struct.Struct("<H")
+
+class StateCodec:
+    """Versioned, base64 binary encoding of trader state for ``traderData``.
+
+    Values are None, int, float, lists of values, or float buffers passed as
+    ``array('f')``/``array('d')`` (decoded back to lists). Every
+    value is tagged, so a payload decodes without a schema; a payload written
+    by another ``VERSION`` decodes to None and the trader starts fresh.
+    """
+
+    VERSION = 2
+
+    @classmethod
+    def encode(cls, value: Any) -> str:
+        out = bytearray([cls.VERSION])
+        cls._pack(value, out)
+        return base64.b64encode(bytes(out)).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> Any:
+        if not data:
+            return None
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (ValueError, binascii.Error):
+            return None
+        if not raw or raw[0] != cls.VERSION:
+            return None
+        try:
+            value, _ = cls._unpack(raw, 1)
+        except (struct.error, IndexError, ValueError):
+            return None
+        return value
+
+    @classmethod
+    def _pack(cls, value: Any, out: bytearray) -> None:
+        # Exact type checks first; the numbers ABCs are only a fallback for numpy scalars and bools.
+        kind = type(value)
+        if kind is float:
+            out += b"d"
+            out += DOUBLE.pack(value)
+        elif kind is list or kind is tuple:
+            out += b"l"
+            out += LENGTH.pack(len(value))
+            for item in value:
+                cls._pack(item, out)
+        elif kind is int:
+            out += b"q"
+            out += INT64.pack(value)
+        elif value is None:
+            out += b"n"
+        elif kind is array:
+            out += b"F" if value.typecode == "f" else b"D"
+            out += LENGTH.pack(len(value))
+            out += value.tobytes()
+        elif isinstance(value, numbers.Integral):
+            out += b"q"
+            out += INT64.pack(int(value))
+        elif isinstance(value, numbers.Real):
+            out += b"d"
+            out += DOUBLE.pack(float(value))
+        else:
+            raise TypeError(f"cannot encode {type(value).__name__} in traderData")
+
+    @classmethod
+    def _unpack(cls, raw: bytes, pos: int) -> Tuple[Any, int]:
+        tag = raw[pos:pos + 1]
+        pos += 1
+        if tag == b"n":
+            return None, pos
+        if tag == b"q":
+            return INT64.unpack_from(raw, pos)[0], pos + 8
+        if tag == b"d":
+            return DOUBLE.unpack_from(raw, pos)[0], pos + 8
+        if tag in (b"F", b"D"):
+            (length,) = LENGTH.unpack_from(raw, pos)
+            typecode = "f" if tag == b"F" else "d"
+            end = pos + 2 + length * array(typecode).itemsize
+            return array(typecode, raw[pos + 2:end]).tolist(), end
+        if tag == b"l":
+            (length,) = LENGTH.unpack_from(raw, pos)
+            pos += 2
+            items = []
+            for _ in range(length):
+                item, pos = cls._unpack(raw, pos)
+                items.append(item)
+            return items, pos
+        raise ValueError(f"unknown traderData tag {tag!r}")
+
+
+class BasketSpread:
+    """Synthetic value of one basket and its basket-minus-synthetic spread.
+
+    ``synthetic_bid``/``synthetic_ask`` are the weighted sums of the leg touches;
+    ``move`` shifts them by ``weight * change`` for a leg whose touch moved and
+    only re-sums when a leg side went missing. The spread of the mids is tracked
+    with an exponentially weighted mean and variance, so a tick costs O(legs).
+    """
+
+    def __init__(self, basket: str, weights: Dict[str, int], window: int = 500, warmup: int = 100):
+        self.basket = basket
+        self.weights = weights
+        self.alpha = 2 / (window + 1)
+        self.warmup = warmup
+        self.synthetic_bid = None
+        self.synthetic_ask = None
+        self.stale = True
+        self.spread = None
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def move(self, weight: int, old, new) -> None:
+        if self.stale or old is None or None in old or None in new:
+            self.stale = True
+            return
+        self.synthetic_bid += weight * (new[0] - old[0])
+        self.synthetic_ask += weight * (new[1] - old[1])
+
+    def observe(self, state: TradingState, quotes: Dict[str, Tuple[int, int]]) -> None:
+        if self.stale:
+            legs = [(quotes.get(leg, (None, None)), weight) for leg, weight in self.weights.items()]
+            if any(None in quote for quote, _ in legs):
+                self.synthetic_bid = self.synthetic_ask = None
+            else:
+                self.synthetic_bid = sum(weight * quote[0] for quote, weight in legs)
+                self.synthetic_ask = sum(weight * quote[1] for quote, weight in legs)
+                self.stale = False
+        basket_mid = books.mid(state, self.basket)
+        if self.stale or basket_mid is None:
+            self.spread = None
+            return
+        self.spread = basket_mid - (self.synthetic_bid + self.synthetic_ask) / 2
+        if self.count == 0:
+            self.mean = self.spread
+        else:
+            diff = self.spread - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+
+    def zscore(self):
+        if self.spread is None or self.count < self.warmup or self.var <= 0:
+            return None
+        return (self.spread - self.mean) / self.var ** 0.5
+
+    def executable_size(self, state: TradingState, direction: int, limits: Dict[str, int],
+                        pending: Dict[str, int], hedge: bool) -> int:
+        """Baskets that can be bought (``direction`` 1) or sold (-1) at the touch right now,
+        with every leg taken at its touch the other way, inside all position limits.
+        ``pending`` holds quantities already committed this tick by another basket."""
+        view = books.get(state, self.basket)
+        if view is None or view.mid is None:
+            return 0
+        position = state.position.get(self.basket, 0)
+        if direction > 0:
+            size = min(view.asks[0][1], limits[self.basket] - position)
+        else:
+            size = min(view.bids[0][1], limits[self.basket] + position)
+        if not hedge:
+            return max(0, size)
+        for leg, weight in self.weights.items():
+            leg_view = books.get(state, leg)
+            if leg_view is None or leg_view.mid is None:
+                return 0
+            committed = pending.get(leg, 0)
+            leg_position = state.position.get(leg, 0) + committed
+            if direction > 0:
+                volume = leg_view.bids[0][1] - max(0, -committed)
+                room = limits[leg] + leg_position
+            else:
+                volume = leg_view.asks[0][1] - max(0, committed)
+                room = limits[leg] - leg_position
+            size = min(size, volume // weight, room // weight)
+        return max(0, size)
+
+
+class BasketEngine:
+    """Both picnic baskets against their constituents, updated once per tick."""
+
+    def __init__(self, baskets: Dict[str, Dict[str, int]], window: int = 500):
+        self.spreads = {basket: BasketSpread(basket, weights, window) for basket, weights in baskets.items()}
+        self.legs: Dict[str, List[Tuple[BasketSpread, int]]] = {}
+        for spread in self.spreads.values():
+            for leg, weight in spread.weights.items():
+                self.legs.setdefault(leg, []).append((spread, weight))
+        self.quotes: Dict[str, Tuple[int, int]] = {}
+
+    def update(self, state: TradingState) -> None:
+        for leg, holders in self.legs.items():
+            view = books.get(state, leg)
+            quote = (view.best_bid, view.best_ask) if view is not None else (None, None)
+            old = self.quotes.get(leg)
+            if quote == old:
+                continue
+            self.quotes[leg] = quote
+            for spread, weight in holders:
+                spread.move(weight, old, quote)
+        for spread in self.spreads.values():
+            spread.observe(state, self.quotes)
+
+    def orders(self, state: TradingState, limits: Dict[str, int], entry: float, exit: float,
+               hedge: bool) -> Dict[Symbol, List[Order]]:
+        result: Dict[Symbol, List[Order]] = {}
+        pending: Dict[str, int] = {}
+        for basket, spread in self.spreads.items():
+            z = spread.zscore()
+            if z is None:
+                continue
+            position = state.position.get(basket, 0)
+            if z > entry:
+                target = -limits[basket]
+            elif z < -entry:
+                target = limits[basket]
+            elif abs(z) < exit:
+                target = 0
+            else:
+                continue
+            direction = (target > position) - (target < position)
+            if direction == 0:
+                continue
+            quantity = min(abs(target - position), spread.executable_size(state, direction, limits, pending, hedge))
+            logger.print(f"{basket} | spread: {spread.spread:.1f} | z: {z:.2f} | pos: {position} | qty: {direction * quantity}")
+            if quantity == 0:
+                continue
+            view = books.get(state, basket)
+            price = view.best_ask if direction > 0 else view.best_bid
+            result.setdefault(basket, []).append(Order(basket, price, direction * quantity))
+            if not hedge:
+                continue
+            for leg, weight in spread.weights.items():
+                leg_view = books.get(state, leg)
+                leg_price = leg_view.best_bid if direction > 0 else leg_view.best_ask
+                result.setdefault(leg, []).append(Order(leg, leg_price, -direction * weight * quantity))
+                pending[leg] = pending.get(leg, 0) - direction * weight * quantity
+        return result
+
+    def get_state(self) -> list:
+        return [[spread.mean, spread.var, spread.count] for spread in self.spreads.values()]
+
+    def set_state(self, values: list) -> None:
+        if len(values) != len(self.spreads):
+            return
+        for spread, (mean, var, count) in zip(self.spreads.values(), values):
+            spread.mean, spread.var, spread.count = mean, var, count
+
+
 class Trader:
-    def __init__(self):
+    def __init__(self, params: Dict[str, Any] = None):
+        self.params = {**PARAMS, **(params or {})}
         self.limits = {
             RAINFOREST: 50,
             KELP: 50,
             JAMS: 350,
-            
+            CROISSANTS: 250,
+            DJEMBES: 60,
+            PICNIC_BASKET1: 60,
+            PICNIC_BASKET2: 100,
         }
         self.default_prices = {
             RAINFOREST: 10000,
@@ -81,36 +444,32 @@ class Trader:
             JAMS: 6600,
 
         }
-        self.past_prices = dict()
-        for product in PRODUCTS:
-            self.past_prices[product] = []
         
         self.ema_prices = dict()
-        for product in PRODUCTS:
+        for product in EMA_PRODUCTS:
             self.ema_prices[product] = None
 
-        self.ema_param = 0.5
-
-    
-    def get_mid_price(self, product: str, state: TradingState):
-        order_depth = state.order_depths.get(product)
-        if not order_depth:
-            return self.default_prices[product]
+        self.ema_param = self.params["ema_param"]
+        self.baskets = BasketEngine(BASKETS, window=self.params["basket_window"])
+        self.state_loaded = False
 
-        bids = order_depth.buy_orders
-        asks = order_depth.sell_orders
+    def save_state(self) -> str:
+        return StateCodec.encode([[self.ema_prices[product] for product in EMA_PRODUCTS], self.baskets.get_state()])
 
-        if not bids or not asks:
-            return self.default_prices[product]
+    def load_state(self, trader_data: str) -> None:
+        values = StateCodec.decode(trader_data)
+        if not isinstance(values, list) or len(values) != 2 or len(values[0]) != len(EMA_PRODUCTS):
+            return
+        for product, ema in zip(EMA_PRODUCTS, values[0]):
+            self.ema_prices[product] = ema
+        self.baskets.set_state(values[1])
 
-        best_bid = max(bids.keys())
-        best_ask = min(asks.keys())
-        return (best_bid + best_ask) / 2
+    def get_mid_price(self, product: str, state: TradingState):
+        mid = books.mid(state, product)
+        return mid if mid is not None else self.default_prices[product]
 
     def update_ema(self, product: str, state: TradingState):
         mid_price = self.get_mid_price(product, state)
-        self.past_prices[product].append(mid_price)
-
         if self.ema_prices[product] is None:
             self.ema_prices[product] = mid_price
         else:
@@ -157,14 +516,23 @@ class Trader:
     
 
     def run(self, state: TradingState) -> tuple[Dict[Symbol, List[Order]], int, str]:
+        if not self.state_loaded:
+            self.load_state(state.traderData)
+            self.state_loaded = True
         result = {}
         conversions = 0
-        trader_data = ""
 
         # Market making dla RAINFOREST_RESIN z fair price = 10000 i spreadem 5
-        result[RAINFOREST] = self.market_make(RAINFOREST, fair_price=self.default_prices[RAINFOREST], spread=1, state=state)
-        result[KELP] = self.ema_strategy(KELP, spread=1, state=state)
-        result[JAMS] = self.ema_strategy(JAMS, spread=1, state=state)
+        result[RAINFOREST] = self.market_make(RAINFOREST, fair_price=self.default_prices[RAINFOREST], spread=self.params["rainforest_spread"], state=state)
+        result[KELP] = self.ema_strategy(KELP, spread=self.params["kelp_spread"], state=state)
+        hedge = bool(self.params["basket_hedge"])
+        if not hedge:
+            result[JAMS] = self.ema_strategy(JAMS, spread=self.params["jams_spread"], state=state)
+
+        self.baskets.update(state)
+        result.update(self.baskets.orders(state, self.limits, self.params["basket_entry"],
+                                          self.params["basket_exit"], hedge))
 
+        trader_data = self.save_state()
         logger.flush(state, result, conversions, trader_data)
         return result, conversions, trader_data
@@ -12,6 +12,7 @@ ObservationValue = int
 
 
 class Listing:
+    __slots__ = ("symbol", "product", "denomination")
 
     def __init__(self, symbol: Symbol, product: Product, denomination: Product):
         self.symbol = symbol
@@ -20,6 +21,7 @@ class Listing:
         
                  
 class ConversionObservation:
+    __slots__ = ("bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff", "sugarPrice", "sunlightIndex")
 
     def __init__(self, bidPrice: float, askPrice: float, transportFees: float, exportTariff: float, importTariff: float, sugarPrice: float, sunlightIndex: float):
         self.bidPrice = bidPrice
@@ -32,6 +34,7 @@ class ConversionObservation:
         
 
 class Observation:
+    __slots__ = ("plainValueObservations", "conversionObservations")
 
     def __init__(self, plainValueObservations: Dict[Product, ObservationValue], conversionObservations: Dict[Product, ConversionObservation]) -> None:
         self.plainValueObservations = plainValueObservations
@@ -42,6 +45,7 @@ class Observation:
      
 
 class Order:
+    __slots__ = ("symbol", "price", "quantity")
 
     def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
         self.symbol = symbol
@@ -56,6 +60,7 @@ class Order:
     
 
 class OrderDepth:
+    __slots__ = ("buy_orders", "sell_orders")
 
     def __init__(self):
         self.buy_orders: Dict[int, int] = {}
@@ -63,6 +68,7 @@ class OrderDepth:
 
 
 class Trade:
+    __slots__ = ("symbol", "price", "quantity", "buyer", "seller", "timestamp")
 
     def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId=None, seller: UserId=None, timestamp: int=0) -> None:
         self.symbol = symbol
@@ -80,6 +86,7 @@ class Trade:
 
 
 class TradingState(object):
+    __slots__ = ("traderData", "timestamp", "listings", "order_depths", "own_trades", "market_trades", "position", "observations")
 
     def __init__(self,
                  traderData: str,
@@ -100,10 +107,18 @@ class TradingState(object):
         self.observations = observations
         
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+        return json.dumps(self, default=to_dict, sort_keys=True)
 
     
+def to_dict(o):
+    # the datamodel classes use __slots__, so there is no __dict__ to hand to json
+    slots = getattr(type(o), "__slots__", None)
+    if slots is None:
+        return o.__dict__
+    return {name: getattr(o, name) for name in slots}
+
+
 class ProsperityEncoder(JSONEncoder):
 
         def default(self, o):
-            return o.__dict__
\ No newline at end of file
+            return to_dict(o)
\ No newline at end of file
@@ -1,10 +1,14 @@
 import json
+import base64
+import binascii
+import numbers
+import struct
+from array import array
 
 import numpy as np
 
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Tuple
 
-from statistics import NormalDist
 
 import math
 
@@ -15,108 +19,132 @@ from datamodel import Listing, Observation, Order, OrderDepth, ProsperityEncoder
 
 
 class Logger:
-
-    def __init__(self) -> None:
-
-        self.logs = ""
-
+    def __init__(self, compact: bool = False) -> None:
+        self.logs: List[str] = []
         self.max_log_length = 3750
-
-
+        # compact mode only sends listings once and the depths/positions that changed since the last tick
+        self.compact = compact
+        self.sent_listings = False
+        self.last_depths: Dict[Symbol, str] = {}
+        self.last_position: Dict[Symbol, int] = {}
 
     def print(self, *objects: Any, sep: str = " ", end: str = "\n") -> None:
-
-        self.logs += sep.join(map(str, objects)) + end
-
-
-
-    def flush(self, state: TradingState, orders: dict[Symbol, list[Order]], conversions: int, trader_data: str) -> None:
-
-        base_length = len(self.to_json([
-
-            self.compress_state(state, ""),
-
-            self.compress_orders(orders),
-
-            conversions,
-
-            "",
-
-            "",
-
-        ]))
-
+        self.logs.append(sep.join(map(str, objects)) + end)
+
+    def flush(self, state: TradingState, orders: Dict[Symbol, List[Order]], conversions: int, trader_data: str) -> None:
+        # every section is serialized once; only the three free-text fields are sized to the budget
+        head = "[[" + str(state.timestamp) + ","
+        middle = ("," + ",".join(self.compress_sections(state)) + "],"
+                  + self.to_json(self.compress_orders(orders)) + "," + self.to_json(conversions) + ",")
+        base_length = len(head) + len(middle) + len(",]") + 3 * len('""')
         max_item_length = (self.max_log_length - base_length) // 3
 
+        print(head + self.to_json(self.truncate(state.traderData, max_item_length)) + middle
+              + self.to_json(self.truncate(trader_data, max_item_length)) + ","
+              + self.to_json(self.truncate("".join(self.logs), max_item_length)) + "]")
 
+        self.logs = []
 
-        print(self.to_json([
+    def compress_sections(self, state: TradingState) -> List[str]:
+        listings = "[]"
+        if not (self.compact and self.sent_listings):
+            listings = self.to_json([[l.symbol, l.product, l.denomination] for l in state.listings.values()])
+            self.sent_listings = True
 
-            self.compress_state(state, self.truncate(state.traderData, max_item_length)),
+        depths = []
+        for symbol, od in state.order_depths.items():
+            encoded = self.to_json([od.buy_orders, od.sell_orders])
+            if not self.compact or self.last_depths.get(symbol) != encoded:
+                depths.append(self.to_json(symbol) + ":" + encoded)
+            self.last_depths[symbol] = encoded
 
-            self.compress_orders(orders),
-
-            conversions,
-
-            self.truncate(trader_data, max_item_length),
-
-            self.truncate(self.logs, max_item_length),
-
-        ]))
-
-
-
-        self.logs = ""
-
-
-
-    def compress_state(self, state: TradingState, trader_data: str) -> list[Any]:
+        position = state.position
+        if self.compact:
+            position = {p: q for p, q in state.position.items() if self.last_position.get(p) != q}
+            position.update({p: 0 for p in self.last_position if p not in state.position})
+            self.last_position = dict(state.position)
 
         return [
-
-            state.timestamp,
-
-            trader_data,
-
-            [[l.symbol, l.product, l.denomination] for l in state.listings.values()],
-
-            {s: [od.buy_orders, od.sell_orders] for s, od in state.order_depths.items()},
-
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades],
-
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades],
-
-            state.position,
-
-            [state.observations.plainValueObservations,
-
-             {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
-
-              for p, o in state.observations.conversionObservations.items()}]
-
+            listings,
+            "{" + ",".join(depths) + "}",
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades]),
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades]),
+            self.to_json(position),
+            self.to_json([state.observations.plainValueObservations,
+                          {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
+                           for p, o in state.observations.conversionObservations.items()}]),
         ]
 
+    def compress_orders(self, orders: Dict[Symbol, List[Order]]) -> List[List[Any]]:
+        return [[o.symbol, o.price, o.quantity] for ol in orders.values() for o in ol]
 
+    def to_json(self, value: Any) -> str:
+        return json.dumps(value, cls=ProsperityEncoder, separators=(",", ":"))
 
-    def compress_orders(self, orders: dict[Symbol, list[Order]]) -> list[list[Any]]:
+    def truncate(self, value: str, max_length: int) -> str:
+        return value if len(value) <= max_length else value[:max_length - 3] + "..."
 
-        return [[o.symbol, o.price, o.quantity] for ol in orders.values() for o in ol]
+logger = Logger()
 
+class BookView:
+    """Sorted snapshot of one ``OrderDepth``; levels are (price, positive volume), best first.
+
+    Levels quoted with no volume are dropped, as ``backtester.l2`` does offline.
+    """
+
+    def __init__(self, order_depth: OrderDepth):
+        self.bids = sorted(((price, volume) for price, volume in order_depth.buy_orders.items() if volume > 0),
+                           reverse=True)
+        self.asks = sorted((price, -volume) for price, volume in order_depth.sell_orders.items() if volume < 0)
+        self.best_bid = self.bids[0][0] if self.bids else None
+        self.best_ask = self.asks[0][0] if self.asks else None
+        if self.bids and self.asks:
+            self.mid = (self.best_bid + self.best_ask) / 2
+            self.spread = self.best_ask - self.best_bid
+        else:
+            self.mid = None
+            self.spread = None
 
+    def microprice(self):
+        if self.mid is None:
+            return None
+        bid_volume = self.bids[0][1]
+        ask_volume = self.asks[0][1]
+        if bid_volume + ask_volume <= 0:
+            return self.mid
+        return (self.best_bid * ask_volume + self.best_ask * bid_volume) / (bid_volume + ask_volume)
 
-    def to_json(self, value: Any) -> str:
+    def depth(self, levels: int):
+        return self.bids[:levels], self.asks[:levels]
 
-        return json.dumps(value, cls=ProsperityEncoder, separators=(",", ":"))
+    def cumulative_volume(self, levels: int):
+        return sum(v for _, v in self.bids[:levels]), sum(v for _, v in self.asks[:levels])
 
 
+class BookCache:
+    """One ``BookView`` per symbol per tick, shared by everything that reads the book."""
 
-    def truncate(self, value: str, max_length: int) -> str:
+    def __init__(self):
+        self.state = None
+        self.views = {}
 
-        return value if len(value) <= max_length else value[:max_length - 3] + "..."
+    def get(self, state: TradingState, symbol: str):
+        if state is not self.state:
+            self.state = state
+            self.views = {}
+        if symbol in self.views:
+            return self.views[symbol]
+        order_depth = state.order_depths.get(symbol)
+        view = BookView(order_depth) if order_depth is not None else None
+        self.views[symbol] = view
+        return view
 
+    def mid(self, state: TradingState, symbol: str):
+        view = self.get(state, symbol)
+        return view.mid if view is not None else None
 
+books = BookCache()
 
-logger = Logger()
 
 
 
@@ -140,6 +168,9 @@ VOLCANIC_ROCK_VOUCHER_10500= "VOLCANIC_ROCK_VOUCHER_10500"
 
 MAGNIFICENT_MACARONS = "MAGNIFICENT_MACARONS"
 
+# lots of a product Pristine Cuisine converts per tick
+CONVERSION_LIMIT = 10
+
 
 PRODUCTS = [
 
@@ -161,35 +192,449 @@ PRODUCTS = [
 
     VOLCANIC_ROCK_VOUCHER_10500,
 
-    MAGNIFICENT_MACARONS,
-
 ]
 
-
-
-import json
-
-from typing import Any, List, Dict
-
-from statistics import NormalDist
-
-import math
-
-from datamodel import Listing, Observation, Order, OrderDepth, ProsperityEncoder, Symbol, Trade, TradingState
-
-
-
-# ... [Logger definition and constants skipped for brevity]
-
+# products ema_strategy trades; only their EMAs are carried in traderData
+EMA_PRODUCTS = [KELP]
+
+VOUCHER_STRIKES = {
+    VOLCANIC_ROCK_VOUCHER_9500: 9500,
+    VOLCANIC_ROCK_VOUCHER_9750: 9750,
+    VOLCANIC_ROCK_VOUCHER_10000: 10000,
+    VOLCANIC_ROCK_VOUCHER_10250: 10250,
+    VOLCANIC_ROCK_VOUCHER_10500: 10500,
+}
+
+# get_dynamic_T counts 8,000,000 timestamps as 4 days and a tick is 100 timestamps
+TICKS_PER_YEAR = 8_000_000 / 100 * 365 / 4
+
+# Tunable knobs, overridable per instance with ``Trader(params)``.
+PARAMS = {
+    "ema_param": 0.5,
+    "rainforest_spread": 4,
+    "kelp_spread": 1,
+    "voucher_spread": 2,
+    "voucher_max_volume": 10,
+    "sigma_window": 20,
+    "macaron_window": 100,
+    "macaron_edge": 1.0,
+    "macaron_csi": 50,
+    "macaron_sugar_z": 2.0,
+}
+
+
+
+SQRT_2PI = math.sqrt(2 * math.pi)
+
+
+def norm_cdf(x):
+    """Vectorised standard normal CDF (Abramowitz & Stegun 26.2.17, |error| < 7.5e-8)."""
+    x = np.asarray(x, dtype=float)
+    t = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = 1.0 - np.exp(-0.5 * x * x) / SQRT_2PI * poly
+    return np.where(x >= 0, upper, 1.0 - upper)
+
+
+def black_scholes_batch(St, K, T, sigma, r: float = 0.0):
+    """Call price, delta, gamma and vega for all inputs in one NumPy pass.
+
+    Arguments broadcast against each other, so ``St`` can be one spot with
+    arrays of strikes and sigmas (the voucher ladder at one tick) or whole
+    historical columns. Expired or zero-volatility inputs price at intrinsic.
+    """
+    St = np.asarray(St, dtype=float)
+    K = np.asarray(K, dtype=float)
+    T = np.asarray(T, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    sqrt_T = np.sqrt(np.maximum(T, 0.0))
+    vol_time = sigma * sqrt_T
+    discount = np.exp(-r * T)
+    live = (vol_time > 0) & (St > 0) & (K > 0)
+    all_live = live.all()
+    if not all_live:
+        vol_time = np.where(live, vol_time, 1.0)
+        St_live = np.where(live, St, 1.0)
+        K_live = np.where(live, K, 1.0)
+    else:
+        St_live, K_live = St, K
+    d1 = (np.log(St_live / K_live) + (r + 0.5 * sigma * sigma) * T) / vol_time
+    cdf_d1 = norm_cdf(d1)
+    pdf_d1 = np.exp(-0.5 * d1 * d1) / SQRT_2PI
+    price = St * cdf_d1 - K * discount * norm_cdf(d1 - vol_time)
+    delta = cdf_d1
+    gamma = pdf_d1 / (St_live * vol_time)
+    vega = St * pdf_d1 * sqrt_T
+    if not all_live:
+        price = np.where(live, price, np.maximum(St - K * discount, 0.0))
+        delta = np.where(live, delta, (St > K * discount).astype(float))
+        gamma = np.where(live, gamma, 0.0)
+        vega = np.where(live, vega, 0.0)
+    return price, delta, gamma, vega
+
+
+class RingBuffer:
+    """Fixed-capacity float history backed by a single ``array("d")``.
+
+    ``append`` is O(1) and evicts the oldest value once the buffer is full.
+    Every value is written twice, ``capacity`` slots apart, into storage twice
+    the capacity, so the newest ``n`` values are always one contiguous slice:
+    ``window(n)`` is a zero-copy ``memoryview`` (oldest first) that
+    ``np.asarray`` wraps without copying. A view reads the live slots, so it
+    is only valid until the next ``append``.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = array("d", bytes(16 * capacity))
+        self.pos = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: float) -> None:
+        pos = self.pos
+        self.data[pos] = self.data[pos + self.capacity] = value
+        self.pos = pos + 1 if pos + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self) -> float:
+        return self.data[self.pos + self.capacity - 1]
+
+    def oldest(self) -> float:
+        """The value the next ``append`` evicts once the buffer is full."""
+        return self.data[self.pos + self.capacity - self.count]
+
+    def window(self, n: int = None) -> memoryview:
+        n = self.count if n is None else min(n, self.count)
+        end = self.pos + self.capacity
+        return memoryview(self.data)[end - n:end]
+
+    def get_state(self) -> list:
+        return [array("d", self.window())]
+
+    def set_state(self, values: list) -> None:
+        self.pos = self.count = 0
+        for value in values[0][-self.capacity:]:
+            self.append(value)
+
+
+class RollingVolatility:
+    """Annualised std of the last ``window`` log returns, O(1) per update.
+
+    Returns sit in a fixed ring buffer next to their running sum and sum of
+    squares; the sums are rebuilt from the buffer once per lap so float drift
+    cannot accumulate.
+    """
+
+    def __init__(self, window: int = 20, default: float = 0.13, periods: int = 365):
+        self.window = window
+        self.default = default
+        self.scale = math.sqrt(periods)
+        self.returns = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last_price = None
+
+    def update(self, price: float) -> None:
+        if price <= 0:
+            return
+        if self.last_price is not None:
+            r = math.log(price / self.last_price)
+            if self.count == self.window:
+                old = self.returns[self.index]
+                self.total -= old
+                self.total_sq -= old * old
+            else:
+                self.count += 1
+            self.returns[self.index] = r
+            self.total += r
+            self.total_sq += r * r
+            self.index = (self.index + 1) % self.window
+            if self.index == 0:
+                self.total = sum(self.returns)
+                self.total_sq = sum(x * x for x in self.returns)
+        self.last_price = price
+
+    def sigma(self) -> float:
+        if self.count < 2:
+            return self.default
+        mean = self.total / self.count
+        variance = max(0.0, self.total_sq / self.count - mean * mean)
+        return math.sqrt(variance) * self.scale
+
+    def get_state(self):
+        if self.last_price is None:
+            return None
+        return [self.last_price, self.index, self.count, array("d", self.returns[:self.count])]
+
+    def set_state(self, values: list) -> None:
+        if values is None:
+            return
+        last_price, index, count, returns = values
+        if count > self.window or index >= self.window or len(returns) != count:
+            return
+        self.returns = list(returns) + [0.0] * (self.window - count)
+        self.last_price = last_price
+        self.index = index
+        self.count = count
+        self.total = sum(self.returns)
+        self.total_sq = sum(x * x for x in self.returns)
+
+
+class RollingStats:
+    """Mean, std and drift of the last ``window`` values, O(1) per update.
+
+    The values live in a ``RingBuffer`` next to their running sum and sum of
+    squares, rebuilt from the buffer once per lap like ``RollingVolatility``.
+    """
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.history = RingBuffer(window)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, value: float) -> None:
+        history = self.history
+        if history.count == self.window:
+            old = history.oldest()
+            self.total -= old
+            self.total_sq -= old * old
+        history.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if history.pos == 0:
+            self.resum()
+
+    def resum(self) -> None:
+        values = self.history.window()
+        self.total = sum(values)
+        self.total_sq = sum(x * x for x in values)
+
+    def mean(self) -> float:
+        count = self.history.count
+        return self.total / count if count else 0.0
+
+    def std(self) -> float:
+        count = self.history.count
+        if count < 2:
+            return 0.0
+        mean = self.total / count
+        return math.sqrt(max(0.0, self.total_sq / count - mean * mean))
+
+    def last(self) -> float:
+        return self.history.last()
+
+    def change(self) -> float:
+        """Newest minus oldest value in the window."""
+        if self.history.count < 2:
+            return 0.0
+        return self.history.last() - self.history.oldest()
+
+    def zscore(self) -> float:
+        std = self.std()
+        return (self.last() - self.mean()) / std if std > 0 else 0.0
+
+    def get_state(self) -> list:
+        return self.history.get_state()
+
+    def set_state(self, values: list) -> None:
+        if len(values) != 1:
+            return
+        self.history.set_state(values)
+        self.resum()
+
+
+# fixed-width fields of the traderData encoding
+INT64 = struct.Struct("<q")
+DOUBLE = struct.Struct("<d")
+LENGTH = struct.Struct("<H")
+
+
+class StateCodec:
+    """Versioned, base64 binary encoding of trader state for ``traderData``.
+
+    Values are None, int, float, lists of values, or float buffers passed as
+    ``array('f')``/``array('d')`` (decoded back to lists). Every
+    value is tagged, so a payload decodes without a schema; a payload written
+    by another ``VERSION`` decodes to None and the trader starts fresh.
+    """
+
+    VERSION = 2
+
+    @classmethod
+    def encode(cls, value: Any) -> str:
+        out = bytearray([cls.VERSION])
+        cls._pack(value, out)
+        return base64.b64encode(bytes(out)).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> Any:
+        if not data:
+            return None
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (ValueError, binascii.Error):
+            return None
+        if not raw or raw[0] != cls.VERSION:
+            return None
+        try:
+            value, _ = cls._unpack(raw, 1)
+        except (struct.error, IndexError, ValueError):
+            return None
+        return value
+
+    @classmethod
+    def _pack(cls, value: Any, out: bytearray) -> None:
+        # Exact type checks first; the numbers ABCs are only a fallback for numpy scalars and bools.
+        kind = type(value)
+        if kind is float:
+            out += b"d"
+            out += DOUBLE.pack(value)
+        elif kind is list or kind is tuple:
+            out += b"l"
+            out += LENGTH.pack(len(value))
+            for item in value:
+                cls._pack(item, out)
+        elif kind is int:
+            out += b"q"
+            out += INT64.pack(value)
+        elif value is None:
+            out += b"n"
+        elif kind is array:
+            out += b"F" if value.typecode == "f" else b"D"
+            out += LENGTH.pack(len(value))
+            out += value.tobytes()
+        elif isinstance(value, numbers.Integral):
+            out += b"q"
+            out += INT64.pack(int(value))
+        elif isinstance(value, numbers.Real):
+            out += b"d"
+            out += DOUBLE.pack(float(value))
+        else:
+            raise TypeError(f"cannot encode {type(value).__name__} in traderData")
+
+    @classmethod
+    def _unpack(cls, raw: bytes, pos: int) -> Tuple[Any, int]:
+        tag = raw[pos:pos + 1]
+        pos += 1
+        if tag == b"n":
+            return None, pos
+        if tag == b"q":
+            return INT64.unpack_from(raw, pos)[0], pos + 8
+        if tag == b"d":
+            return DOUBLE.unpack_from(raw, pos)[0], pos + 8
+        if tag in (b"F", b"D"):
+            (length,) = LENGTH.unpack_from(raw, pos)
+            typecode = "f" if tag == b"F" else "d"
+            end = pos + 2 + length * array(typecode).itemsize
+            return array(typecode, raw[pos + 2:end]).tolist(), end
+        if tag == b"l":
+            (length,) = LENGTH.unpack_from(raw, pos)
+            pos += 2
+            items = []
+            for _ in range(length):
+                item, pos = cls._unpack(raw, pos)
+                items.append(item)
+            return items, pos
+        raise ValueError(f"unknown traderData tag {tag!r}")
+
+
+class MacaronArbitrage:
+    """Conversion-aware trading of MAGNIFICENT_MACARONS.
+
+    Pristine Cuisine sells at ``askPrice + transportFees + importTariff`` (the
+    import cost) and buys at ``bidPrice - transportFees - exportTariff`` (the
+    export value). Local sells above the import cost are imported back, at most
+    ``conversion_limit`` a tick, on the next tick; local buys below the export
+    value (net of storage) are exported the same way. Sunlight and sugar are
+    tracked over a rolling window: while sunlight is below the critical index
+    and still falling, or sugar is unusually dear, the foreign price tends to
+    climb before the short can be covered, so no new shorts are opened.
+    """
+
+    def __init__(self, symbol: str, conversion_limit: int = 10, position_limit: int = 75, window: int = 100,
+                 edge: float = 1.0, csi: float = 50, sugar_z: float = 2.0, storage_cost: float = 0.1):
+        self.symbol = symbol
+        self.conversion_limit = conversion_limit
+        self.position_limit = position_limit
+        self.edge = edge
+        self.csi = csi
+        self.sugar_z = sugar_z
+        self.storage_cost = storage_cost
+        self.sunlight = RollingStats(window)
+        self.sugar = RollingStats(window)
+        self.import_cost = None
+        self.export_value = None
+
+    def observe(self, observation) -> None:
+        self.sunlight.update(observation.sunlightIndex)
+        self.sugar.update(observation.sugarPrice)
+        self.import_cost = observation.askPrice + observation.transportFees + observation.importTariff
+        self.export_value = observation.bidPrice - observation.transportFees - observation.exportTariff
+
+    def bullish(self) -> bool:
+        scarce_sun = self.sunlight.mean() < self.csi and self.sunlight.change() < 0
+        return scarce_sun or self.sugar.zscore() > self.sugar_z
+
+    def run(self, state: TradingState) -> Tuple[List[Order], int]:
+        observation = state.observations.conversionObservations.get(self.symbol)
+        view = books.get(state, self.symbol)
+        if observation is None or view is None:
+            return [], 0
+        self.observe(observation)
+        position = state.position.get(self.symbol, 0)
+        # flatten through Pristine Cuisine what earlier ticks opened locally
+        conversions = min(self.conversion_limit, abs(position))
+        bullish = self.bullish()
+        orders = []
+        if position <= 0 and not bullish:
+            floor_price = self.import_cost + self.edge
+            room = min(self.conversion_limit, self.position_limit + position)
+            for price, volume in view.bids:
+                if room <= 0 or price < floor_price:
+                    break
+                take = min(room, volume)
+                orders.append(Order(self.symbol, price, -take))
+                room -= take
+            if room > 0:
+                ask = math.ceil(floor_price)
+                if view.best_ask is not None:
+                    ask = max(ask, view.best_ask - 1)
+                orders.append(Order(self.symbol, ask, -room))
+        elif position >= 0:
+            cap_price = self.export_value - self.storage_cost - self.edge
+            room = min(self.conversion_limit, self.position_limit - position)
+            for price, volume in view.asks:
+                if room <= 0 or price > cap_price:
+                    break
+                take = min(room, volume)
+                orders.append(Order(self.symbol, price, take))
+                room -= take
+        logger.print(f"{self.symbol} | import: {self.import_cost:.1f} | export: {self.export_value:.1f} | "
+                     f"sun: {self.sunlight.mean():.1f} ({self.sunlight.change():+.1f}) | sugar z: {self.sugar.zscore():.2f} | "
+                     f"bullish: {bullish} | pos: {position} | conv: {conversions}")
+        return orders, conversions
+
+    def get_state(self) -> list:
+        return [self.sunlight.get_state(), self.sugar.get_state()]
+
+    def set_state(self, values: list) -> None:
+        sunlight, sugar = values
+        self.sunlight.set_state(sunlight)
+        self.sugar.set_state(sugar)
 
 
 class Trader:
 
-    def __init__(self):
+    def __init__(self, params: Dict[str, Any] = None):
 
-        self.sunlight_history = []
-        self.conversion_limit = 10
-        self.position_limit = 75
+        self.params = {**PARAMS, **(params or {})}
 
         self.limits = {
 
@@ -211,8 +656,14 @@ class Trader:
 
             VOLCANIC_ROCK_VOUCHER_10500: 200,
 
+            MAGNIFICENT_MACARONS: 75,
+
         }
 
+        self.macarons = MacaronArbitrage(MAGNIFICENT_MACARONS, CONVERSION_LIMIT, self.limits[MAGNIFICENT_MACARONS],
+                                         window=self.params["macaron_window"], edge=self.params["macaron_edge"],
+                                         csi=self.params["macaron_csi"], sugar_z=self.params["macaron_sugar_z"])
+
         self.default_prices = {
 
             RAINFOREST: 10000,
@@ -235,43 +686,36 @@ class Trader:
 
         }
 
-        self.past_prices = {product: [] for product in PRODUCTS}
-
-        self.ema_prices = {product: None for product in PRODUCTS}
-
-        self.ema_param = 0.5
-
-        self.cdf = NormalDist().cdf
-
-
-
-    def get_mid_price(self, product: str, state: TradingState):
-
-        order_depth = state.order_depths.get(product)
-
-        if not order_depth:
-
-            return self.default_prices[product]
-
-
-
-        bids = order_depth.buy_orders
+        self.ema_prices = {product: None for product in EMA_PRODUCTS}
 
-        asks = order_depth.sell_orders
+        self.ema_param = self.params["ema_param"]
 
+        self.sigma_window = self.params["sigma_window"]
 
+        # every voucher is priced off the rolling volatility of VOLCANIC_ROCK's tick returns
 
-        if not bids or not asks:
+        self.volatility = RollingVolatility(self.sigma_window, periods=TICKS_PER_YEAR)
 
-            return self.default_prices[product]
+        self.state_loaded = False
 
+    def save_state(self) -> str:
+        return StateCodec.encode([[self.ema_prices[product] for product in EMA_PRODUCTS], self.volatility.get_state(),
+                                  self.macarons.get_state()])
 
+    def load_state(self, trader_data: str) -> None:
+        values = StateCodec.decode(trader_data)
+        if not isinstance(values, list) or len(values) != 3 or len(values[0]) != len(EMA_PRODUCTS):
+            return
+        for product, ema in zip(EMA_PRODUCTS, values[0]):
+            self.ema_prices[product] = ema
+        self.volatility.set_state(values[1])
+        self.macarons.set_state(values[2])
 
-        best_bid = max(bids.keys())
 
-        best_ask = min(asks.keys())
 
-        return (best_bid + best_ask) / 2
+    def get_mid_price(self, product: str, state: TradingState):
+        mid = books.mid(state, product)
+        return mid if mid is not None else self.default_prices[product]
 
 
 
@@ -279,8 +723,6 @@ class Trader:
 
         mid_price = self.get_mid_price(product, state)
 
-        self.past_prices[product].append(mid_price)
-
         if self.ema_prices[product] is None:
 
             self.ema_prices[product] = mid_price
@@ -365,83 +807,37 @@ class Trader:
 
     def get_dynamic_sigma(self, product: str) -> float:
 
-        prices = self.past_prices[product]
-
-        if len(prices) < 2:
-
-            return 0.13
-
-        
-
-        log_return = [math.log(prices[i] / prices[i - 1]) for i in range(1, len(prices))]
-
-
-
-
-
-        if len(log_return) > 20:
-
-            log_returns = log_return[-20:]
-
-
-
-        std_dev = np.std(log_returns)
-
+        return self.volatility.sigma()
 
 
-        return std_dev * math.sqrt(365)
-
-
-
-        
-
-
-
-
-
-     
-
-
-
-    def black_scholes_model(self, St: float, K: float, T: float, r: float, sigma: float) -> float:
-
-        d1 = (math.log(St / K) + (r + sigma ** 2 / 2) * T) / (sigma * math.sqrt(T))
-
-        d2 = d1 - sigma * math.sqrt(T)
-
-        return St * self.cdf(d1) - K * math.exp(-r * T) * self.cdf(d2)
-
-
-
-    def black_scholes_strat(self, product: str, strike_price: int, state: TradingState) -> List[Order]:
-
-        volcanic_r_price = self.get_mid_price(VOLCANIC_ROCK, state)
-
-        voucher_price = self.get_mid_price(product, state)
-
-
-
-        St = volcanic_r_price
-
-        K = strike_price  # fixed strike price
 
+    def black_scholes_ladder(self, state: TradingState) -> Dict[Symbol, List[Order]]:
+        St = books.mid(state, VOLCANIC_ROCK)
+        products = [product for product in VOUCHER_STRIKES if product in state.order_depths]
+        if St is None or not products:
+            return {}
+        self.volatility.update(St)
         T = self.get_dynamic_T(state)
+        strikes = np.array([VOUCHER_STRIKES[product] for product in products], dtype=float)
+        sigmas = np.array([self.get_dynamic_sigma(product) for product in products])
+        expected, _, _, _ = black_scholes_batch(St, strikes, T, sigmas)
+        return {
+            product: self.voucher_orders(product, VOUCHER_STRIKES[product], St, T, sigmas[i], expected[i], state)
+            for i, product in enumerate(products)
+        }
 
-        r = 0
-
-        sigma = self.get_dynamic_sigma(product)
-
-
+    def voucher_orders(self, product: str, K: int, St: float, T: float, sigma: float, expected_price: float,
+                       state: TradingState) -> List[Order]:
 
-        expected_price = self.black_scholes_model(St, K, T, r, sigma)
+        voucher_price = self.get_mid_price(product, state)
 
-        spread = 2
+        spread = self.params["voucher_spread"]
 
 
 
         position = self.get_position(product, state)
 
-        volume = min(10, self.limits[product] - abs(position))
+        volume = min(self.params["voucher_max_volume"], self.limits[product] - abs(position))
 
 
 
@@ -457,7 +853,10 @@ class Trader:
 
 
 
-        logger.print(f"Expected price: {expected_price}, Current price: {voucher_price}, Orders: {orders}")
+        logger.print(
+        f"[{product}] Expected: {expected_price:.2f}, Market: {voucher_price:.2f}, "
+        f"Orders: {orders}, Sigma: {sigma:.4f}, TTE: {T:.4f}, St: {St:.2f}, K: {K}, "
+        f"Position: {position}, MaxVol: {volume}")
 
 
 
@@ -465,27 +864,30 @@ class Trader:
 
 
     def run(self, state: TradingState) -> tuple[Dict[Symbol, List[Order]], int, str]:
+        if not self.state_loaded:
+            self.load_state(state.traderData)
+            self.state_loaded = True
+
 
         result = {}
 
         conversions = 0
 
-        trader_data = ""
-        result[RAINFOREST] = self.market_make(RAINFOREST, fair_price=self.default_prices[RAINFOREST], spread=4, state=state)
+        result[RAINFOREST] = self.market_make(RAINFOREST, fair_price=self.default_prices[RAINFOREST], spread=self.params["rainforest_spread"], state=state)
 
-        result[KELP] = self.ema_strategy(KELP, spread=1, state=state)
+        result[KELP] = self.ema_strategy(KELP, spread=self.params["kelp_spread"], state=state)
 
-        #result[VOLCANIC_ROCK_VOUCHER_9500] = self.black_scholes_strat(product=VOLCANIC_ROCK_VOUCHER_9500, strike_price=9500,state=state)
+        #result.update(self.black_scholes_ladder(state))
 
-        #result[VOLCANIC_ROCK_VOUCHER_9750] = self.black_scholes_strat(product=VOLCANIC_ROCK_VOUCHER_9750, strike_price=9750,state=state)
+        macaron_orders, conversions = self.macarons.run(state)
 
-        #result[VOLCANIC_ROCK_VOUCHER_10000] = self.black_scholes_strat(product=VOLCANIC_ROCK_VOUCHER_10000, strike_price=10000,state=state)
+        if macaron_orders:
 
-        #result[VOLCANIC_ROCK_VOUCHER_10250] = self.black_scholes_strat(product=VOLCANIC_ROCK_VOUCHER_10250, strike_price=10250,state=state)
-
-        #result[VOLCANIC_ROCK_VOUCHER_10500] = self.black_scholes_strat(product=VOLCANIC_ROCK_VOUCHER_10500, strike_price=10500,state=state)
+            result[MAGNIFICENT_MACARONS] = macaron_orders
 
         
+        trader_data = self.save_state()
+
         logger.flush(state, result, conversions, trader_data)
 
         return result, conversions, trader_data
\ No newline at end of file
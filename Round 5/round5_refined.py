@@ -1,50 +1,75 @@
 import json
+import base64
+import binascii
+import numbers
+import struct
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
 import math
 import numpy as np
 from typing import Any, List, Dict, Tuple
-from statistics import NormalDist
 from datamodel import Listing, Observation, Order, OrderDepth, ProsperityEncoder, Symbol, Trade, TradingState
 
 
 class Logger:
-    def __init__(self) -> None:
-        self.logs = ""
+    def __init__(self, compact: bool = False) -> None:
+        self.logs: List[str] = []
         self.max_log_length = 3750
+        # compact mode only sends listings once and the depths/positions that changed since the last tick
+        self.compact = compact
+        self.sent_listings = False
+        self.last_depths: Dict[Symbol, str] = {}
+        self.last_position: Dict[Symbol, int] = {}
 
     def print(self, *objects: Any, sep: str = " ", end: str = "\n") -> None:
-        self.logs += sep.join(map(str, objects)) + end
+        self.logs.append(sep.join(map(str, objects)) + end)
 
     def flush(self, state: TradingState, orders: Dict[Symbol, List[Order]], conversions: int, trader_data: str) -> None:
-        base_length = len(self.to_json([
-            self.compress_state(state, ""),
-            self.compress_orders(orders),
-            conversions, "", "",
-        ]))
+        # every section is serialized once; only the three free-text fields are sized to the budget
+        head = "[[" + str(state.timestamp) + ","
+        middle = ("," + ",".join(self.compress_sections(state)) + "],"
+                  + self.to_json(self.compress_orders(orders)) + "," + self.to_json(conversions) + ",")
+        base_length = len(head) + len(middle) + len(",]") + 3 * len('""')
         max_item_length = (self.max_log_length - base_length) // 3
-        print(self.to_json([
-            self.compress_state(state, self.truncate(state.traderData, max_item_length)),
-            self.compress_orders(orders),
-            conversions,
-            self.truncate(trader_data, max_item_length),
-            self.truncate(self.logs, max_item_length),
-        ]))
-        self.logs = ""
-
-    def compress_state(self, state: TradingState, trader_data: str) -> list:
+
+        print(head + self.to_json(self.truncate(state.traderData, max_item_length)) + middle
+              + self.to_json(self.truncate(trader_data, max_item_length)) + ","
+              + self.to_json(self.truncate("".join(self.logs), max_item_length)) + "]")
+
+        self.logs = []
+
+    def compress_sections(self, state: TradingState) -> List[str]:
+        listings = "[]"
+        if not (self.compact and self.sent_listings):
+            listings = self.to_json([[l.symbol, l.product, l.denomination] for l in state.listings.values()])
+            self.sent_listings = True
+
+        depths = []
+        for symbol, od in state.order_depths.items():
+            encoded = self.to_json([od.buy_orders, od.sell_orders])
+            if not self.compact or self.last_depths.get(symbol) != encoded:
+                depths.append(self.to_json(symbol) + ":" + encoded)
+            self.last_depths[symbol] = encoded
+
+        position = state.position
+        if self.compact:
+            position = {p: q for p, q in state.position.items() if self.last_position.get(p) != q}
+            position.update({p: 0 for p in self.last_position if p not in state.position})
+            self.last_position = dict(state.position)
+
         return [
-            state.timestamp,
-            trader_data,
-            [[l.symbol, l.product, l.denomination] for l in state.listings.values()],
-            {s: [od.buy_orders, od.sell_orders] for s, od in state.order_depths.items()},
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades],
-            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades],
-            state.position,
-            [state.observations.plainValueObservations,
-             {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
-              for p, o in state.observations.conversionObservations.items()}]
+            listings,
+            "{" + ",".join(depths) + "}",
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.own_trades.values() for t in trades]),
+            self.to_json([[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp] for trades in state.market_trades.values() for t in trades]),
+            self.to_json(position),
+            self.to_json([state.observations.plainValueObservations,
+                          {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice, o.sunlightIndex]
+                           for p, o in state.observations.conversionObservations.items()}]),
         ]
 
-    def compress_orders(self, orders: Dict[Symbol, List[Order]]) -> list:
+    def compress_orders(self, orders: Dict[Symbol, List[Order]]) -> List[List[Any]]:
         return [[o.symbol, o.price, o.quantity] for ol in orders.values() for o in ol]
 
     def to_json(self, value: Any) -> str:
@@ -55,9 +80,112 @@ class Logger:
 
 logger = Logger()
 
+class BookView:
+    """Sorted snapshot of one ``OrderDepth``; levels are (price, positive volume), best first.
+
+    Levels quoted with no volume are dropped, as ``backtester.l2`` does offline.
+    """
+
+    def __init__(self, order_depth: OrderDepth):
+        self.bids = sorted(((price, volume) for price, volume in order_depth.buy_orders.items() if volume > 0),
+                           reverse=True)
+        self.asks = sorted((price, -volume) for price, volume in order_depth.sell_orders.items() if volume < 0)
+        self.best_bid = self.bids[0][0] if self.bids else None
+        self.best_ask = self.asks[0][0] if self.asks else None
+        if self.bids and self.asks:
+            self.mid = (self.best_bid + self.best_ask) / 2
+            self.spread = self.best_ask - self.best_bid
+        else:
+            self.mid = None
+            self.spread = None
+
+    def microprice(self):
+        if self.mid is None:
+            return None
+        bid_volume = self.bids[0][1]
+        ask_volume = self.asks[0][1]
+        if bid_volume + ask_volume <= 0:
+            return self.mid
+        return (self.best_bid * ask_volume + self.best_ask * bid_volume) / (bid_volume + ask_volume)
+
+    def depth(self, levels: int):
+        return self.bids[:levels], self.asks[:levels]
+
+    def cumulative_volume(self, levels: int):
+        return sum(v for _, v in self.bids[:levels]), sum(v for _, v in self.asks[:levels])
+
+    def imbalance(self, levels: int = 3):
+        bid_volume, ask_volume = self.cumulative_volume(levels)
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total > 0 else None
+
+    def weighted_mid(self, levels: int = 3):
+        """Mean of the bid and ask VWAPs over the first ``levels``."""
+        bid_volume, ask_volume = self.cumulative_volume(levels)
+        if bid_volume <= 0 or ask_volume <= 0:
+            return None
+        bid_vwap = sum(p * v for p, v in self.bids[:levels]) / bid_volume
+        ask_vwap = sum(p * v for p, v in self.asks[:levels]) / ask_volume
+        return (bid_vwap + ask_vwap) / 2
+
+    def depth_slope(self, side, levels: int = 3):
+        """Least-squares slope of cumulative volume against distance from the mid."""
+        side = [(p, v) for p, v in side[:levels] if v > 0]
+        if self.mid is None or len(side) < 2:
+            return None
+        xs, ys, cumulative = [], [], 0
+        for price, volume in side:
+            cumulative += volume
+            xs.append(abs(price - self.mid))
+            ys.append(cumulative)
+        x_mean = sum(xs) / len(xs)
+        y_mean = sum(ys) / len(ys)
+        var = sum((x - x_mean) ** 2 for x in xs)
+        if var <= 0:
+            return None
+        return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / var
+
+    def l2_features(self, levels: int = 3) -> Dict[str, Any]:
+        """The book-shape signals of ``backtester.l2.features`` for this one book."""
+        return {
+            "mid": self.mid,
+            "imbalance": self.imbalance(levels),
+            "microprice": self.microprice(),
+            "weighted_mid": self.weighted_mid(levels),
+            "bid_slope": self.depth_slope(self.bids, levels),
+            "ask_slope": self.depth_slope(self.asks, levels),
+        }
+
+
+class BookCache:
+    """One ``BookView`` per symbol per tick, shared by everything that reads the book."""
+
+    def __init__(self):
+        self.state = None
+        self.views = {}
+
+    def get(self, state: TradingState, symbol: str):
+        if state is not self.state:
+            self.state = state
+            self.views = {}
+        if symbol in self.views:
+            return self.views[symbol]
+        order_depth = state.order_depths.get(symbol)
+        view = BookView(order_depth) if order_depth is not None else None
+        self.views[symbol] = view
+        return view
+
+    def mid(self, state: TradingState, symbol: str):
+        view = self.get(state, symbol)
+        return view.mid if view is not None else None
+
+books = BookCache()
+
+
 
 RAINFOREST = "RAINFOREST_RESIN"
 KELP = "KELP"
+SQUID_INK = "SQUID_INK"
 VOLCANIC_ROCK = "VOLCANIC_ROCK"
 VOLCANIC_ROCK_VOUCHER_9500 = "VOLCANIC_ROCK_VOUCHER_9500"
 VOLCANIC_ROCK_VOUCHER_9750 = "VOLCANIC_ROCK_VOUCHER_9750"
@@ -65,9 +193,518 @@ VOLCANIC_ROCK_VOUCHER_10000 = "VOLCANIC_ROCK_VOUCHER_10000"
 VOLCANIC_ROCK_VOUCHER_10250 = "VOLCANIC_ROCK_VOUCHER_10250"
 VOLCANIC_ROCK_VOUCHER_10500 = "VOLCANIC_ROCK_VOUCHER_10500"
 
+# Tunable knobs, overridable per instance with ``Trader(params)``.
+PARAMS = {
+    "variance_halflife": 50,
+    "fill_halflife": 500,
+    "quote_horizon": 1,
+    "quote_levels": 2,
+    "quote_level_step": 1,
+    "rainforest_gamma": 0.005,
+    "rainforest_fill_decay": 0.5,
+    "kelp_gamma": 0.01,
+    "kelp_fill_decay": 1.0,
+    "squid_gamma": 0.01,
+    "squid_fill_decay": 0.5,
+    "voucher_spread": 0.5,
+    "voucher_max_volume": 10,
+    "sigma_window": 20,
+    "hedge_band": 20,
+    # 1: keep per-counterparty flow and markout in Trader.counterparties (no strategy reads it yet)
+    "track_counterparties": 0,
+}
+
+
+
+# fixed-width fields of the traderData encoding
+INT64 = struct.Struct("<q")
+DOUBLE = struct.Struct("<d")
+LENGTH = struct.Struct("<H")
+
+class StateCodec:
+    """Versioned, base64 binary encoding of trader state for ``traderData``.
+
+    Values are None, int, float, lists of values, or float buffers passed as
+    ``array('f')``/``array('d')`` (decoded back to lists). Every
+    value is tagged, so a payload decodes without a schema; a payload written
+    by another ``VERSION`` decodes to None and the trader starts fresh.
+    """
+
+    VERSION = 3
+
+    @classmethod
+    def encode(cls, value: Any) -> str:
+        out = bytearray([cls.VERSION])
+        cls._pack(value, out)
+        return base64.b64encode(bytes(out)).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> Any:
+        if not data:
+            return None
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (ValueError, binascii.Error):
+            return None
+        if not raw or raw[0] != cls.VERSION:
+            return None
+        try:
+            value, _ = cls._unpack(raw, 1)
+        except (struct.error, IndexError, ValueError):
+            return None
+        return value
+
+    @classmethod
+    def _pack(cls, value: Any, out: bytearray) -> None:
+        # Exact type checks first; the numbers ABCs are only a fallback for numpy scalars and bools.
+        kind = type(value)
+        if kind is float:
+            out += b"d"
+            out += DOUBLE.pack(value)
+        elif kind is list or kind is tuple:
+            out += b"l"
+            out += LENGTH.pack(len(value))
+            for item in value:
+                cls._pack(item, out)
+        elif kind is int:
+            out += b"q"
+            out += INT64.pack(value)
+        elif value is None:
+            out += b"n"
+        elif kind is array:
+            out += b"F" if value.typecode == "f" else b"D"
+            out += LENGTH.pack(len(value))
+            out += value.tobytes()
+        elif isinstance(value, numbers.Integral):
+            out += b"q"
+            out += INT64.pack(int(value))
+        elif isinstance(value, numbers.Real):
+            out += b"d"
+            out += DOUBLE.pack(float(value))
+        else:
+            raise TypeError(f"cannot encode {type(value).__name__} in traderData")
+
+    @classmethod
+    def _unpack(cls, raw: bytes, pos: int) -> Tuple[Any, int]:
+        tag = raw[pos:pos + 1]
+        pos += 1
+        if tag == b"n":
+            return None, pos
+        if tag == b"q":
+            return INT64.unpack_from(raw, pos)[0], pos + 8
+        if tag == b"d":
+            return DOUBLE.unpack_from(raw, pos)[0], pos + 8
+        if tag in (b"F", b"D"):
+            (length,) = LENGTH.unpack_from(raw, pos)
+            typecode = "f" if tag == b"F" else "d"
+            end = pos + 2 + length * array(typecode).itemsize
+            return array(typecode, raw[pos + 2:end]).tolist(), end
+        if tag == b"l":
+            (length,) = LENGTH.unpack_from(raw, pos)
+            pos += 2
+            items = []
+            for _ in range(length):
+                item, pos = cls._unpack(raw, pos)
+                items.append(item)
+            return items, pos
+        raise ValueError(f"unknown traderData tag {tag!r}")
+
+
+class Feature(ABC):
+    """A per-tick input shared by strategies, computed once by ``FeatureCache``.
+
+    ``requires`` names the features it reads for the same symbol; features that
+    read other symbols override ``dependencies``. ``symbols`` lists, in plan
+    order, the symbols it was planned for, which keeps ``get_state`` positional.
+    """
+
+    name = ""
+    requires: Tuple[str, ...] = ()
+    per_symbol = True
+
+    def __init__(self):
+        self.symbols: List[str] = []
+
+    def dependencies(self, symbol: str) -> List[Tuple[str, str]]:
+        return [(name, symbol) for name in self.requires]
+
+    @abstractmethod
+    def compute(self, features: "FeatureCache", symbol: str) -> Any:
+        """This tick's value for ``symbol`` (None if not ``per_symbol``)."""
+
+    def get_state(self) -> list:
+        return []
+
+    def set_state(self, values: list) -> None:
+        pass
+
+class MidFeature(Feature):
+    # 0 when either side of the book is empty, like the strategies always used
+    name = "mid"
+
+    def compute(self, features: "FeatureCache", symbol: str) -> float:
+        mid = books.mid(features.state, symbol)
+        return mid if mid is not None else 0
+
+class SpreadFeature(Feature):
+    name = "spread"
+
+    def compute(self, features: "FeatureCache", symbol: str):
+        view = books.get(features.state, symbol)
+        return view.spread if view is not None else None
+
+class TimeToExpiry(Feature):
+    name = "T"
+    per_symbol = False
+
+    def __init__(self, expiry: int = 8_000_000, days: int = 5):
+        super().__init__()
+        self.expiry = expiry
+        self.days = days
+
+    def compute(self, features: "FeatureCache", symbol: str) -> float:
+        return max(0, self.expiry - features.state.timestamp) / self.expiry * (self.days / 365)
+
+class MidVariance(Feature):
+    """EWMA of squared tick-to-tick mid changes, in price units squared per tick."""
+
+    name = "variance"
+    requires = ("mid",)
+
+    def __init__(self, halflife: float = 50, default: float = 1.0):
+        super().__init__()
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.default = default
+        # symbol -> [last mid (0 before the first book), variance]
+        self.values: Dict[str, array] = {}
+
+    def compute(self, features: "FeatureCache", symbol: str) -> float:
+        mid = features.get("mid", symbol)
+        last = self.values.get(symbol)
+        if last is None:
+            last = self.values[symbol] = array("d", [mid, self.default])
+        elif mid:
+            if last[0]:
+                move = mid - last[0]
+                last[1] += self.alpha * (move * move - last[1])
+            last[0] = mid
+        return last[1]
+
+    def get_state(self) -> list:
+        return [self.values.get(symbol) for symbol in self.symbols]
+
+    def set_state(self, values: list) -> None:
+        for symbol, value in zip(self.symbols, values):
+            if value is not None and len(value) == 2:
+                self.values[symbol] = array("d", value)
+
+class FillIntensity(Feature):
+    """Decayed arrival rate of market trades by distance from the mid, and its fitted curve.
+
+    Each print in ``market_trades`` is bucketed by its distance from the mid of
+    the tick before it, ``bucket_width`` wide, with the last bucket open ended.
+    Counts and the tick count (the exposure) decay with ``halflife`` ticks.
+    Instead of decaying every bucket each tick, new weight grows by the inverse
+    factor. That keeps a tick at O(trades), and the rare rescale keeps it
+    finite. The rate at distance ``d`` is the number of prints per tick at
+    ``d`` or further, which a quote ``d`` from the mid would have filled.
+    ``compute`` fits ``A * exp(-k * d)`` to the log of those rates. It returns
+    ``(A, k)``, or None until ``min_trades`` prints have been seen.
+    """
+
+    name = "fills"
+    requires = ("mid",)
+
+    def __init__(self, buckets: int = 10, bucket_width: float = 1.0, halflife: float = 500, min_trades: float = 20):
+        super().__init__()
+        self.buckets = buckets
+        self.bucket_width = bucket_width
+        self.growth = 2 ** (1 / halflife)
+        self.min_trades = min_trades
+        # symbol -> [last mid, last trade timestamp, weight, exposure, counts]
+        self.books: Dict[str, list] = {}
+
+    def compute(self, features: "FeatureCache", symbol: str):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = [None, -1, 1.0, 0.0, array("d", bytes(8 * self.buckets))]
+        self.update(book, features.state.market_trades.get(symbol, ()))
+        mid = features.get("mid", symbol)
+        if mid:
+            book[0] = mid
+        return self.fit(symbol)
+
+    def update(self, book: list, trades) -> None:
+        mid, seen, weight, exposure, counts = book
+        weight *= self.growth
+        if weight > 1e100:
+            for b in range(self.buckets):
+                counts[b] /= weight
+            exposure /= weight
+            weight = 1.0
+        exposure += weight
+        for trade in trades:
+            if trade.timestamp <= book[1] or mid is None:
+                continue
+            seen = max(seen, trade.timestamp)
+            bucket = min(int(abs(trade.price - mid) / self.bucket_width), self.buckets - 1)
+            counts[bucket] += weight
+        book[1:4] = [seen, weight, exposure]
+
+    def rates(self, symbol: str) -> List[float]:
+        """Prints per tick at each bucket's lower edge or further from the mid."""
+        book = self.books.get(symbol)
+        if book is None or book[3] <= 0:
+            return [0.0] * self.buckets
+        rates, total = [0.0] * self.buckets, 0.0
+        for b in range(self.buckets - 1, -1, -1):
+            total += book[4][b]
+            rates[b] = total / book[3]
+        return rates
+
+    def fit(self, symbol: str):
+        book = self.books.get(symbol)
+        if book is None or sum(book[4]) < self.min_trades * book[2]:
+            return None
+        points = [(b * self.bucket_width, math.log(rate)) for b, rate in enumerate(self.rates(symbol)) if rate > 0]
+        if len(points) < 2:
+            return None
+        x_mean = sum(x for x, _ in points) / len(points)
+        y_mean = sum(y for _, y in points) / len(points)
+        var = sum((x - x_mean) ** 2 for x, _ in points)
+        slope = sum((x - x_mean) * (y - y_mean) for x, y in points) / var
+        if slope >= 0:
+            return None
+        return math.exp(y_mean - slope * x_mean), -slope
+
+    def intensity(self, symbol: str, distance: float) -> float:
+        fitted = self.fit(symbol)
+        return fitted[0] * math.exp(-fitted[1] * distance) if fitted is not None else 0.0
+
+    def get_state(self) -> list:
+        states = []
+        for symbol in self.symbols:
+            book = self.books.get(symbol)
+            if book is None:
+                states.append(None)
+                continue
+            mid, seen, weight, exposure, counts = book
+            states.append([mid, seen, exposure / weight, array("d", [c / weight for c in counts])])
+        return states
+
+    def set_state(self, values: list) -> None:
+        for symbol, value in zip(self.symbols, values):
+            if value is not None and len(value) == 4 and len(value[3]) == self.buckets:
+                mid, seen, exposure, counts = value
+                self.books[symbol] = [mid, seen, 1.0, exposure, array("d", counts)]
+
+class L2Feature(Feature):
+    # imbalance, microprice, weighted mid and depth slopes; None without a book
+    name = "l2"
+
+    def __init__(self, levels: int = 3):
+        super().__init__()
+        self.levels = levels
+
+    def compute(self, features: "FeatureCache", symbol: str):
+        view = books.get(features.state, symbol)
+        return view.l2_features(self.levels) if view is not None else None
+
+class ImpliedVolFeature(Feature):
+    name = "iv"
+    requires = ("vouchers",)
+
+    def dependencies(self, symbol: str) -> List[Tuple[str, str]]:
+        return [("vouchers", None)]
+
+    def compute(self, features: "FeatureCache", symbol: str) -> float:
+        return features.get("vouchers").implied_vols.get(symbol, float("nan"))
+
+class CounterpartyTracker(Feature):
+    """Running flow and markout per (trader, symbol) from the named trade prints.
+
+    Every print in ``market_trades`` and ``own_trades`` newer than the last one
+    seen is added to both counterparties' tallies, so a tick costs O(trades).
+    For each horizon the print also waits in a per-symbol FIFO and is marked,
+    like ``backtester.counterparty``, against the symbol's last print at or
+    before ``timestamp + horizon``: it settles once a print of the symbol at or
+    past that time has been seen, so a queue only holds the prints since the
+    symbol last traded beyond the horizon. Names cannot go through the
+    ``StateCodec``, so the tallies are not persisted and a fresh ``Trader``
+    starts them over.
+    """
+
+    name = "counterparties"
+    per_symbol = False
+
+    def __init__(self, horizons: Tuple[int, ...] = (100, 1_000, 10_000)):
+        super().__init__()
+        self.horizons = horizons
+        # row: trades, bought, sold, then per horizon markout, marked lots, hits, marked trades
+        self.rows: Dict[Tuple[str, str], List[float]] = {}
+        self.by_trader: Dict[str, List[str]] = {}
+        self.pending: Dict[str, List[deque]] = {}
+        self.last_price: Dict[str, float] = {}
+        self.seen = -1
+
+    def compute(self, features: "FeatureCache", symbol: str) -> "CounterpartyTracker":
+        self.update(features.state)
+        return self
+
+    def row(self, trader: str, symbol: str) -> List[float]:
+        row = self.rows.get((trader, symbol))
+        if row is None:
+            row = self.rows[(trader, symbol)] = [0] * (3 + 4 * len(self.horizons))
+            self.by_trader.setdefault(trader, []).append(symbol)
+        return row
+
+    def update(self, state: TradingState) -> None:
+        prints: Dict[str, List[Trade]] = {}
+        for trades in (state.market_trades, state.own_trades):
+            for symbol, symbol_trades in trades.items():
+                fresh = [trade for trade in symbol_trades if trade.timestamp > self.seen]
+                if fresh:
+                    prints.setdefault(symbol, []).extend(fresh)
+        newest = self.seen
+        for symbol, symbol_prints in prints.items():
+            symbol_prints.sort(key=lambda trade: trade.timestamp)
+            pending = self.pending.get(symbol)
+            if pending is None:
+                pending = self.pending[symbol] = [deque() for _ in self.horizons]
+            last = len(symbol_prints) - 1
+            for i, trade in enumerate(symbol_prints):
+                if i == 0 or trade.timestamp != symbol_prints[i - 1].timestamp:
+                    self.settle(symbol, trade.timestamp - 1)
+                self.last_price[symbol] = trade.price
+                for trader, side in ((trade.buyer, 1), (trade.seller, -1)):
+                    if not trader:
+                        continue
+                    row = self.row(trader, symbol)
+                    row[0] += 1
+                    row[1 if side > 0 else 2] += trade.quantity
+                    entry = (trade.timestamp, row, side, trade.price, trade.quantity)
+                    for queue in pending:
+                        queue.append(entry)
+                if i == last or trade.timestamp != symbol_prints[i + 1].timestamp:
+                    self.settle(symbol, trade.timestamp)
+            newest = max(newest, symbol_prints[-1].timestamp)
+        self.seen = newest
+
+    def settle(self, symbol: str, until: int) -> None:
+        """Mark the prints whose horizon ends at or before ``until`` against the last print."""
+        reference = self.last_price.get(symbol)
+        n = len(self.horizons)
+        for h, (horizon, queue) in enumerate(zip(self.horizons, self.pending[symbol])):
+            while queue and queue[0][0] + horizon <= until:
+                _, row, side, price, quantity = queue.popleft()
+                move = side * (reference - price)
+                row[3 + h] += move * quantity
+                row[3 + n + h] += quantity
+                row[3 + 2 * n + h] += move > 0
+                row[3 + 3 * n + h] += 1
+
+    def stats(self, trader: str, symbol: str = None) -> Dict[str, Any]:
+        """Flow and markout of ``trader`` in ``symbol``, or summed over its symbols."""
+        symbols = self.by_trader.get(trader, []) if symbol is None else [symbol]
+        total = [0] * (3 + 4 * len(self.horizons))
+        for sym in symbols:
+            for i, value in enumerate(self.rows.get((trader, sym), ())):
+                total[i] += value
+        n = len(self.horizons)
+        markout, marked_qty, hits, marked = (total[3 + k * n:3 + (k + 1) * n] for k in range(4))
+        return {
+            "trades": total[0],
+            "bought": total[1],
+            "sold": total[2],
+            "net": total[1] - total[2],
+            "markout": {h: m / q if q else float("nan") for h, m, q in zip(self.horizons, markout, marked_qty)},
+            "hit_rate": {h: w / c if c else float("nan") for h, w, c in zip(self.horizons, hits, marked)},
+        }
+
+class FeatureCache:
+    """Registry of features and their values for the current tick.
+
+    ``plan`` expands the names each strategy lists in ``Strategy.features`` into
+    (feature, symbol) keys plus everything they depend on, in dependency order.
+    ``begin`` then computes, for the strategies trading this tick, each of those
+    keys exactly once before any strategy runs; ``get`` reads them back (and
+    computes an unplanned key on first use).
+    """
+
+    def __init__(self, features: List[Feature] = ()):
+        self.registry: Dict[str, Feature] = {}
+        self.order: List[Tuple[str, str]] = []
+        self.needs: Dict[str, set] = {}
+        self.values: Dict[Tuple[str, str], Any] = {}
+        self.state = None
+        for feature in features:
+            self.register(feature)
+
+    def register(self, feature: Feature) -> Feature:
+        self.registry[feature.name] = feature
+        return feature
+
+    def key(self, name: str, symbol: str = None) -> Tuple[str, str]:
+        return name, symbol if self.registry[name].per_symbol else None
+
+    def plan(self, strategies: List["Strategy"]) -> None:
+        self.order = []
+        self.needs = {}
+        for feature in self.registry.values():
+            feature.symbols = []
+        closures: Dict[Tuple[str, str], set] = {}
+
+        def visit(key: Tuple[str, str], path: frozenset) -> set:
+            if key in closures:
+                return closures[key]
+            if key in path:
+                raise ValueError(f"feature dependency cycle through {key[0]}")
+            feature = self.registry[key[0]]
+            needed = {key}
+            for name, symbol in feature.dependencies(key[1]):
+                needed |= visit(self.key(name, symbol), path | {key})
+            closures[key] = needed
+            self.order.append(key)
+            if feature.per_symbol:
+                feature.symbols.append(key[1])
+            return needed
+
+        for strategy in strategies:
+            needed = set()
+            for name in strategy.features:
+                needed |= visit(self.key(name, strategy.symbol), frozenset())
+            self.needs[strategy.symbol] = needed
+
+    def begin(self, state: TradingState, strategies: List["Strategy"]) -> None:
+        self.state = state
+        self.values = {}
+        needed = set()
+        for strategy in strategies:
+            needed |= self.needs.get(strategy.symbol, set())
+        for key in self.order:
+            if key in needed:
+                self.values[key] = self.registry[key[0]].compute(self, key[1])
+
+    def get(self, name: str, symbol: str = None) -> Any:
+        key = self.key(name, symbol)
+        if key not in self.values:
+            self.values[key] = self.registry[name].compute(self, key[1])
+        return self.values[key]
+
+    def get_state(self) -> list:
+        return [feature.get_state() for feature in self.registry.values()]
+
+    def set_state(self, values: list) -> None:
+        if len(values) != len(self.registry):
+            return
+        for feature, feature_state in zip(self.registry.values(), values):
+            feature.set_state(feature_state)
 
 
 class Strategy:
+    # names of the features run() reads from the FeatureCache
+    features: Tuple[str, ...] = ()
+
     def __init__(self, symbol: str, limit: int):
         self.symbol = symbol
         self.limit = limit
@@ -80,83 +717,470 @@ class Strategy:
         self.orders.append(Order(self.symbol, price, -quantity))
 
     def get_mid_price(self, state: TradingState) -> float:
-        od = state.order_depths.get(self.symbol)
-        if not od or not od.buy_orders or not od.sell_orders:
-            return 0
-        return (max(od.buy_orders) + min(od.sell_orders)) / 2
+        mid = books.mid(state, self.symbol)
+        return mid if mid is not None else 0
 
-class MarketMakingStrategy(Strategy):
-    def __init__(self, symbol: str, limit: int, default_price: int):
-        super().__init__(symbol, limit)
-        self.default_price = default_price
+    def get_state(self) -> list:
+        return []
 
-    def run(self, state: TradingState) -> Tuple[List[Order], int]:
-        self.orders.clear()
-        position = state.position.get(self.symbol, 0)
-        spread = 4
-        bid = self.default_price - spread
-        ask = self.default_price + spread
-        self.buy(bid, max(0, self.limit - position))
-        self.sell(ask, max(0, self.limit + position))
-        return self.orders, 0
+    def set_state(self, values: list) -> None:
+        pass
+
+class QuotingStrategy(Strategy):
+    """Inventory-aware market making after Avellaneda and Stoikov.
+
+    With fair value ``s``, per-tick mid variance ``var``, position ``q``, risk
+    aversion ``gamma`` and a horizon of ``horizon`` ticks, quotes are centred on
+    the reservation price ``s - q * gamma * var * horizon`` with half spread
+    ``gamma * var * horizon / 2 + log(1 + gamma / k) / gamma``. ``k`` is the
+    decay of the fill intensity ``A * exp(-k * distance)`` from ``intensity``.
+    Each side quotes ``levels`` prices ``level_step`` apart. Its total size
+    stops where inventory would skew the reservation price by a full half
+    spread, and is split across the levels by their fill intensity. The work
+    per tick is O(levels).
+    """
 
-class EMAStrategy(Strategy):
-    def __init__(self, symbol: str, limit: int, alpha=0.5):
+    features = ("mid", "variance", "l2", "fills")
+
+    def __init__(self, symbol: str, limit: int, fair_value: float = None, gamma: float = 0.05,
+                 horizon: float = 1, levels: int = 2, level_step: int = 1, fill_decay: float = 1.0):
         super().__init__(symbol, limit)
-        self.alpha = alpha
-        self.ema_price = None
+        self.fair_value = fair_value
+        self.gamma = gamma
+        self.horizon = horizon
+        self.levels = levels
+        self.level_step = level_step
+        self.fill_decay = fill_decay
+
+    def fair(self, features: FeatureCache) -> float:
+        if self.fair_value is not None:
+            return self.fair_value
+        l2 = features.get("l2", self.symbol)
+        return l2["microprice"] if l2 is not None and l2["microprice"] is not None else None
+
+    def intensity(self, features: FeatureCache) -> float:
+        """Decay ``k`` of the fill intensity fitted to the market trades, ``fill_decay`` until there is one."""
+        fitted = features.get("fills", self.symbol)
+        return fitted[1] if fitted is not None else self.fill_decay
 
-    def run(self, state: TradingState) -> Tuple[List[Order], int]:
+    def quote_sizes(self, total: int, k: float) -> List[int]:
+        weights = [math.exp(-k * level * self.level_step) for level in range(self.levels)]
+        scale = total / sum(weights)
+        sizes = [int(weight * scale) for weight in weights]
+        sizes[0] += total - sum(sizes)
+        return sizes
+
+    def run(self, state: TradingState, features: FeatureCache) -> Tuple[List[Order], int]:
         self.orders.clear()
-        mid = self.get_mid_price(state)
-        if self.ema_price is None:
-            self.ema_price = mid
-        else:
-            self.ema_price = self.alpha * mid + (1 - self.alpha) * self.ema_price
+        fair = self.fair(features)
+        if fair is None:
+            return self.orders, 0
+        k = max(self.intensity(features), 1e-6)
+        risk = self.gamma * features.get("variance", self.symbol) * self.horizon
         position = state.position.get(self.symbol, 0)
-        self.buy(int(self.ema_price - 1), self.limit - position)
-        self.sell(int(self.ema_price + 1), self.limit + position)
+        reservation = fair - position * risk
+        half_spread = risk / 2 + math.log(1 + self.gamma / k) / self.gamma
+        cap = int(half_spread / risk) if risk > 0 else self.limit
+        bid = math.floor(reservation - half_spread)
+        ask = math.ceil(reservation + half_spread)
+        for side, capacity in ((1, self.limit - position), (-1, self.limit + position)):
+            total = max(0, min(capacity, cap))
+            for level, size in enumerate(self.quote_sizes(total, k)):
+                if size <= 0:
+                    continue
+                if side > 0:
+                    self.buy(bid - level * self.level_step, size)
+                else:
+                    self.sell(ask + level * self.level_step, size)
         return self.orders, 0
 
+SQRT_2PI = math.sqrt(2 * math.pi)
+
+
+def norm_cdf(x):
+    """Vectorised standard normal CDF (Abramowitz & Stegun 26.2.17, |error| < 7.5e-8)."""
+    x = np.asarray(x, dtype=float)
+    t = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = 1.0 - np.exp(-0.5 * x * x) / SQRT_2PI * poly
+    return np.where(x >= 0, upper, 1.0 - upper)
+
+
+def black_scholes_batch(St, K, T, sigma, r: float = 0.0):
+    """Call price, delta, gamma and vega for all inputs in one NumPy pass.
+
+    Arguments broadcast against each other, so ``St`` can be one spot with
+    arrays of strikes and sigmas (the voucher ladder at one tick) or whole
+    historical columns. Expired or zero-volatility inputs price at intrinsic.
+    """
+    St = np.asarray(St, dtype=float)
+    K = np.asarray(K, dtype=float)
+    T = np.asarray(T, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    sqrt_T = np.sqrt(np.maximum(T, 0.0))
+    vol_time = sigma * sqrt_T
+    discount = np.exp(-r * T)
+    live = (vol_time > 0) & (St > 0) & (K > 0)
+    all_live = live.all()
+    if not all_live:
+        vol_time = np.where(live, vol_time, 1.0)
+        St_live = np.where(live, St, 1.0)
+        K_live = np.where(live, K, 1.0)
+    else:
+        St_live, K_live = St, K
+    d1 = (np.log(St_live / K_live) + (r + 0.5 * sigma * sigma) * T) / vol_time
+    cdf_d1 = norm_cdf(d1)
+    pdf_d1 = np.exp(-0.5 * d1 * d1) / SQRT_2PI
+    price = St * cdf_d1 - K * discount * norm_cdf(d1 - vol_time)
+    delta = cdf_d1
+    gamma = pdf_d1 / (St_live * vol_time)
+    vega = St * pdf_d1 * sqrt_T
+    if not all_live:
+        price = np.where(live, price, np.maximum(St - K * discount, 0.0))
+        delta = np.where(live, delta, (St > K * discount).astype(float))
+        gamma = np.where(live, gamma, 0.0)
+        vega = np.where(live, vega, 0.0)
+    return price, delta, gamma, vega
+
+
+def implied_vol_batch(price, St, K, T, guess=None, r: float = 0.0, tol: float = 1e-4, max_iter: int = 50):
+    """Implied volatility of every call price at once.
+
+    Safeguarded Newton: each element keeps a [low, high] bracket and bisects
+    whenever the Newton step leaves it, so every strike converges even deep in
+    or out of the money. ``guess`` (the previous tick's solution) warm-starts
+    the iteration; prices outside the no-arbitrage bounds give NaN.
+    """
+    price, St, K, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (price, St, K, T)))
+    intrinsic = np.maximum(St - K * np.exp(-r * T), 0.0)
+    valid = (T > 0) & (St > 0) & (K > 0) & (price > intrinsic) & (price < St)
+    T_safe = np.where(valid, T, 1.0)
+    St_safe = np.where(valid, St, 1.0)
+
+    # Brenner-Subrahmanyam at-the-money approximation as the cold start
+    sigma = np.sqrt(2 * math.pi / T_safe) * price / St_safe
+    if guess is not None:
+        guess = np.broadcast_to(np.asarray(guess, dtype=float), price.shape)
+        sigma = np.where(np.isfinite(guess) & (guess > 0), guess, sigma)
+    low = np.full(price.shape, 1e-4)
+    high = np.full(price.shape, 5.0)
+    sigma = np.where(valid, np.clip(sigma, low, high), 0.5)
+
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            model, _, _, vega = black_scholes_batch(St_safe, K, T_safe, sigma, r)
+            diff = model - price
+            done = ~valid | (np.abs(diff) < tol)
+            if done.all():
+                break
+            high = np.where(diff > 0, sigma, high)
+            low = np.where(diff < 0, sigma, low)
+            step = sigma - diff / vega
+            bisect = ~np.isfinite(step) | (step <= low) | (step >= high)
+            sigma = np.where(done, sigma, np.where(bisect, 0.5 * (low + high), step))
+    return np.where(valid, sigma, np.nan)
+
+
+class RollingVolatility:
+    """Annualised std of the last ``window`` log returns, O(1) per update.
+
+    Returns sit in a fixed ring buffer next to their running sum and sum of
+    squares; the sums are rebuilt from the buffer once per lap so float drift
+    cannot accumulate.
+    """
+
+    def __init__(self, window: int = 20, default: float = 0.13, periods: int = 365):
+        self.window = window
+        self.default = default
+        self.scale = math.sqrt(periods)
+        self.returns = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last_price = None
+
+    def update(self, price: float) -> None:
+        if price <= 0:
+            return
+        if self.last_price is not None:
+            r = math.log(price / self.last_price)
+            if self.count == self.window:
+                old = self.returns[self.index]
+                self.total -= old
+                self.total_sq -= old * old
+            else:
+                self.count += 1
+            self.returns[self.index] = r
+            self.total += r
+            self.total_sq += r * r
+            self.index = (self.index + 1) % self.window
+            if self.index == 0:
+                self.total = sum(self.returns)
+                self.total_sq = sum(x * x for x in self.returns)
+        self.last_price = price
+
+    def sigma(self) -> float:
+        if self.count < 2:
+            return self.default
+        mean = self.total / self.count
+        variance = max(0.0, self.total_sq / self.count - mean * mean)
+        return math.sqrt(variance) * self.scale
+
+    def get_state(self):
+        if self.last_price is None:
+            return None
+        return [self.last_price, self.index, self.count, array("d", self.returns[:self.count])]
+
+    def set_state(self, values: list) -> None:
+        if values is None:
+            return
+        last_price, index, count, returns = values
+        if count > self.window or index >= self.window or len(returns) != count:
+            return
+        self.returns = list(returns) + [0.0] * (self.window - count)
+        self.last_price = last_price
+        self.index = index
+        self.count = count
+        self.total = sum(self.returns)
+        self.total_sq = sum(x * x for x in self.returns)
+
+
+class VolatilitySmile:
+    """Quadratic IV smile in moneyness ``m = log(K / S) / sqrt(T)``.
+
+    The fit is a rolling weighted least squares: the normal equations are
+    decayed by ``decay`` each tick and the new (m, iv) points are added, so a
+    refit is one 3x3 solve regardless of how much history it summarises.
+    """
+
+    def __init__(self, decay: float = 0.95, ridge: float = 1e-8, degree: int = 2):
+        self.decay = decay
+        self.ridge = ridge
+        self.terms = degree + 1
+        self.xtx = np.zeros((self.terms, self.terms))
+        self.xty = np.zeros(self.terms)
+        self.samples = 0
+        self.coeffs = None
+
+    @staticmethod
+    def moneyness(St, K, T):
+        return np.log(np.asarray(K, dtype=float) / St) / np.sqrt(T)
+
+    def update(self, moneyness, ivs, weights=None) -> None:
+        moneyness = np.asarray(moneyness, dtype=float)
+        ivs = np.asarray(ivs, dtype=float)
+        weights = np.ones_like(ivs) if weights is None else np.asarray(weights, dtype=float)
+        ok = np.isfinite(moneyness) & np.isfinite(ivs) & (weights > 0)
+        X = np.vander(moneyness[ok], self.terms, increasing=True)
+        Xw = X.T * weights[ok]
+        self.xtx = self.decay * self.xtx + Xw @ X
+        self.xty = self.decay * self.xty + Xw @ ivs[ok]
+        self.samples += int(ok.sum())
+        if self.samples >= self.terms:
+            self.coeffs = np.linalg.solve(self.xtx + self.ridge * np.eye(self.terms), self.xty)
+
+    def get_state(self) -> list:
+        return [array("d", self.xtx.ravel()), array("d", self.xty), self.samples]
+
+    def set_state(self, values: list) -> None:
+        xtx, xty, samples = values
+        if len(xty) != self.terms or len(xtx) != self.terms * self.terms:
+            return
+        self.xtx = np.array(xtx).reshape(self.terms, self.terms)
+        self.xty = np.array(xty)
+        self.samples = samples
+        if self.samples >= self.terms:
+            self.coeffs = np.linalg.solve(self.xtx + self.ridge * np.eye(self.terms), self.xty)
+
+    def iv(self, moneyness):
+        if self.coeffs is None:
+            return np.full(np.shape(moneyness), np.nan)
+        return np.polynomial.polynomial.polyval(moneyness, self.coeffs)
+
+    def price(self, St, K, T):
+        iv = self.iv(self.moneyness(St, K, T))
+        price = black_scholes_batch(St, K, T, iv)[0]
+        return np.where(np.isfinite(iv) & (iv > 0), price, np.nan)
+
+
+class VoucherPricer(Feature):
+    """The ``vouchers`` feature: every registered strike priced in one ``black_scholes_batch`` call.
+
+    Once per tick, before the voucher strategies run, it feeds all voucher mids
+    into their volatility estimators, prices the whole ladder, solves the
+    market implied vols warm-started from the previous tick and refits the
+    smile; the strategies read the result from ``expected``/``greeks``/
+    ``implied_vols``/``smile_prices``.
+    """
+
+    name = "vouchers"
+    per_symbol = False
+
+    def __init__(self, rock_symbol: str, smile: VolatilitySmile = None):
+        super().__init__()
+        self.rock_symbol = rock_symbol
+        self.smile = smile if smile is not None else VolatilitySmile()
+        self.strategies: List["BlackScholesStrategy"] = []
+        self.rock_mid = 0.0
+        self.T = 0.0
+        self.expected: Dict[str, float] = {}
+        self.greeks: Dict[str, Tuple[float, float, float]] = {}
+        self.implied_vols: Dict[str, float] = {}
+        self.smile_prices: Dict[str, float] = {}
+        # last delta and gamma of every registered voucher, NaN until it is first priced
+        self.deltas = np.zeros(0)
+        self.gammas = np.zeros(0)
+
+    def register(self, strategy: "BlackScholesStrategy") -> None:
+        self.strategies.append(strategy)
+        self.deltas = np.append(self.deltas, np.nan)
+        self.gammas = np.append(self.gammas, np.nan)
+
+    def dependencies(self, symbol: str) -> List[Tuple[str, str]]:
+        return [("T", None), ("mid", self.rock_symbol)] + [("mid", strategy.symbol) for strategy in self.strategies]
+
+    def compute(self, features: FeatureCache, symbol: str) -> "VoucherPricer":
+        self.update(features)
+        return self
+
+    def get_state(self):
+        if not self.smile.samples and np.isnan(self.deltas).all():
+            return None
+        return [[self.implied_vols.get(strategy.symbol) for strategy in self.strategies], self.smile.get_state(),
+                array("d", self.deltas), array("d", self.gammas)]
+
+    def set_state(self, values: list) -> None:
+        if values is None:
+            return
+        implied_vols, smile, deltas, gammas = values
+        if len(implied_vols) == len(self.strategies):
+            for strategy, iv in zip(self.strategies, implied_vols):
+                if iv is not None:
+                    self.implied_vols[strategy.symbol] = iv
+        if len(deltas) == len(gammas) == len(self.strategies):
+            self.deltas = np.array(deltas)
+            self.gammas = np.array(gammas)
+        self.smile.set_state(smile)
+
+    def update(self, features: FeatureCache) -> None:
+        self.expected = {}
+        self.greeks = {}
+        self.smile_prices = {}
+        self.rock_mid = features.get("mid", self.rock_symbol)
+        self.T = features.get("T")
+        if self.rock_mid == 0:
+            return
+
+        live = []
+        indices = []
+        mids = []
+        for index, strategy in enumerate(self.strategies):
+            voucher_mid = features.get("mid", strategy.symbol)
+            if voucher_mid != 0:
+                strategy.observe(voucher_mid)
+                live.append(strategy)
+                indices.append(index)
+                mids.append(voucher_mid)
+        if not live:
+            return
+
+        strikes = np.array([strategy.strike for strategy in live], dtype=float)
+        sigmas = np.array([strategy.get_dynamic_sigma() for strategy in live])
+        price, delta, gamma, vega = black_scholes_batch(self.rock_mid, strikes, self.T, sigmas)
+        self.deltas[indices] = delta
+        self.gammas[indices] = gamma
+        guess = np.array([self.implied_vols.get(strategy.symbol, np.nan) for strategy in live])
+        ivs = implied_vol_batch(np.array(mids), self.rock_mid, strikes, self.T, guess=guess)
+        for i, strategy in enumerate(live):
+            self.expected[strategy.symbol] = float(price[i])
+            self.greeks[strategy.symbol] = (float(delta[i]), float(gamma[i]), float(vega[i]))
+            if np.isfinite(ivs[i]):
+                self.implied_vols[strategy.symbol] = float(ivs[i])
+            else:
+                self.implied_vols.pop(strategy.symbol, None)
+
+        if self.T > 0:
+            moneyness = self.smile.moneyness(self.rock_mid, strikes, self.T)
+            self.smile.update(moneyness, ivs, weights=vega)
+            # a NaN sigma would price at intrinsic, so only strikes the smile covers get a price
+            fitted = self.smile.iv(moneyness)
+            priced = np.isfinite(fitted) & (fitted > 0)
+            if priced.any():
+                smile_prices = black_scholes_batch(self.rock_mid, strikes[priced], self.T, fitted[priced])[0]
+                for strategy, smile_price in zip((s for s, ok in zip(live, priced) if ok), smile_prices):
+                    self.smile_prices[strategy.symbol] = float(smile_price)
+
+    def portfolio_greeks(self, position: Dict[str, int]):
+        """Net delta and gamma of the voucher positions, in rock units.
+
+        A voucher without a two-sided book this tick counts at the greeks it
+        was last priced at; None if a held voucher has never been priced.
+        """
+        held = np.array([position.get(strategy.symbol, 0) for strategy in self.strategies], dtype=float)
+        holding = held != 0
+        if np.isnan(self.deltas[holding]).any():
+            return None
+        return float(held[holding] @ self.deltas[holding]), float(held[holding] @ self.gammas[holding])
+
+    def smile_iv(self, strike: float) -> float:
+        """Fitted smile IV at any strike for the current tick (NaN before the first fit)."""
+        if self.rock_mid == 0 or self.T <= 0:
+            return float("nan")
+        return float(self.smile.iv(self.smile.moneyness(self.rock_mid, strike, self.T)))
+
+    def smile_price(self, strike: float) -> float:
+        """Call price at the fitted smile IV (NaN wherever ``smile_iv`` is)."""
+        iv = self.smile_iv(strike)
+        if not np.isfinite(iv) or iv <= 0:
+            return float("nan")
+        return float(black_scholes_batch(self.rock_mid, strike, self.T, iv)[0])
+
+
 class BlackScholesStrategy(Strategy):
-    def __init__(self, symbol: str, limit: int, strike_price: int, rock_symbol: str):
+    features = ("mid", "vouchers", "iv")
+
+    def __init__(self, symbol: str, limit: int, strike_price: int, rock_symbol: str, sigma_window: int = 20,
+                 pricer: VoucherPricer = None, use_smile: bool = False, spread: float = 0.5, max_volume: int = 10):
         super().__init__(symbol, limit)
         self.strike = strike_price
+        self.spread = spread
+        self.max_volume = max_volume
+        self.use_smile = use_smile
         self.rock_symbol = rock_symbol
-        self.price_history: List[float] = []
-        self.cdf = NormalDist().cdf
+        self.volatility = RollingVolatility(sigma_window)
+        self.pricer = pricer if pricer is not None else VoucherPricer(rock_symbol)
+        self.pricer.register(self)
 
-    def black_scholes(self, St, K, T, r, sigma):
-        d1 = (math.log(St / K) + (r + sigma ** 2 / 2) * T) / (sigma * math.sqrt(T))
-        d2 = d1 - sigma * math.sqrt(T)
-        return St * self.cdf(d1) - K * math.exp(-r * T) * self.cdf(d2)
+    def observe(self, voucher_mid: float) -> None:
+        self.volatility.update(voucher_mid)
 
     def get_dynamic_sigma(self) -> float:
-        if len(self.price_history) < 2:
-            return 0.13
-        log_returns = [math.log(self.price_history[i] / self.price_history[i-1]) for i in range(1, len(self.price_history))]
-        return np.std(log_returns[-20:]) * math.sqrt(365)
+        return self.volatility.sigma()
 
-    def run(self, state: TradingState) -> Tuple[List[Order], int]:
+    def get_state(self) -> list:
+        return [self.volatility.get_state()]
+
+    def set_state(self, values: list) -> None:
+        self.volatility.set_state(values[0])
+
+    def run(self, state: TradingState, features: FeatureCache) -> Tuple[List[Order], int]:
         self.orders.clear()
-        rock_mid = Strategy(self.rock_symbol, 0).get_mid_price(state)
-        voucher_mid = self.get_mid_price(state)
-        if rock_mid == 0 or voucher_mid == 0:
+        expected = self.pricer.expected.get(self.symbol)
+        if self.use_smile:
+            expected = self.pricer.smile_prices.get(self.symbol, expected)
+        if expected is None:
             return [], 0
 
-        self.price_history.append(voucher_mid)
-        if len(self.price_history) > 100:
-            self.price_history.pop(0)
-
-        T = max(0, 8_000_000 - state.timestamp) / 8_000_000 * (5 / 365)
+        voucher_mid = features.get("mid", self.symbol)
         sigma = self.get_dynamic_sigma()
-        expected = self.black_scholes(rock_mid, self.strike, T, 0, sigma)
 
         pos = state.position.get(self.symbol, 0)
-        volume = min(10, self.limit - abs(pos))
-        spread = 0.5
+        volume = min(self.max_volume, self.limit - abs(pos))
+        spread = self.spread
 
-        logger.print(f"[{self.symbol}] Expected: {expected:.2f}, Market: {voucher_mid:.2f}, Sigma: {sigma:.4f}")
+        iv = features.get("iv", self.symbol)
+        logger.print(f"[{self.symbol}] Expected: {expected:.2f}, Market: {voucher_mid:.2f}, Sigma: {sigma:.4f}, IV: {iv:.4f}")
 
         if voucher_mid > expected + spread:
             self.sell(int(voucher_mid - spread), volume)
@@ -166,25 +1190,100 @@ class BlackScholesStrategy(Strategy):
 
 
 
+class DeltaHedgeStrategy(Strategy):
+    """Keeps the voucher book's net delta inside ``band`` by trading the rock itself.
+
+    The voucher delta is one dot product of the positions with the pricer's
+    delta vector, so the cost stays flat as strikes are added. Inside the band
+    nothing is sent (no churn); outside it the rock position is moved to the
+    delta-neutral target at the touch.
+    """
+
+    features = ("vouchers",)
+
+    def __init__(self, symbol: str, limit: int, band: float = 20):
+        super().__init__(symbol, limit)
+        self.band = band
+
+    def run(self, state: TradingState, features: FeatureCache) -> Tuple[List[Order], int]:
+        self.orders.clear()
+        greeks = features.get("vouchers").portfolio_greeks(state.position)
+        if greeks is None:
+            return self.orders, 0
+        delta, gamma = greeks
+        position = state.position.get(self.symbol, 0)
+        exposure = delta + position
+        view = books.get(state, self.symbol)
+        if abs(exposure) <= self.band or view is None or view.mid is None:
+            return self.orders, 0
+        target = max(-self.limit, min(self.limit, -round(delta)))
+        quantity = target - position
+        if quantity > 0:
+            self.buy(view.best_ask, quantity)
+        elif quantity < 0:
+            self.sell(view.best_bid, -quantity)
+        logger.print(f"[{self.symbol}] Voucher delta: {delta:.1f}, Gamma: {gamma:.3f}, Pos: {position}, Hedge: {quantity}")
+        return self.orders, 0
+
+
 class Trader:
-    def __init__(self):
+    def __init__(self, params: Dict[str, Any] = None):
+        self.params = params = {**PARAMS, **(params or {})}
+        self.voucher_pricer = VoucherPricer(VOLCANIC_ROCK)
+        self.counterparties = CounterpartyTracker() if params["track_counterparties"] else None
+        self.features = FeatureCache([MidFeature(), SpreadFeature(), L2Feature(), TimeToExpiry(),
+                                      MidVariance(halflife=params["variance_halflife"]),
+                                      FillIntensity(halflife=params["fill_halflife"]),
+                                      self.voucher_pricer, ImpliedVolFeature()])
+        if self.counterparties is not None:
+            self.features.register(self.counterparties)
+        quoting = dict(horizon=params["quote_horizon"], levels=params["quote_levels"],
+                       level_step=params["quote_level_step"])
+        voucher = dict(sigma_window=params["sigma_window"], pricer=self.voucher_pricer,
+                       spread=params["voucher_spread"], max_volume=params["voucher_max_volume"])
         self.strategies: Dict[str, Strategy] = {
-            RAINFOREST: MarketMakingStrategy(RAINFOREST, 50, 10000),
-            KELP: EMAStrategy(KELP, 50),
-            VOLCANIC_ROCK_VOUCHER_9500: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_9500, 200, 9500, VOLCANIC_ROCK),
-            VOLCANIC_ROCK_VOUCHER_9750: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_9750, 200, 9750, VOLCANIC_ROCK),
-            VOLCANIC_ROCK_VOUCHER_10000: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10000, 200, 10000, VOLCANIC_ROCK),
-            VOLCANIC_ROCK_VOUCHER_10250: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10250, 200, 10250, VOLCANIC_ROCK),
-            VOLCANIC_ROCK_VOUCHER_10500: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10500, 200, 10500, VOLCANIC_ROCK),
+            RAINFOREST: QuotingStrategy(RAINFOREST, 50, fair_value=10000, gamma=params["rainforest_gamma"],
+                                        fill_decay=params["rainforest_fill_decay"], **quoting),
+            KELP: QuotingStrategy(KELP, 50, gamma=params["kelp_gamma"], fill_decay=params["kelp_fill_decay"], **quoting),
+            SQUID_INK: QuotingStrategy(SQUID_INK, 50, gamma=params["squid_gamma"],
+                                       fill_decay=params["squid_fill_decay"], **quoting),
+            VOLCANIC_ROCK_VOUCHER_9500: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_9500, 200, 9500, VOLCANIC_ROCK, **voucher),
+            VOLCANIC_ROCK_VOUCHER_9750: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_9750, 200, 9750, VOLCANIC_ROCK, **voucher),
+            VOLCANIC_ROCK_VOUCHER_10000: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10000, 200, 10000, VOLCANIC_ROCK, **voucher),
+            VOLCANIC_ROCK_VOUCHER_10250: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10250, 200, 10250, VOLCANIC_ROCK, **voucher),
+            VOLCANIC_ROCK_VOUCHER_10500: BlackScholesStrategy(VOLCANIC_ROCK_VOUCHER_10500, 200, 10500, VOLCANIC_ROCK, **voucher),
+            VOLCANIC_ROCK: DeltaHedgeStrategy(VOLCANIC_ROCK, 400, band=params["hedge_band"]),
         }
+        self.features.plan(list(self.strategies.values()))
+        self.state_loaded = False
+
+    def save_state(self) -> str:
+        return StateCodec.encode([[strategy.get_state() for strategy in self.strategies.values()],
+                                  self.features.get_state()])
+
+    def load_state(self, trader_data: str) -> None:
+        values = StateCodec.decode(trader_data)
+        if not isinstance(values, list) or len(values) != 2 or len(values[0]) != len(self.strategies):
+            return
+        for strategy, strategy_state in zip(self.strategies.values(), values[0]):
+            strategy.set_state(strategy_state)
+        self.features.set_state(values[1])
 
     def run(self, state: TradingState) -> Tuple[Dict[Symbol, List[Order]], int, str]:
+        if not self.state_loaded:
+            self.load_state(state.traderData)
+            self.state_loaded = True
         orders = {}
         conversions = 0
-        for symbol, strategy in self.strategies.items():
-            if symbol in state.order_depths:
-                strat_orders, strat_conversions = strategy.run(state)
-                orders[symbol] = strat_orders
-                conversions += strat_conversions
-        logger.flush(state, orders, conversions, "")
-        return orders, conversions, ""
+        active = [strategy for symbol, strategy in self.strategies.items() if symbol in state.order_depths]
+        self.features.begin(state, active)
+        if self.counterparties is not None:
+            # read by no strategy yet, but it has to see every tick's prints
+            self.features.get("counterparties")
+        for strategy in active:
+            strat_orders, strat_conversions = strategy.run(state, self.features)
+            orders[strategy.symbol] = strat_orders
+            conversions += strat_conversions
+        trader_data = self.save_state()
+        logger.flush(state, orders, conversions, trader_data)
+        return orders, conversions, trader_data
@@ -0,0 +1,32 @@
+"""Offline tooling for the round traders: data loading, replay, parameter sweeps and profiling."""
+import importlib
+
+from .data import LIMITS, DayData, available_days, load_day
+from .engine import Backtester, BacktestResult, DayResult, load_trader, run_backtest
+from .matching import QueueMatcher
+
+# Modules that double as ``python -m backtester.<name>`` entry points are only
+# imported on first use, so running one does not import it a second time.
+_LAZY = {
+    "run_suite": "bench",
+    "CounterpartyIndex": "counterparty",
+    "L2Book": "l2",
+    "l2_books": "l2",
+    "Snapshot": "loader",
+    "stream": "loader",
+    "TickProfiler": "profiler",
+    "profile_day": "profiler",
+    "Sweep": "sweep",
+    "SweepResult": "sweep",
+    "parse_space": "sweep",
+    "DAY_LENGTH": "tickstore",
+    "StoredDay": "tickstore",
+    "TickStore": "tickstore",
+    "global_timestamp": "tickstore",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
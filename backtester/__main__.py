@@ -0,0 +1,36 @@
+import argparse
+
+from .data import available_days
+from .engine import Backtester, run_backtest
+from .loader import stream
+from .tickstore import DEFAULT_ROOT, TickStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay round data through a Trader.run")
+    parser.add_argument("trader", help="path to a round trader file, e.g. 'Round 5/round5_refined.py'")
+    parser.add_argument("round", type=int, help="round whose data directory is replayed")
+    parser.add_argument("days", type=int, nargs="*", help="days to replay (default: all available)")
+    parser.add_argument("--no-trade-matching", action="store_true",
+                        help="only fill against the book, not against market trades")
+    parser.add_argument("--queue", action="store_true",
+                        help="make resting orders queue behind the displayed volume at their price")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_ROOT, default=None,
+                        help="read days through the columnar tick store (ingested on first use)")
+    parser.add_argument("--stream", action="store_true",
+                        help="read the CSVs a tick at a time instead of loading whole days")
+    parser.add_argument("--verbose", action="store_true", help="let the trader's logger print")
+    args = parser.parse_args()
+
+    days = args.days or available_days(args.round)
+    store = TickStore(args.store) if args.store else None
+    options = dict(match_trades=not args.no_trade_matching, quiet=not args.verbose, queue_priority=args.queue)
+    if args.stream:
+        result = Backtester.from_file(args.trader, **options).run_stream(stream([args.round], days))
+    else:
+        result = run_backtest(args.trader, args.round, days, store=store, **options)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Micro-benchmarks of the trader hot paths, with a JSON baseline to compare against.
+
+Fixtures are ``TradingState`` sequences built from one calendar day of the
+recorded data (through ``loader.stream``) for 3, 10 and 15 products. Books come
+from the price files where a day has them; every other product gets a two
+level book around its latest trade print, which is the only record the later
+rounds ship. Each case times one path over every fixture tick:
+
+    get_mid_price        the mid of every product in the book
+    update_ema           the EMA update of every product the trader smooths (the
+                         mid-variance EWMA in the feature-based traders)
+    get_dynamic_sigma    the rolling volatility each voucher is priced with
+    black_scholes_ladder every voucher strike priced in one vectorised call
+    Logger.flush         the log line of the tick's orders
+    Trader.run           the whole tick, with traderData carried over
+
+A case a trader does not have is skipped. Per-tick times are the minimum over
+``repeat`` runs, each with a fresh trader; the report gives p50/p99/mean in
+microseconds.
+
+    python -m backtester.bench --out bench.json
+    python -m backtester.bench --baseline bench.json --threshold 0.15
+"""
+import functools
+import glob
+import json
+import os
+import platform
+import re
+import time
+from contextlib import redirect_stdout
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data import LIMITS, REPO_ROOT
+from .engine import _NullWriter, load_trader
+from .loader import stream
+
+TIERS = {
+    3: ("RAINFOREST_RESIN", "KELP", "SQUID_INK"),
+    10: ("RAINFOREST_RESIN", "KELP", "SQUID_INK", "CROISSANTS", "JAMS", "DJEMBES", "PICNIC_BASKET1",
+         "PICNIC_BASKET2", "VOLCANIC_ROCK", "VOLCANIC_ROCK_VOUCHER_10000"),
+    15: tuple(LIMITS),
+}
+CASES = ("get_mid_price", "update_ema", "get_dynamic_sigma", "black_scholes_ladder", "Logger.flush", "Trader.run")
+DEFAULT_DAY = 2
+DEFAULT_TICKS = 1_000
+_STRIKE_RE = re.compile(r"_VOUCHER_(\d+)$")
+
+
+def trader_files(root: str = REPO_ROOT) -> List[str]:
+    paths = glob.glob(os.path.join(root, "Round *", "*.py"))
+    return sorted(os.path.relpath(path, root) for path in paths if os.path.basename(path) != "datamodel.py")
+
+
+@functools.lru_cache(maxsize=None)
+def load_ticks(products: Tuple[str, ...], day: int = DEFAULT_DAY, ticks: int = DEFAULT_TICKS) -> List[tuple]:
+    """(timestamp, books, trades, observation) for ``products``, from the first tick every one has a book."""
+    wanted = set(products)
+    books: Dict[str, tuple] = {}
+    selected = []
+    for snap in stream(days=[day]):
+        for product in wanted & set(snap.books):
+            books[product] = snap.books[product]
+        for symbol, price, quantity, _, _ in snap.trades:
+            if symbol in wanted and symbol not in snap.books:
+                books[symbol] = ([(price - 1, quantity), (price - 2, 2 * quantity)],
+                                 [(price + 1, quantity), (price + 2, 2 * quantity)], float(price))
+        if len(books) < len(wanted):
+            continue
+        trades = [trade for trade in snap.trades if trade[0] in wanted]
+        selected.append((snap.timestamp, dict(books), trades, snap.observation))
+        if len(selected) == ticks:
+            break
+    return selected
+
+
+def build_states(dm: ModuleType, ticks: List[tuple]) -> List[Any]:
+    """One ``TradingState`` per tick; each tick's prints are the next one's market trades."""
+    states = []
+    market_trades: Dict[str, List[Any]] = {}
+    for timestamp, books, trades, observation in ticks:
+        listings = {p: dm.Listing(p, p, "SEASHELLS") for p in books}
+        order_depths = {}
+        for product, (bids, asks, _) in books.items():
+            depth = dm.OrderDepth()
+            depth.buy_orders = {price: volume for price, volume in bids}
+            depth.sell_orders = {price: -volume for price, volume in asks}
+            order_depths[product] = depth
+        observations = dm.Observation({}, {})
+        if observation is not None:
+            observations.conversionObservations["MAGNIFICENT_MACARONS"] = dm.ConversionObservation(*observation)
+        states.append(dm.TradingState("", timestamp, listings, order_depths, {}, market_trades, {}, observations))
+        market_trades = {}
+        for symbol, price, quantity, buyer, seller in trades:
+            market_trades.setdefault(symbol, []).append(dm.Trade(symbol, price, quantity, buyer, seller, timestamp))
+    return states
+
+
+def _strikes(state) -> List[int]:
+    return [int(match.group(1)) for match in map(_STRIKE_RE.search, state.order_depths) if match]
+
+
+def _cases(trader: Any, module: ModuleType, logged: Dict[int, tuple],
+           vouchers: bool) -> Dict[str, Callable[[Any], Any]]:
+    """The callables this trader supports, each taking one fixture state; the
+    voucher paths only when the tier has vouchers."""
+    cases: Dict[str, Callable[[Any], Any]] = {}
+    strategies = list(getattr(trader, "strategies", {}).values())
+    logger = getattr(module, "logger", None)
+
+    if hasattr(trader, "get_mid_price"):
+        cases["get_mid_price"] = lambda state: [trader.get_mid_price(p, state) for p in state.order_depths
+                                                if p in trader.default_prices]
+    elif strategies:
+        cases["get_mid_price"] = lambda state: [s.get_mid_price(state) for s in strategies
+                                                if s.symbol in state.order_depths]
+
+    if hasattr(trader, "update_ema"):
+        cases["update_ema"] = lambda state: [trader.update_ema(p, state) for p in state.order_depths
+                                             if p in trader.ema_prices]
+    elif hasattr(trader, "features"):
+        features = trader.features
+        name = next((name for name in ("ema", "variance") if name in features.registry), None)
+        if name is not None:
+            smoother = features.registry[name]
+
+            def update_ema(state):
+                features.begin(state, [])
+                return [smoother.compute(features, s.symbol) for s in strategies
+                        if s.symbol in state.order_depths and name in s.features]
+
+            cases["update_ema"] = update_ema
+
+    if vouchers and hasattr(trader, "get_dynamic_sigma"):
+        cases["get_dynamic_sigma"] = lambda state: [trader.get_dynamic_sigma(p) for p in state.order_depths
+                                                    if _STRIKE_RE.search(p)]
+    elif vouchers and any(hasattr(s, "get_dynamic_sigma") for s in strategies):
+        cases["get_dynamic_sigma"] = lambda state: [s.get_dynamic_sigma() for s in strategies
+                                                    if hasattr(s, "get_dynamic_sigma")
+                                                    and s.symbol in state.order_depths]
+
+    if vouchers and hasattr(trader, "black_scholes_ladder"):
+        def black_scholes_ladder(state):
+            orders = trader.black_scholes_ladder(state)
+            if logger is not None:
+                # its log lines would otherwise pile up into the Logger.flush case
+                logger.logs = []
+            return orders
+
+        cases["black_scholes_ladder"] = black_scholes_ladder
+    elif vouchers and hasattr(module, "black_scholes_batch"):
+        def black_scholes_batch(state):
+            T = max(0, 8_000_000 - state.timestamp) / 8_000_000 * (5 / 365)
+            St = module.books.mid(state, "VOLCANIC_ROCK") or 10_000.0
+            return module.black_scholes_batch(St, np.array(_strikes(state), dtype=float), T, 0.2)
+
+        cases["black_scholes_ladder"] = black_scholes_batch
+
+    if logger is not None:
+        def flush(state):
+            orders, conversions, trader_data = logged[state.timestamp]
+            logger.flush(state, orders, conversions, trader_data)
+
+        cases["Logger.flush"] = flush
+    return cases
+
+
+def _percentiles(samples: np.ndarray) -> Dict[str, float]:
+    p50, p99 = np.percentile(samples, [50, 99]) / 1_000
+    return {"ticks": int(len(samples)), "p50_us": round(float(p50), 2), "p99_us": round(float(p99), 2),
+            "mean_us": round(float(samples.mean()) / 1_000, 2)}
+
+
+def bench_trader(path: str, tiers: Iterable[int] = tuple(TIERS), day: int = DEFAULT_DAY,
+                 ticks: int = DEFAULT_TICKS, repeat: int = 3) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{tier: {case: stats}} for one trader file."""
+    module, dm = load_trader(os.path.join(REPO_ROOT, path) if not os.path.isabs(path) else path)
+    clock = time.perf_counter_ns
+    results = {}
+    for tier in tiers:
+        states = build_states(dm, load_ticks(TIERS[tier], day, ticks))
+        vouchers = any(_STRIKE_RE.search(product) for product in TIERS[tier])
+        best: Dict[str, np.ndarray] = {}
+        for _ in range(repeat):
+            timings: Dict[str, List[int]] = {}
+            with redirect_stdout(_NullWriter()):
+                trader = module.Trader()
+                logged: Dict[int, tuple] = {}
+                trader_data = ""
+                run_times = timings["Trader.run"] = []
+                for state in states:
+                    state.traderData = trader_data
+                    started = clock()
+                    orders, conversions, trader_data = trader.run(state)
+                    run_times.append(clock() - started)
+                    logged[state.timestamp] = (orders, conversions, trader_data)
+                # the remaining paths run on the trader the replay has warmed up
+                for case, call in _cases(trader, module, logged, vouchers).items():
+                    samples = timings[case] = []
+                    for state in states:
+                        started = clock()
+                        call(state)
+                        samples.append(clock() - started)
+            for case, samples in timings.items():
+                samples = np.asarray(samples, dtype=np.int64)
+                best[case] = samples if case not in best else np.minimum(best[case], samples)
+        results[str(tier)] = {case: _percentiles(best[case]) for case in CASES if case in best}
+    return results
+
+
+def run_suite(paths: Sequence[str], tiers: Iterable[int] = tuple(TIERS), day: int = DEFAULT_DAY,
+              ticks: int = DEFAULT_TICKS, repeat: int = 3) -> Dict[str, Any]:
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "day": day, "ticks": ticks, "repeat": repeat, "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": {path: bench_trader(path, tiers, day, ticks, repeat) for path in paths},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1,
+            min_delta_us: float = 1.0) -> List[Tuple[str, str, str, float, float]]:
+    """(trader, tier, case, baseline p50, current p50) of every case more than ``threshold``
+    and ``min_delta_us`` slower; the floor keeps jitter on sub-microsecond paths out."""
+    regressions = []
+    for path, tiers in current["results"].items():
+        for tier, cases in tiers.items():
+            for case, stats in cases.items():
+                base = baseline.get("results", {}).get(path, {}).get(tier, {}).get(case)
+                slower = stats["p50_us"] - base["p50_us"] if base else 0.0
+                if base and slower > base["p50_us"] * threshold and slower > min_delta_us:
+                    regressions.append((path, tier, case, base["p50_us"], stats["p50_us"]))
+    return regressions
+
+
+def format_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    lines = []
+    for path, tiers in report["results"].items():
+        lines.append(path)
+        lines.append(f"  {'case':<22}{'products':>9}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}"
+                     + (f"{'vs base':>10}" if baseline else ""))
+        for tier, cases in tiers.items():
+            for case, stats in cases.items():
+                line = (f"  {case:<22}{tier:>9}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}"
+                        f"{stats['mean_us']:>10.1f}")
+                base = (baseline or {}).get("results", {}).get(path, {}).get(tier, {}).get(case)
+                if base and base["p50_us"]:
+                    line += f"{stats['p50_us'] / base['p50_us'] - 1:>+10.0%}"
+                lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the trader hot paths on recorded books")
+    parser.add_argument("traders", nargs="*", help="trader files (default: every round trader)")
+    parser.add_argument("--tier", type=int, action="append", choices=sorted(TIERS), default=None,
+                        help="product count to benchmark; repeatable (default: all)")
+    parser.add_argument("--day", type=int, default=DEFAULT_DAY, help="calendar day the fixtures come from")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest tick of each counts")
+    parser.add_argument("--out", default=None, help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="p50 slowdown over the baseline reported as a regression (default 0.1)")
+    parser.add_argument("--min-delta-us", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many microseconds (default 1)")
+    args = parser.parse_args()
+
+    report = run_suite(args.traders or trader_files(), args.tier or tuple(TIERS), args.day, args.ticks, args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold, args.min_delta_us)
+        for path, tier, case, before, after in regressions:
+            print(f"REGRESSION {path} {case} @ {tier} products: {before:.1f} -> {after:.1f} us")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Who trades what, and whether it pays: per-counterparty statistics from the trade prints.
+
+From Round 5 on every print names its ``buyer`` and ``seller``. ``CounterpartyIndex``
+folds the stored trade columns into dense (trader, symbol) arrays: trades, lots
+bought and sold, notional, and for each horizon the quantity-weighted markout
+per lot and the hit rate (share of trades the price then moved in the trader's
+favour). The reference price after ``h`` timestamps is the last print of the
+symbol at or before ``t + h``; trades whose horizon runs past the day's last
+print are left out of that horizon.
+
+    python -m backtester.counterparty 5 --symbol VOLCANIC_ROCK
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .data import TRADES, available_days
+from .tickstore import DEFAULT_ROOT, StoredDay, TickStore
+
+HORIZONS = (100, 1_000, 10_000)
+
+
+class CounterpartyIndex:
+    def __init__(self, store: TickStore, horizons: Sequence[int] = HORIZONS):
+        self.store = store
+        self.horizons = tuple(horizons)
+        self.days: List[tuple] = []
+        self.trades = np.zeros((0, 0), dtype=np.int64)
+        self.bought = np.zeros((0, 0), dtype=np.int64)
+        self.sold = np.zeros((0, 0), dtype=np.int64)
+        self.notional = np.zeros((0, 0))
+        self.markout = np.zeros((0, 0, len(self.horizons)))
+        self.marked_qty = np.zeros((0, 0, len(self.horizons)), dtype=np.int64)
+        self.marked = np.zeros((0, 0, len(self.horizons)), dtype=np.int64)
+        self.hits = np.zeros((0, 0, len(self.horizons)), dtype=np.int64)
+
+    @classmethod
+    def build(cls, round_num: int = 5, days: Optional[Iterable[int]] = None, store: Optional[TickStore] = None,
+              horizons: Sequence[int] = HORIZONS) -> "CounterpartyIndex":
+        store = store if store is not None else TickStore(DEFAULT_ROOT)
+        index = cls(store, horizons)
+        for day in (days if days is not None else available_days(round_num)):
+            index.add_day(store.ingest(round_num, day))
+        return index
+
+    def _grow(self) -> None:
+        shape = (len(self.store.traders.names), len(self.store.products.names))
+        if self.trades.shape == shape:
+            return
+        for name in ("trades", "bought", "sold", "notional", "markout", "marked_qty", "marked", "hits"):
+            old = getattr(self, name)
+            new = np.zeros(shape + old.shape[2:], dtype=old.dtype)
+            new[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, new)
+
+    def add_day(self, stored: StoredDay) -> None:
+        if not stored.has(TRADES):
+            return
+        self._grow()
+        self.days.append((stored.round_num, stored.day))
+        for symbol in stored.products(TRADES):
+            cols = stored.product(TRADES, symbol)
+            code = self.store.products.codes[symbol]
+            timestamps = np.asarray(cols["timestamp"], dtype=np.int64)
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            price = np.asarray(cols["price"], dtype=np.float64)[order]
+            qty = np.asarray(cols["quantity"], dtype=np.int64)[order]
+            buyer = np.asarray(cols["buyer"], dtype=np.int64)[order]
+            seller = np.asarray(cols["seller"], dtype=np.int64)[order]
+
+            for trader, sign in ((buyer, 1), (seller, -1)):
+                np.add.at(self.trades[:, code], trader, 1)
+                np.add.at(self.bought[:, code] if sign > 0 else self.sold[:, code], trader, qty)
+                np.add.at(self.notional[:, code], trader, price * qty)
+
+            for h, horizon in enumerate(self.horizons):
+                later = np.searchsorted(timestamps, timestamps + horizon, side="right") - 1
+                valid = timestamps + horizon <= timestamps[-1]
+                move = price[later] - price
+                for trader, sign in ((buyer, 1), (seller, -1)):
+                    per_lot = sign * move
+                    np.add.at(self.markout[:, code, h], trader[valid], (per_lot * qty)[valid])
+                    np.add.at(self.marked_qty[:, code, h], trader[valid], qty[valid])
+                    np.add.at(self.marked[:, code, h], trader[valid], 1)
+                    np.add.at(self.hits[:, code, h], trader[valid], (per_lot > 0)[valid].astype(np.int64))
+
+    def traders(self) -> List[str]:
+        return [name for i, name in enumerate(self.store.traders.names) if name and self.trades[i].sum()]
+
+    def symbols(self, trader: Optional[str] = None) -> List[str]:
+        counts = self.trades.sum(axis=0) if trader is None else self.trades[self.store.traders.codes[trader]]
+        return [name for i, name in enumerate(self.store.products.names) if i < len(counts) and counts[i]]
+
+    def stats(self, trader: str, symbol: Optional[str] = None) -> Dict[str, object]:
+        """Flow and markout of ``trader`` in ``symbol``, or summed over all symbols."""
+        t = self.store.traders.codes[trader]
+        cols = slice(None) if symbol is None else self.store.products.codes[symbol]
+        bought = int(self.bought[t, cols].sum())
+        sold = int(self.sold[t, cols].sum())
+        marked_qty = self.marked_qty[t, cols].reshape(-1, len(self.horizons)).sum(axis=0)
+        marked = self.marked[t, cols].reshape(-1, len(self.horizons)).sum(axis=0)
+        markout = self.markout[t, cols].reshape(-1, len(self.horizons)).sum(axis=0)
+        hits = self.hits[t, cols].reshape(-1, len(self.horizons)).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_markout = np.where(marked_qty > 0, markout / marked_qty, np.nan)
+            hit_rate = np.where(marked > 0, hits / marked, np.nan)
+        return {
+            "trades": int(self.trades[t, cols].sum()),
+            "bought": bought,
+            "sold": sold,
+            "net": bought - sold,
+            "notional": float(self.notional[t, cols].sum()),
+            "markout": dict(zip(self.horizons, avg_markout.tolist())),
+            "hit_rate": dict(zip(self.horizons, hit_rate.tolist())),
+        }
+
+    def table(self, symbol: Optional[str] = None) -> str:
+        header = f"{'trader':<12}{'trades':>8}{'net':>8}" + "".join(
+            f"{'mo@' + str(h):>10}{'hit@' + str(h):>10}" for h in self.horizons)
+        lines = [header]
+        rows = [(trader, self.stats(trader, symbol)) for trader in self.traders()]
+        for trader, s in sorted(rows, key=lambda row: -row[1]["trades"]):
+            if not s["trades"]:
+                continue
+            lines.append(f"{trader:<12}{s['trades']:>8}{s['net']:>8}" + "".join(
+                f"{s['markout'][h]:>10.2f}{s['hit_rate'][h]:>10.2f}" for h in self.horizons))
+        return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-counterparty flow and markout from the trade prints")
+    parser.add_argument("round", type=int, nargs="?", default=5)
+    parser.add_argument("days", type=int, nargs="*", help="days to index (default: all available)")
+    parser.add_argument("--symbol", default=None, help="restrict the table to one symbol")
+    parser.add_argument("--horizon", type=int, action="append", default=None,
+                        help=f"markout horizon in timestamp units; repeatable (default {HORIZONS})")
+    parser.add_argument("--store", default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    index = CounterpartyIndex.build(args.round, args.days or None, TickStore(args.store), args.horizon or HORIZONS)
+    print(index.table(args.symbol))
+
+
+if __name__ == "__main__":
+    main()
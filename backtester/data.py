@@ -0,0 +1,171 @@
+"""Readers for the files shipped in ``Round N/data``.
+
+Prices and trades are ``;`` delimited, observations are ``,`` delimited. Every
+reader groups rows by timestamp so a replay can look a tick up in O(1).
+"""
+import copy
+import csv
+import glob
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRICES = "prices"
+TRADES = "trades"
+OBSERVATIONS = "observations"
+KINDS = (PRICES, TRADES, OBSERVATIONS)
+
+PRICE_LEVELS = 3
+
+LIMITS = {
+    "RAINFOREST_RESIN": 50,
+    "KELP": 50,
+    "SQUID_INK": 50,
+    "CROISSANTS": 250,
+    "JAMS": 350,
+    "DJEMBES": 60,
+    "PICNIC_BASKET1": 60,
+    "PICNIC_BASKET2": 100,
+    "VOLCANIC_ROCK": 400,
+    "VOLCANIC_ROCK_VOUCHER_9500": 200,
+    "VOLCANIC_ROCK_VOUCHER_9750": 200,
+    "VOLCANIC_ROCK_VOUCHER_10000": 200,
+    "VOLCANIC_ROCK_VOUCHER_10250": 200,
+    "VOLCANIC_ROCK_VOUCHER_10500": 200,
+    "MAGNIFICENT_MACARONS": 75,
+}
+
+MACARONS = "MAGNIFICENT_MACARONS"
+CONVERSION_LIMIT = 10
+
+# (bids, asks, mid_price), levels best first as (price, volume)
+BookRow = Tuple[List[Tuple[int, int]], List[Tuple[int, int]], float]
+# (symbol, price, quantity, buyer, seller)
+TradeRow = Tuple[str, int, int, str, str]
+# (bidPrice, askPrice, transportFees, exportTariff, importTariff, sugarPrice, sunlightIndex)
+ObservationRow = Tuple[float, float, float, float, float, float, float]
+
+_FILE_RE = re.compile(r"^(prices|trades|observations)_round_(\d+)_day_(-?\d+)\.csv$")
+
+
+def data_dir(round_num: int, root: str = REPO_ROOT) -> str:
+    return os.path.join(root, f"Round {round_num}", "data")
+
+
+def data_path(kind: str, round_num: int, day: int, root: str = REPO_ROOT) -> str:
+    return os.path.join(data_dir(round_num, root), f"{kind}_round_{round_num}_day_{day}.csv")
+
+
+def available_days(round_num: int, root: str = REPO_ROOT) -> List[int]:
+    days = set()
+    for path in glob.glob(os.path.join(data_dir(round_num, root), "*.csv")):
+        match = _FILE_RE.match(os.path.basename(path))
+        if match:
+            days.add(int(match.group(3)))
+    return sorted(days)
+
+
+def _int(value: str) -> int:
+    return int(float(value))
+
+
+def iter_prices(path: str) -> Iterator[Tuple[int, str, BookRow]]:
+    """(timestamp, product, book) per row, in file order."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        header = next(reader)
+        col = {name: i for i, name in enumerate(header)}
+        bid_cols = [(col[f"bid_price_{n}"], col[f"bid_volume_{n}"]) for n in range(1, PRICE_LEVELS + 1)]
+        ask_cols = [(col[f"ask_price_{n}"], col[f"ask_volume_{n}"]) for n in range(1, PRICE_LEVELS + 1)]
+        ts_col, product_col, mid_col = col["timestamp"], col["product"], col["mid_price"]
+        for row in reader:
+            bids = [(_int(row[p]), _int(row[v])) for p, v in bid_cols if row[p]]
+            asks = [(_int(row[p]), _int(row[v])) for p, v in ask_cols if row[p]]
+            mid = float(row[mid_col]) if row[mid_col] else 0.0
+            yield int(row[ts_col]), row[product_col], (bids, asks, mid)
+
+
+def iter_trades(path: str) -> Iterator[Tuple[int, TradeRow]]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        header = next(reader)
+        col = {name: i for i, name in enumerate(header)}
+        ts_col, symbol_col = col["timestamp"], col["symbol"]
+        price_col, qty_col = col["price"], col["quantity"]
+        buyer_col, seller_col = col["buyer"], col["seller"]
+        for row in reader:
+            yield int(row[ts_col]), (row[symbol_col], _int(row[price_col]), int(row[qty_col]),
+                                     row[buyer_col], row[seller_col])
+
+
+def iter_observations(path: str) -> Iterator[Tuple[int, ObservationRow]]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=",")
+        header = next(reader)
+        fields = ["bidPrice", "askPrice", "transportFees", "exportTariff", "importTariff", "sugarPrice", "sunlightIndex"]
+        cols = [header.index(name) for name in fields]
+        ts_col = header.index("timestamp")
+        for row in reader:
+            yield int(row[ts_col]), tuple(float(row[i]) for i in cols)
+
+
+def read_prices(path: str) -> Dict[int, Dict[str, BookRow]]:
+    books: Dict[int, Dict[str, BookRow]] = {}
+    for timestamp, product, book in iter_prices(path):
+        books.setdefault(timestamp, {})[product] = book
+    return books
+
+
+def read_trades(path: str) -> Dict[int, List[TradeRow]]:
+    trades: Dict[int, List[TradeRow]] = {}
+    for timestamp, trade in iter_trades(path):
+        trades.setdefault(timestamp, []).append(trade)
+    return trades
+
+
+def read_observations(path: str) -> Dict[int, ObservationRow]:
+    return dict(iter_observations(path))
+
+
+class DayData:
+    """All ticks of one (round, day), grouped by timestamp."""
+
+    def __init__(self, round_num: int, day: int,
+                 prices: Dict[int, Dict[str, BookRow]],
+                 trades: Dict[int, List[TradeRow]],
+                 observations: Dict[int, ObservationRow]):
+        self.round_num = round_num
+        self.day = day
+        self.prices = prices
+        self.trades = trades
+        self.observations = observations
+        self.timestamps = sorted(set(prices) | set(trades) | set(observations))
+        products = set()
+        for books in prices.values():
+            products.update(books)
+        for rows in trades.values():
+            products.update(row[0] for row in rows)
+        self.products = sorted(products)
+
+    def head(self, ticks: int) -> "DayData":
+        """The first ``ticks`` timestamps of the day, sharing the underlying rows."""
+        clone = copy.copy(self)
+        clone.timestamps = self.timestamps[:ticks]
+        return clone
+
+    def ticks(self) -> Iterator[Tuple[int, Dict[str, BookRow], List[TradeRow], Optional[ObservationRow]]]:
+        """(timestamp, books, trades, observation) per timestamp, the shape ``Backtester`` replays."""
+        for timestamp in self.timestamps:
+            yield (timestamp, self.prices.get(timestamp, {}), self.trades.get(timestamp, []),
+                   self.observations.get(timestamp))
+
+
+def load_day(round_num: int, day: int, root: str = REPO_ROOT) -> DayData:
+    readers = {PRICES: read_prices, TRADES: read_trades, OBSERVATIONS: read_observations}
+    loaded = {}
+    for kind, reader in readers.items():
+        path = data_path(kind, round_num, day, root)
+        loaded[kind] = reader(path) if os.path.exists(path) else {}
+    return DayData(round_num, day, loaded[PRICES], loaded[TRADES], loaded[OBSERVATIONS])
@@ -0,0 +1,291 @@
+"""Event-driven replay of the round data through a ``Trader.run``.
+
+Each tick builds a ``datamodel.TradingState`` from the recorded book, hands it
+to the trader, checks the returned orders against the position limits and
+fills them first against the book and then against the market trades printed
+at that timestamp. With ``queue_priority`` the second step goes through
+``matching.QueueMatcher`` instead, which makes resting orders wait behind the
+displayed volume at their price.
+"""
+import importlib.util
+import itertools
+import os
+import sys
+import time
+import warnings
+from contextlib import redirect_stdout
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .data import (CONVERSION_LIMIT, LIMITS, MACARONS, REPO_ROOT, BookRow, DayData, ObservationRow, TradeRow,
+                   load_day)
+from .matching import QueueMatcher
+
+SUBMISSION = "SUBMISSION"
+MACARON_STORAGE_COST = 0.1
+FALLBACK_DATAMODEL = os.path.join(REPO_ROOT, "Round 5", "datamodel.py")
+
+# (timestamp, books, trades, observation) of one replayed timestamp
+Tick = Tuple[int, Dict[str, BookRow], List[TradeRow], Optional[ObservationRow]]
+
+
+def _load_module(name: str, path: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_trader(path: str) -> Tuple[ModuleType, ModuleType]:
+    """Import a round trader file next to its own ``datamodel.py``.
+
+    Every round ships its own copy of ``datamodel``, so it is registered under
+    that name before the trader module is executed.
+    """
+    path = os.path.abspath(path)
+    datamodel_path = os.path.join(os.path.dirname(path), "datamodel.py")
+    if not os.path.exists(datamodel_path):
+        datamodel_path = FALLBACK_DATAMODEL
+    datamodel = _load_module("datamodel", datamodel_path)
+    sys.modules["datamodel"] = datamodel
+    name = os.path.splitext(os.path.basename(path))[0]
+    return _load_module(name, path), datamodel
+
+
+class _NullWriter:
+    def write(self, s: str) -> int:
+        return len(s)
+
+    def flush(self) -> None:
+        pass
+
+
+class DayResult:
+    def __init__(self, round_num: int, day: int, pnl: Dict[str, float], position: Dict[str, int],
+                 volume: Dict[str, int], ticks: int, elapsed: float):
+        self.round_num = round_num
+        self.day = day
+        self.pnl = pnl
+        self.position = position
+        self.volume = volume
+        self.ticks = ticks
+        self.elapsed = elapsed
+
+    @property
+    def total(self) -> float:
+        return sum(self.pnl.values())
+
+
+class BacktestResult:
+    def __init__(self, days: List[DayResult]):
+        self.days = days
+
+    @property
+    def pnl(self) -> Dict[str, float]:
+        pnl: Dict[str, float] = {}
+        for day in self.days:
+            for product, value in day.pnl.items():
+                pnl[product] = pnl.get(product, 0.0) + value
+        return pnl
+
+    @property
+    def total(self) -> float:
+        return sum(day.total for day in self.days)
+
+    def summary(self) -> str:
+        lines = []
+        for day in self.days:
+            lines.append(f"Round {day.round_num} day {day.day}: {day.ticks} ticks in {day.elapsed:.2f}s")
+            for product in sorted(day.pnl):
+                lines.append(f"  {product:<30} pnl={day.pnl[product]:>12.1f}  pos={day.position.get(product, 0):>5}"
+                             f"  traded={day.volume.get(product, 0)}")
+            lines.append(f"  {'TOTAL':<30} pnl={day.total:>12.1f}")
+        lines.append(f"Total pnl: {self.total:.1f}")
+        return "\n".join(lines)
+
+
+class Backtester:
+    def __init__(self, trader_factory, datamodel: ModuleType, limits: Optional[Dict[str, int]] = None,
+                 match_trades: bool = True, quiet: bool = True, queue_priority: bool = False):
+        self.trader_factory = trader_factory
+        self.dm = datamodel
+        self.limits = dict(LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.match_trades = match_trades
+        self.quiet = quiet
+        self.match = QueueMatcher(match_trades).match if queue_priority else self._match
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "Backtester":
+        module, datamodel = load_trader(path)
+        return cls(module.Trader, datamodel, **kwargs)
+
+    def run(self, days: Iterable[DayData]) -> BacktestResult:
+        return BacktestResult([self.run_day(day) for day in days])
+
+    def run_day(self, day: DayData, trader: Any = None) -> DayResult:
+        return self.run_ticks(day.round_num, day.day, day.ticks(), day.products, trader)
+
+    def run_stream(self, snapshots: Iterable[Any]) -> BacktestResult:
+        """Replay a ``loader.stream`` day by day, each day with a fresh trader as in ``run``.
+
+        Ticks are read from the stream as they are replayed, so only one of
+        them is held in memory at a time.
+        """
+        results = []
+        for (round_num, day), snaps in itertools.groupby(snapshots, key=lambda snap: (snap.round_num, snap.day)):
+            ticks = ((snap.timestamp, snap.books, snap.trades, snap.observation) for snap in snaps)
+            results.append(self.run_ticks(round_num, day, ticks))
+        return BacktestResult(results)
+
+    def run_ticks(self, round_num: int, day: int, ticks: Iterable[Tick], products: Iterable[str] = (),
+                  trader: Any = None) -> DayResult:
+        """Replay (timestamp, books, trades, observation) ticks; ``products`` are listed up front,
+        any other product from the tick it first appears."""
+        trader = trader if trader is not None else self.trader_factory()
+        if self.quiet:
+            with redirect_stdout(_NullWriter()):
+                return self._replay(round_num, day, ticks, products, trader)
+        return self._replay(round_num, day, ticks, products, trader)
+
+    def _replay(self, round_num: int, day: int, ticks: Iterable[Tick], products: Iterable[str],
+                trader: Any) -> DayResult:
+        dm = self.dm
+        listings = {p: dm.Listing(p, p, "SEASHELLS") for p in products}
+        position: Dict[str, int] = {}
+        cash: Dict[str, float] = {p: 0.0 for p in listings}
+        volume: Dict[str, int] = {}
+        last_mid: Dict[str, float] = {}
+        own_trades: Dict[str, List[Any]] = {}
+        market_trades: Dict[str, List[Any]] = {}
+        trader_data = ""
+        started = time.perf_counter()
+
+        replayed = 0
+        booked = False
+        for timestamp, books, tick_trades, row in ticks:
+            replayed += 1
+            booked = booked or bool(books)
+            for product in itertools.chain(books, (trade[0] for trade in tick_trades)):
+                if product not in listings:
+                    listings[product] = dm.Listing(product, product, "SEASHELLS")
+                    cash[product] = 0.0
+            order_depths = {}
+            for product, (bids, asks, mid) in books.items():
+                depth = dm.OrderDepth()
+                depth.buy_orders = {price: vol for price, vol in bids}
+                depth.sell_orders = {price: -vol for price, vol in asks}
+                order_depths[product] = depth
+                if mid:
+                    last_mid[product] = mid
+
+            observations = dm.Observation({}, {})
+            if row is not None:
+                observations.conversionObservations[MACARONS] = dm.ConversionObservation(*row)
+
+            state = dm.TradingState(trader_data, timestamp, listings, order_depths, own_trades,
+                                    market_trades, dict(position), observations)
+            orders, conversions, trader_data = trader.run(state)
+
+            remaining = [[qty] for _, _, qty, _, _ in tick_trades]
+            own_trades = {}
+            for product, product_orders in orders.items():
+                if not product_orders or not self._within_limits(product, product_orders, position):
+                    continue
+                fills = self.match(product, product_orders, books.get(product), tick_trades, remaining)
+                for price, qty in fills:
+                    position[product] = position.get(product, 0) + qty
+                    cash[product] = cash.get(product, 0.0) - price * qty
+                    volume[product] = volume.get(product, 0) + abs(qty)
+                    buyer, seller = (SUBMISSION, "") if qty > 0 else ("", SUBMISSION)
+                    own_trades.setdefault(product, []).append(
+                        dm.Trade(product, price, abs(qty), buyer, seller, timestamp))
+
+            if conversions and row is not None:
+                self._convert(conversions, row, position, cash)
+            if position.get(MACARONS, 0) > 0:
+                cash[MACARONS] = cash.get(MACARONS, 0.0) - MACARON_STORAGE_COST * position[MACARONS]
+
+            market_trades = {}
+            for (symbol, price, qty, buyer, seller), (left,) in zip(tick_trades, remaining):
+                if left > 0:
+                    market_trades.setdefault(symbol, []).append(dm.Trade(symbol, price, left, buyer, seller, timestamp))
+                if symbol not in books:
+                    last_mid[symbol] = price
+
+        if replayed and not booked:
+            # Only Round 1 ships prices_* files; without books a trader has nothing to quote against.
+            warnings.warn(f"round {round_num} day {day} has no order books, so the trader could not trade; "
+                          f"only Round 1 ships prices files", stacklevel=3)
+        pnl = {p: cash.get(p, 0.0) + position.get(p, 0) * last_mid.get(p, 0.0) for p in set(cash) | set(position)}
+        return DayResult(round_num, day, pnl, position, volume, replayed, time.perf_counter() - started)
+
+    def _within_limits(self, product: str, orders: List[Any], position: Dict[str, int]) -> bool:
+        limit = self.limits.get(product)
+        if limit is None:
+            return False
+        pos = position.get(product, 0)
+        buys = sum(o.quantity for o in orders if o.quantity > 0)
+        sells = sum(-o.quantity for o in orders if o.quantity < 0)
+        return pos + buys <= limit and pos - sells >= -limit
+
+    def _match(self, product: str, orders: List[Any], book, tick_trades, remaining) -> List[Tuple[int, int]]:
+        fills: List[Tuple[int, int]] = []
+        bids = [list(level) for level in book[0]] if book else []
+        asks = [list(level) for level in book[1]] if book else []
+        for order in orders:
+            qty = order.quantity
+            price = order.price
+            if qty > 0:
+                for level in asks:
+                    if qty == 0 or level[0] > price:
+                        break
+                    take = min(qty, level[1])
+                    if take:
+                        fills.append((level[0], take))
+                        level[1] -= take
+                        qty -= take
+            elif qty < 0:
+                for level in bids:
+                    if qty == 0 or level[0] < price:
+                        break
+                    take = min(-qty, level[1])
+                    if take:
+                        fills.append((level[0], -take))
+                        level[1] -= take
+                        qty += take
+            if qty == 0 or not self.match_trades:
+                continue
+            for trade, left in zip(tick_trades, remaining):
+                if trade[0] != product or left[0] == 0:
+                    continue
+                if (qty > 0 and trade[1] <= price) or (qty < 0 and trade[1] >= price):
+                    take = min(abs(qty), left[0])
+                    left[0] -= take
+                    fills.append((int(price), take if qty > 0 else -take))
+                    qty += -take if qty > 0 else take
+                    if qty == 0:
+                        break
+        return fills
+
+    def _convert(self, conversions: int, row, position: Dict[str, int], cash: Dict[str, float]) -> None:
+        bid, ask, transport, export_tariff, import_tariff = row[:5]
+        pos = position.get(MACARONS, 0)
+        qty = min(abs(conversions), CONVERSION_LIMIT, abs(pos))
+        if qty == 0:
+            return
+        if pos < 0:
+            cash[MACARONS] = cash.get(MACARONS, 0.0) - qty * (ask + transport + import_tariff)
+            position[MACARONS] = pos + qty
+        else:
+            cash[MACARONS] = cash.get(MACARONS, 0.0) + qty * (bid - transport - export_tariff)
+            position[MACARONS] = pos - qty
+
+
+def run_backtest(trader_path: str, round_num: int, days: Iterable[int], store=None, **kwargs) -> BacktestResult:
+    """Replay ``days`` of ``round_num``, from the CSVs or from an ingested ``TickStore``."""
+    backtester = Backtester.from_file(trader_path, **kwargs)
+    if store is not None:
+        return backtester.run(store.ingest(round_num, day).to_day_data() for day in days)
+    return backtester.run(load_day(round_num, day) for day in days)
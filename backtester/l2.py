@@ -0,0 +1,199 @@
+"""Level-2 book arrays and book-shape features, vectorised over whole days.
+
+The price files carry up to ``PRICE_LEVELS`` levels a side. ``l2_books`` turns
+a stored day into one ``L2Book`` per symbol: (ticks, levels) arrays of prices
+and volumes, best level first. A level with no price or no volume (the files
+have a few best levels with volume 0) is dropped and the rest move up, with
+NaN price and zero volume in the freed slots at the end. ``features`` computes, for every tick at once:
+
+    mid           (best bid + best ask) / 2
+    imbalance     (bid volume - ask volume) / total over the first ``levels``
+    microprice    best prices weighted by the opposite side's top volume
+    weighted_mid  mean of the bid and ask VWAPs over ``levels``
+    bid_slope     least-squares slope of cumulative volume against distance
+    ask_slope     from the mid, per side, over ``levels`` (two levels needed)
+
+``BookView.l2_features`` in the Round 5 trader computes the same numbers from
+one ``OrderDepth`` inside ``Trader.run``, dropping empty levels the same way,
+so research and live signals agree; ``check_parity`` walks a whole day through
+both and counts the ticks where they do not.
+
+    python -m backtester.l2 1 -2 --levels 3
+    python -m backtester.l2 1 -2 --check "Round 5/round5_refined.py"
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .data import PRICE_LEVELS, PRICES, available_days
+from .tickstore import DEFAULT_ROOT, MISSING, StoredDay, TickStore
+
+FEATURES = ("mid", "imbalance", "microprice", "weighted_mid", "bid_slope", "ask_slope")
+
+
+class L2Book:
+    def __init__(self, symbol: str, timestamps: np.ndarray, bid_prices: np.ndarray, bid_volumes: np.ndarray,
+                 ask_prices: np.ndarray, ask_volumes: np.ndarray):
+        self.symbol = symbol
+        self.timestamps = timestamps
+        self.bid_prices = bid_prices
+        self.bid_volumes = bid_volumes
+        self.ask_prices = ask_prices
+        self.ask_volumes = ask_volumes
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def l2_books(stored: StoredDay) -> Dict[str, L2Book]:
+    books = {}
+    if not stored.has(PRICES):
+        return books
+    for symbol in stored.products(PRICES):
+        cols = stored.product(PRICES, symbol)
+        sides = {}
+        for side in ("bid", "ask"):
+            prices = np.stack([cols[f"{side}_price_{n}"] for n in range(1, PRICE_LEVELS + 1)], axis=1)
+            volumes = np.stack([cols[f"{side}_volume_{n}"] for n in range(1, PRICE_LEVELS + 1)], axis=1)
+            present = (prices != MISSING) & (volumes > 0)
+            # move the present levels to the front, keeping their order
+            order = np.argsort(~present, axis=1, kind="stable")
+            present = np.take_along_axis(present, order, axis=1)
+            prices = np.take_along_axis(prices, order, axis=1)
+            volumes = np.take_along_axis(volumes, order, axis=1)
+            sides[side] = (np.where(present, prices, np.nan), np.where(present, volumes, 0).astype(np.float64))
+        books[symbol] = L2Book(symbol, np.asarray(cols["timestamp"]), *sides["bid"], *sides["ask"])
+    return books
+
+
+def _slope(prices: np.ndarray, volumes: np.ndarray, mid: np.ndarray) -> np.ndarray:
+    present = volumes > 0
+    n = present.sum(axis=1)
+    x = np.where(present, np.abs(prices - mid[:, None]), 0.0)
+    y = np.where(present, np.cumsum(volumes, axis=1), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        dy = np.where(present, y - y_mean[:, None], 0.0)
+        var = (dx * dx).sum(axis=1)
+        slope = (dx * dy).sum(axis=1) / var
+    return np.where((n >= 2) & (var > 0) & np.isfinite(mid), slope, np.nan)
+
+
+def features(book: L2Book, levels: int = PRICE_LEVELS) -> Dict[str, np.ndarray]:
+    """Every ``FEATURES`` column for every tick of ``book``; NaN where undefined."""
+    bid_p, bid_v = book.bid_prices[:, :levels], book.bid_volumes[:, :levels]
+    ask_p, ask_v = book.ask_prices[:, :levels], book.ask_volumes[:, :levels]
+    best_bid, best_ask = bid_p[:, 0], ask_p[:, 0]
+    top_bid, top_ask = bid_v[:, 0], ask_v[:, 0]
+    mid = (best_bid + best_ask) / 2
+    bid_total, ask_total = bid_v.sum(axis=1), ask_v.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        imbalance = np.where(bid_total + ask_total > 0,
+                             (bid_total - ask_total) / (bid_total + ask_total), np.nan)
+        microprice = np.where(top_bid + top_ask > 0,
+                              (best_bid * top_ask + best_ask * top_bid) / (top_bid + top_ask), mid)
+        bid_vwap = np.nansum(bid_p * bid_v, axis=1) / bid_total
+        ask_vwap = np.nansum(ask_p * ask_v, axis=1) / ask_total
+    return {
+        "mid": mid,
+        "imbalance": imbalance,
+        "microprice": microprice,
+        "weighted_mid": (bid_vwap + ask_vwap) / 2,
+        "bid_slope": _slope(bid_p, bid_v, mid),
+        "ask_slope": _slope(ask_p, ask_v, mid),
+    }
+
+
+def day_features(stored: StoredDay, levels: int = PRICE_LEVELS) -> Dict[str, Dict[str, np.ndarray]]:
+    return {symbol: features(book, levels) for symbol, book in l2_books(stored).items()}
+
+
+def check_parity(stored: StoredDay, trader_path: str, levels: int = PRICE_LEVELS) -> Dict[str, int]:
+    """Ticks per symbol where the trader's ``BookView.l2_features`` disagrees with ``features``.
+
+    Every row of the price file becomes the ``OrderDepth`` the exchange would
+    send, zero-volume levels included. A live None must be NaN offline, and
+    any other value must match to 1e-9.
+    """
+    from .engine import load_trader
+
+    module, datamodel = load_trader(trader_path)
+    mismatches = {}
+    if not stored.has(PRICES):
+        return mismatches
+    for symbol, book in l2_books(stored).items():
+        offline = features(book, levels)
+        cols = stored.product(PRICES, symbol)
+        mismatches[symbol] = 0
+        for i in range(len(book)):
+            depth = datamodel.OrderDepth()
+            depth.buy_orders = {}
+            depth.sell_orders = {}
+            for n in range(1, PRICE_LEVELS + 1):
+                if cols[f"bid_price_{n}"][i] != MISSING:
+                    depth.buy_orders[int(cols[f"bid_price_{n}"][i])] = int(cols[f"bid_volume_{n}"][i])
+                if cols[f"ask_price_{n}"][i] != MISSING:
+                    depth.sell_orders[int(cols[f"ask_price_{n}"][i])] = -int(cols[f"ask_volume_{n}"][i])
+            live = module.BookView(depth).l2_features(levels)
+            for name in FEATURES:
+                value, expected = live[name], float(offline[name][i])
+                if value is None:
+                    same = math.isnan(expected)
+                else:
+                    same = not math.isnan(expected) and abs(value - expected) <= 1e-9
+                if not same:
+                    mismatches[symbol] += 1
+                    break
+    return mismatches
+
+
+def signal_table(round_num: int, days: Optional[Iterable[int]] = None, store: Optional[TickStore] = None,
+                 levels: int = PRICE_LEVELS) -> str:
+    """Per symbol, how each feature's lean away from the mid correlates with the next mid change."""
+    store = store if store is not None else TickStore(DEFAULT_ROOT)
+    leans: Dict[str, Dict[str, list]] = {}
+    for day in (days if days is not None else available_days(round_num)):
+        for symbol, feats in day_features(store.ingest(round_num, day), levels).items():
+            mid = feats["mid"]
+            rows = leans.setdefault(symbol, {"next": [], "imbalance": [], "microprice": [], "weighted_mid": []})
+            rows["next"].append(np.diff(mid, append=np.nan))
+            rows["imbalance"].append(feats["imbalance"])
+            rows["microprice"].append(feats["microprice"] - mid)
+            rows["weighted_mid"].append(feats["weighted_mid"] - mid)
+    lines = [f"{'symbol':<20}{'ticks':>8}{'imbalance':>12}{'microprice':>12}{'weighted_mid':>14}"]
+    for symbol, rows in sorted(leans.items()):
+        columns = {name: np.concatenate(values) for name, values in rows.items()}
+        corr = {}
+        for name in ("imbalance", "microprice", "weighted_mid"):
+            ok = np.isfinite(columns[name]) & np.isfinite(columns["next"])
+            corr[name] = np.corrcoef(columns[name][ok], columns["next"][ok])[0, 1] if ok.sum() > 2 else np.nan
+        lines.append(f"{symbol:<20}{len(columns['next']):>8}{corr['imbalance']:>12.3f}"
+                     f"{corr['microprice']:>12.3f}{corr['weighted_mid']:>14.3f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Correlation of L2 book features with the next mid change")
+    parser.add_argument("round", type=int)
+    parser.add_argument("days", type=int, nargs="*", help="days to read (default: all available)")
+    parser.add_argument("--levels", type=int, default=PRICE_LEVELS, choices=range(1, PRICE_LEVELS + 1))
+    parser.add_argument("--store", default=DEFAULT_ROOT)
+    parser.add_argument("--check", metavar="TRADER", default=None,
+                        help="instead, count the ticks where this trader's BookView.l2_features differs")
+    args = parser.parse_args()
+    store = TickStore(args.store)
+    if args.check is None:
+        print(signal_table(args.round, args.days or None, store, args.levels))
+        return
+    for day in (args.days or available_days(args.round)):
+        mismatches = check_parity(store.ingest(args.round, day), args.check, args.levels)
+        print(f"day {day}: " + ", ".join(f"{symbol} {count}" for symbol, count in sorted(mismatches.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Queue-position matching for passive orders.
+
+The default matcher in ``engine`` fills any resting order against every market
+trade printed through its price. ``QueueMatcher`` instead keeps each side of
+the book as a price-time priority queue: the displayed levels of the recorded
+book are queued first at their price, our orders join behind them, and every
+trade print of the tick is walked down that queue from the best price. Our
+order only fills with what is left of the print once the displayed volume
+ahead of it, at better or equal prices, has been consumed; displayed volume a
+print used up stays used for the rest of the tick.
+
+Levels are parallel lists (price, volume left, owner) per side, where owner is
+-1 for displayed volume and the order's index otherwise; nothing is kept
+beyond the tick because the exchange cancels unfilled orders after every
+``run``.
+"""
+from typing import Any, List, Tuple
+
+DISPLAYED = -1
+
+
+class QueueMatcher:
+    def __init__(self, match_trades: bool = True):
+        self.match_trades = match_trades
+
+    def match(self, product: str, orders: List[Any], book, tick_trades, remaining) -> List[Tuple[int, int]]:
+        fills: List[Tuple[int, int]] = []
+        bid_prices = [price for price, _ in book[0]] if book else []
+        bid_left = [volume for _, volume in book[0]] if book else []
+        ask_prices = [price for price, _ in book[1]] if book else []
+        ask_left = [volume for _, volume in book[1]] if book else []
+
+        # Marketable quantity takes the displayed levels at their prices first.
+        resting: List[Tuple[int, int, int]] = []
+        for index, order in enumerate(orders):
+            qty = order.quantity
+            if qty > 0:
+                for level, price in enumerate(ask_prices):
+                    if qty == 0 or price > order.price:
+                        break
+                    take = min(qty, ask_left[level])
+                    if take:
+                        fills.append((price, take))
+                        ask_left[level] -= take
+                        qty -= take
+            elif qty < 0:
+                for level, price in enumerate(bid_prices):
+                    if qty == 0 or price < order.price:
+                        break
+                    take = min(-qty, bid_left[level])
+                    if take:
+                        fills.append((price, -take))
+                        bid_left[level] -= take
+                        qty += take
+            if qty:
+                resting.append((index, int(order.price), qty))
+        if not resting or not self.match_trades:
+            return fills
+
+        bids = self._queue(bid_prices, bid_left, [(i, p, q) for i, p, q in resting if q > 0], -1)
+        asks = self._queue(ask_prices, ask_left, [(i, p, -q) for i, p, q in resting if q < 0], 1)
+        for trade, left in zip(tick_trades, remaining):
+            if trade[0] != product or left[0] == 0:
+                continue
+            price = trade[1]
+            # A print at or through the best bid (ours or displayed) was a seller
+            # hitting the bids, one at or through the best ask a buyer lifting
+            # the asks; it consumes that queue in priority order either way.
+            best_bid = self._best(bids)
+            best_ask = self._best(asks)
+            if best_bid is not None and price <= best_bid:
+                left[0] -= self._consume(bids, price, left[0], -1, 1, fills)
+            elif best_ask is not None and price >= best_ask:
+                left[0] -= self._consume(asks, price, left[0], 1, -1, fills)
+        return fills
+
+    @staticmethod
+    def _queue(prices: List[int], left: List[int], ours: List[Tuple[int, int, int]], sign: int):
+        """Merge displayed levels and our orders into priority order.
+
+        ``sign`` is -1 for bids (best = highest) and 1 for asks (best = lowest);
+        at one price displayed volume sorts before ours, ours in submission order.
+        """
+        entries = [(sign * price, 0, DISPLAYED, price, volume) for price, volume in zip(prices, left) if volume > 0]
+        entries += [(sign * price, 1, index, price, qty) for index, price, qty in ours]
+        entries.sort()
+        q_prices = [entry[3] for entry in entries]
+        q_left = [entry[4] for entry in entries]
+        q_owner = [entry[2] for entry in entries]
+        return q_prices, q_left, q_owner
+
+    @staticmethod
+    def _best(queue):
+        q_prices, q_left, _ = queue
+        for level, volume in enumerate(q_left):
+            if volume > 0:
+                return q_prices[level]
+        return None
+
+    @staticmethod
+    def _consume(queue, price: int, quantity: int, sign: int, direction: int, fills) -> int:
+        """Walk one print down the queue; return how much of it filled our orders."""
+        q_prices, q_left, q_owner = queue
+        ours = 0
+        for level in range(len(q_prices)):
+            if quantity == 0 or sign * q_prices[level] > sign * price:
+                break
+            take = min(quantity, q_left[level])
+            if not take:
+                continue
+            q_left[level] -= take
+            quantity -= take
+            if q_owner[level] != DISPLAYED:
+                fills.append((q_prices[level], direction * take))
+                ours += take
+        return ours
@@ -0,0 +1,193 @@
+"""Per-tick latency profile of a trader over a replayed day.
+
+``TickProfiler.attach`` wraps the trader's hot methods in place with
+``perf_counter_ns`` timers: ``Trader.run`` itself, the per-product methods of
+the older rounds (``market_make``, ``ema_strategy``, ``black_scholes_ladder``,
+...), the traderData ``save_state``/``load_state``, ``FeatureCache.begin`` and
+every registered feature's ``compute``, every ``Strategy.run`` of
+``Trader.strategies``, the shared voucher pricer, the counterparty tracker when
+the trader keeps one, and the module's ``logger.flush``. Sections nest, so their times are inclusive.
+Nothing in the trader files changes; an unattached trader pays nothing.
+
+    python -m backtester.profiler "Round 5/round5_refined.py" 1 -2 --budget-ms 50
+"""
+import functools
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data import load_day
+from .engine import Backtester, load_trader
+from .tickstore import DEFAULT_ROOT, TickStore
+
+RUN = "run"
+# The exchange drops a run() call that takes longer than this.
+DEFAULT_BUDGET_MS = 900.0
+DEFAULT_TARGETS = ("update_ema", "market_make", "ema_strategy", "black_scholes_ladder", "voucher_orders",
+                   "save_state", "load_state")
+HISTOGRAM_EDGES_US = (0, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000,
+                      500_000, 1_000_000)
+
+
+class TickProfiler:
+    def __init__(self, budget_ms: float = DEFAULT_BUDGET_MS):
+        self.budget_ns = int(budget_ms * 1_000_000)
+        self.timestamps: List[int] = []
+        self.totals: List[int] = []
+        self.samples: Dict[str, List[int]] = {}
+        self.breakdown: List[Dict[str, int]] = []
+        self._current: Dict[str, int] = {}
+
+    def attach(self, trader: Any, module: Optional[ModuleType] = None,
+               targets: Sequence[str] = DEFAULT_TARGETS) -> Any:
+        """Wrap ``trader`` (and ``module.logger.flush``) in place and return it."""
+        for name in targets:
+            if callable(getattr(trader, name, None)):
+                self._wrap(trader, name, name)
+        features = getattr(trader, "features", None)
+        if features is not None and hasattr(features, "registry"):
+            self._wrap(features, "begin", "features.begin")
+            for name, feature in features.registry.items():
+                self._wrap(feature, "compute", f"feature.{name}")
+        for symbol, strategy in getattr(trader, "strategies", {}).items():
+            self._wrap(strategy, "run", f"{symbol}.run")
+        pricer = getattr(trader, "voucher_pricer", None)
+        if pricer is not None:
+            self._wrap(pricer, "update", "voucher_pricer.update")
+        counterparties = getattr(trader, "counterparties", None)
+        if counterparties is not None:
+            self._wrap(counterparties, "update", "counterparties.update")
+        logger = getattr(module, "logger", None)
+        if logger is not None:
+            self._wrap(logger, "flush", "logger.flush")
+        self._wrap_run(trader)
+        return trader
+
+    def _wrap(self, owner: Any, attr: str, section: str) -> None:
+        method = getattr(owner, attr)
+        clock = time.perf_counter_ns
+        current = self._current
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                current[section] = current.get(section, 0) + clock() - started
+
+        setattr(owner, attr, timed)
+
+    def _wrap_run(self, trader: Any) -> None:
+        run = trader.run
+        clock = time.perf_counter_ns
+
+        @functools.wraps(run)
+        def timed_run(state):
+            self._current.clear()
+            started = clock()
+            try:
+                return run(state)
+            finally:
+                self._record(state.timestamp, clock() - started)
+
+        trader.run = timed_run
+
+    def _record(self, timestamp: int, elapsed: int) -> None:
+        self.timestamps.append(timestamp)
+        self.totals.append(elapsed)
+        self.samples.setdefault(RUN, []).append(elapsed)
+        for section, spent in self._current.items():
+            self.samples.setdefault(section, []).append(spent)
+        self.breakdown.append(dict(self._current))
+
+    def over_budget(self) -> List[Tuple[int, int, Dict[str, int]]]:
+        """(timestamp, run ns, per-section ns) of every tick slower than the budget."""
+        return [(self.timestamps[i], total, self.breakdown[i])
+                for i, total in enumerate(self.totals) if total > self.budget_ns]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Calls and p50/p99/max/mean in milliseconds per section, slowest p99 first."""
+        stats = {}
+        for section, samples in self.samples.items():
+            values = np.asarray(samples, dtype=np.int64) / 1e6
+            p50, p99 = np.percentile(values, [50, 99])
+            stats[section] = {"calls": len(values), "p50": float(p50), "p99": float(p99),
+                              "max": float(values.max()), "mean": float(values.mean())}
+        return dict(sorted(stats.items(), key=lambda item: (item[0] != RUN, -item[1]["p99"])))
+
+    def histogram(self, section: str = RUN) -> List[Tuple[int, int, int]]:
+        """(low us, high us, ticks) buckets of one section's per-tick time."""
+        values = np.asarray(self.samples.get(section, []), dtype=np.int64) // 1_000
+        edges = np.array(HISTOGRAM_EDGES_US + (max(HISTOGRAM_EDGES_US[-1], int(values.max(initial=0))) + 1,))
+        counts, _ = np.histogram(values, bins=edges)
+        return [(int(edges[i]), int(edges[i + 1]), int(count)) for i, count in enumerate(counts)]
+
+    def report(self, top: int = 10) -> str:
+        lines = [f"{'section':<36}{'calls':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'mean ms':>10}"]
+        for section, s in self.stats().items():
+            lines.append(f"{section:<36}{s['calls']:>7}{s['p50']:>10.3f}{s['p99']:>10.3f}"
+                         f"{s['max']:>10.3f}{s['mean']:>10.3f}")
+
+        buckets = self.histogram()
+        widest = max((count for _, _, count in buckets), default=0) or 1
+        lines.append("")
+        lines.append("run() per tick:")
+        for low, high, count in buckets:
+            if count:
+                lines.append(f"  {_us(low):>8} - {_us(high):<8} {count:>7}  {'#' * max(1, 50 * count // widest)}")
+
+        slow = self.over_budget()
+        lines.append("")
+        lines.append(f"{len(slow)} of {len(self.totals)} ticks over the {self.budget_ns / 1e6:g} ms budget")
+        for timestamp, total, sections in sorted(slow, key=lambda tick: -tick[1])[:top]:
+            worst = ", ".join(f"{name}={spent / 1e6:.2f}"
+                              for name, spent in sorted(sections.items(), key=lambda item: -item[1])[:3])
+            lines.append(f"  t={timestamp:<8} {total / 1e6:>9.2f} ms  ({worst})")
+        return "\n".join(lines)
+
+
+def _us(value: int) -> str:
+    if value >= 1_000:
+        return f"{value / 1_000:g}ms"
+    return f"{value}us"
+
+
+def profile_day(trader_path: str, round_num: int, day: int, budget_ms: float = DEFAULT_BUDGET_MS,
+                store=None, targets: Sequence[str] = DEFAULT_TARGETS, **kwargs) -> TickProfiler:
+    """Replay one day with an instrumented trader and return the filled profiler."""
+    module, datamodel = load_trader(trader_path)
+    backtester = Backtester(module.Trader, datamodel, **kwargs)
+    profiler = TickProfiler(budget_ms)
+    trader = profiler.attach(module.Trader(), module, targets)
+    data = store.ingest(round_num, day).to_day_data() if store is not None else load_day(round_num, day)
+    backtester.run_day(data, trader)
+    return profiler
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-tick latency profile of Trader.run over a replayed day")
+    parser.add_argument("trader", help="path to a round trader file, e.g. 'Round 5/round5_refined.py'")
+    parser.add_argument("round", type=int)
+    parser.add_argument("day", type=int)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"flag ticks whose run() takes longer (default {DEFAULT_BUDGET_MS:g})")
+    parser.add_argument("--target", action="append", default=[],
+                        help="extra trader method to time; repeatable")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_ROOT, default=None,
+                        help="read the day through the columnar tick store (ingested on first use)")
+    parser.add_argument("--top", type=int, default=10, help="slowest over-budget ticks to list")
+    args = parser.parse_args()
+
+    store = TickStore(args.store) if args.store else None
+    profiler = profile_day(args.trader, args.round, args.day, args.budget_ms, store=store,
+                           targets=DEFAULT_TARGETS + tuple(args.target))
+    print(profiler.report(args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Parallel parameter sweeps over a trader's ``PARAMS``.
+
+Every round trader exposes its tunable knobs as a module level ``PARAMS``
+dict and accepts overrides with ``Trader(params)``. A sweep replays each
+candidate over the chosen days in a process pool and ranks them by total pnl:
+
+    python -m backtester.sweep "Round 5/round5_refined.py" 1 -2 -1 \\
+        -p kelp_gamma=0.01,0.05,0.2 -p kelp_fill_decay=0.5:2 --search halving --samples 27
+
+``name=a,b,c`` is a list of values, ``name=lo:hi`` a range sampled uniformly
+(integers if both ends are).
+
+With ``--store`` every worker replays the days straight from the memory-mapped
+column files of the tick store, a block of timestamps at a time, so the
+workers share one copy of the data through the page cache. Without it the
+days are parsed from the CSVs into ``DayData`` once in the parent before the
+pool starts. Under the ``fork`` start method workers inherit those objects
+rather than parsing their own, but reference counting writes to the pages
+they live on, so each worker gradually ends up with a private copy.
+"""
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .data import DayData, available_days, load_day
+from .engine import Backtester, load_trader
+from .tickstore import DEFAULT_ROOT, StoredDay, TickStore
+
+Space = Dict[str, Union[List[Any], Tuple[Any, Any]]]
+
+# Per-process state: filled by the parent before forking, or by _init_worker.
+_DAYS: List[Union[DayData, StoredDay]] = []
+_BACKTESTER: Optional[Backtester] = None
+
+
+def _value(text: str) -> Any:
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_space(specs: Sequence[str]) -> Space:
+    """Parse ``name=a,b,c`` (choices) and ``name=lo:hi`` (range) specs."""
+    space: Space = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"expected name=values, got {spec!r}")
+        if ":" in values:
+            lo, hi = (_value(v) for v in values.split(":", 1))
+            space[name] = (lo, hi)
+        else:
+            space[name] = [_value(v) for v in values.split(",")]
+    return space
+
+
+def grid(space: Space) -> List[Dict[str, Any]]:
+    for name, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"grid search needs a list of values for {name}, not a range")
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[name] for name in names))]
+
+
+def sample(space: Space, n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(n):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                if isinstance(lo, int) and isinstance(hi, int):
+                    params[name] = rng.randint(lo, hi)
+                else:
+                    params[name] = rng.uniform(lo, hi)
+            else:
+                params[name] = rng.choice(values)
+        candidates.append(params)
+    return candidates
+
+
+class SweepResult:
+    def __init__(self, params: Dict[str, Any], pnl: Dict[str, float], ticks: int, elapsed: float):
+        self.params = params
+        self.pnl = pnl
+        self.ticks = ticks
+        self.elapsed = elapsed
+
+    @property
+    def total(self) -> float:
+        return sum(self.pnl.values())
+
+
+def _init_worker(trader_path: str, round_num: int, days: List[int], store_root: Optional[str],
+                 match_trades: bool) -> None:
+    global _BACKTESTER
+    if not _DAYS:
+        _DAYS.extend(_load_days(round_num, days, store_root))
+    _BACKTESTER = Backtester.from_file(trader_path, match_trades=match_trades)
+
+
+def _load_days(round_num: int, days: List[int], store_root: Optional[str]) -> List[Union[DayData, StoredDay]]:
+    if store_root is None:
+        return [load_day(round_num, day) for day in days]
+    store = TickStore(store_root)
+    return [store.ingest(round_num, day) for day in days]
+
+
+def _evaluate(params: Dict[str, Any], ticks: Optional[int]) -> Tuple[Dict[str, float], int, float]:
+    started = time.perf_counter()
+    pnl: Dict[str, float] = {}
+    replayed = 0
+    for day in _DAYS:
+        trader = _BACKTESTER.trader_factory(params)
+        if isinstance(day, StoredDay):
+            result = _BACKTESTER.run_ticks(day.round_num, day.day, day.ticks(ticks), day.symbols(), trader)
+        else:
+            result = _BACKTESTER.run_day(day if ticks is None else day.head(ticks), trader)
+        replayed += result.ticks
+        for product, value in result.pnl.items():
+            pnl[product] = pnl.get(product, 0.0) + value
+    return pnl, replayed, time.perf_counter() - started
+
+
+class Sweep:
+    def __init__(self, trader_path: str, round_num: int, days: Optional[List[int]] = None,
+                 store_root: Optional[str] = None, workers: Optional[int] = None, match_trades: bool = True):
+        self.trader_path = os.path.abspath(trader_path)
+        self.round_num = round_num
+        self.days = list(days) if days else available_days(round_num)
+        self.store_root = store_root
+        self.workers = workers or os.cpu_count() or 1
+        self.match_trades = match_trades
+        module, _ = load_trader(self.trader_path)
+        self.defaults: Dict[str, Any] = dict(getattr(module, "PARAMS", {}))
+
+    def load(self) -> List[Union[DayData, StoredDay]]:
+        """Load the days into this process once, before any worker is forked."""
+        if not _DAYS:
+            _DAYS.extend(_load_days(self.round_num, self.days, self.store_root))
+        return _DAYS
+
+    def validate(self, space: Space) -> None:
+        unknown = sorted(set(space) - set(self.defaults))
+        if unknown:
+            raise ValueError(f"{os.path.basename(self.trader_path)} has no parameter(s) {', '.join(unknown)}; "
+                             f"tunable: {', '.join(sorted(self.defaults))}")
+
+    def evaluate(self, candidates: List[Dict[str, Any]], ticks: Optional[int] = None) -> List[SweepResult]:
+        """Replay every candidate and return the results ranked best first."""
+        init_args = (self.trader_path, self.round_num, self.days, self.store_root, self.match_trades)
+        self.load()
+        budgets = [ticks] * len(candidates)
+        if self.workers == 1 or len(candidates) == 1:
+            _init_worker(*init_args)
+            outcomes = list(map(_evaluate, candidates, budgets))
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with ProcessPoolExecutor(min(self.workers, len(candidates)), mp_context=context,
+                                     initializer=_init_worker, initargs=init_args) as pool:
+                outcomes = list(pool.map(_evaluate, candidates, budgets))
+        results = [SweepResult(params, pnl, replayed, elapsed)
+                   for params, (pnl, replayed, elapsed) in zip(candidates, outcomes)]
+        return sorted(results, key=lambda result: result.total, reverse=True)
+
+    def grid(self, space: Space) -> List[SweepResult]:
+        self.validate(space)
+        return self.evaluate(grid(space))
+
+    def random(self, space: Space, n: int, seed: Optional[int] = None) -> List[SweepResult]:
+        self.validate(space)
+        return self.evaluate(sample(space, n, seed))
+
+    def halving(self, space: Space, n: Optional[int] = None, eta: int = 3,
+                seed: Optional[int] = None) -> List[SweepResult]:
+        """Successive halving: score everyone on a prefix of each day, keep the best
+        ``1 / eta`` and grow the prefix by ``eta`` until the survivors see full days.
+
+        Candidates come from the grid when ``n`` is None, else ``n`` random samples.
+        Eliminated candidates are ranked after the finalists, with the tick budget
+        they were scored on.
+        """
+        self.validate(space)
+        candidates = grid(space) if n is None else sample(space, n, seed)
+        rungs = 1
+        while eta ** rungs < len(candidates):
+            rungs += 1
+        full = max(len(day.timestamps) for day in self.load())
+        eliminated: List[SweepResult] = []
+        for rung in range(rungs):
+            ticks = max(1, full // eta ** (rungs - 1 - rung))
+            results = self.evaluate(candidates, None if ticks >= full else ticks)
+            if rung == rungs - 1:
+                return results + eliminated
+            keep = max(1, len(results) // eta)
+            eliminated = results[keep:] + eliminated
+            candidates = [result.params for result in results[:keep]]
+        return []
+
+
+def write_table(results: List[SweepResult], path: str) -> None:
+    """Write the ranked results as CSV: rank, parameters, total, per-product pnl."""
+    names = sorted({name for result in results for name in result.params})
+    products = sorted({product for result in results for product in result.pnl})
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank"] + names + ["total", "ticks"] + products)
+        for rank, result in enumerate(results, 1):
+            writer.writerow([rank] + [result.params.get(name, "") for name in names]
+                            + [round(result.total, 1), result.ticks]
+                            + [round(result.pnl.get(product, 0.0), 1) for product in products])
+
+
+def format_table(results: List[SweepResult], top: int = 10) -> str:
+    lines = []
+    for rank, result in enumerate(results[:top], 1):
+        params = " ".join(f"{name}={value:.4g}" if isinstance(value, float) else f"{name}={value}"
+                          for name, value in sorted(result.params.items()))
+        lines.append(f"{rank:>3}. pnl={result.total:>12.1f}  ticks={result.ticks:>7}  {params}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over a trader's PARAMS")
+    parser.add_argument("trader", help="path to a round trader file, e.g. 'Round 5/round5_refined.py'")
+    parser.add_argument("round", type=int, help="round whose data directory is replayed")
+    parser.add_argument("days", type=int, nargs="*", help="days to replay (default: all available)")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="a,b,c for choices or lo:hi for a range; repeatable")
+    parser.add_argument("--search", choices=("grid", "random", "halving"), default="grid")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="candidates for random search (default 20) or halving (default: the grid)")
+    parser.add_argument("--eta", type=int, default=3, help="halving keeps 1/eta of the candidates per rung")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per core)")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_ROOT, default=None,
+                        help="read days through the columnar tick store (ingested on first use)")
+    parser.add_argument("--no-trade-matching", action="store_true",
+                        help="only fill against the book, not against market trades")
+    parser.add_argument("--out", default=None, help="write the ranked table to this CSV file")
+    parser.add_argument("--top", type=int, default=10, help="rows to print")
+    args = parser.parse_args()
+
+    sweep = Sweep(args.trader, args.round, args.days, store_root=args.store, workers=args.workers,
+                  match_trades=not args.no_trade_matching)
+    started = time.perf_counter()
+    try:
+        space = parse_space(args.param)
+        if not space:
+            raise ValueError(f"nothing to sweep; tunable: {', '.join(sorted(sweep.defaults))}")
+        if args.search == "grid":
+            results = sweep.grid(space)
+        elif args.search == "random":
+            results = sweep.random(space, args.samples or 20, args.seed)
+        else:
+            results = sweep.halving(space, args.samples, args.eta, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_table(results, args.top))
+    print(f"{len(results)} candidates in {time.perf_counter() - started:.1f}s on {sweep.workers} workers")
+    if args.out:
+        write_table(results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""Columnar, memory-mapped store for the round CSVs.
+
+``ingest`` parses each day file once and writes one ``.npy`` file per column:
+
+    <root>/manifest.json
+    <root>/objects/<digest>.npy
+
+Storage is content addressed at two levels, because later rounds re-ship the
+days they share with earlier ones. A day file is identified by the SHA-256 of
+its kind, day and bytes: one already in ``files`` (the Round 4 and 5
+observations) is mapped to the stored entry without being parsed again. A new
+file's columns are stored by the SHA-256 of their dtype and bytes, so a column
+another file already has is kept once; Round 5 re-ships the Round 4 trades
+with only the buyer and seller columns filled in. The manifest's ``days`` map
+each (round, day) to one file digest per kind, so two rounds that ship the same
+data replay the very same arrays.
+
+Rows of prices and trades are sorted by product then timestamp, so every
+product is a contiguous slice (``offsets`` in the manifest) and can be taken
+without copying. Strings (products, traders) are stored as integer codes into
+the manifest symbol tables. ``global_ts`` is ``day * DAY_LENGTH + timestamp``;
+the day numbers in the file names already form one calendar across rounds.
+"""
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .data import (KINDS, OBSERVATIONS, PRICE_LEVELS, PRICES, REPO_ROOT, TRADES, BookRow, DayData, ObservationRow,
+                   TradeRow, available_days, data_path, read_observations, read_prices, read_trades)
+
+DAY_LENGTH = 1_000_000
+DEFAULT_ROOT = os.path.join(REPO_ROOT, ".tickstore")
+MANIFEST = "manifest.json"
+OBJECTS = "objects"
+MISSING = 0
+
+PRICE_COLUMNS = (
+    ["timestamp", "global_ts", "product"]
+    + [f"{side}_{field}_{n}" for side in ("bid", "ask") for field in ("price", "volume") for n in range(1, PRICE_LEVELS + 1)]
+    + ["mid_price"]
+)
+TRADE_COLUMNS = ["timestamp", "global_ts", "symbol", "price", "quantity", "buyer", "seller"]
+OBSERVATION_COLUMNS = ["timestamp", "global_ts", "bidPrice", "askPrice", "transportFees", "exportTariff",
+                       "importTariff", "sugarPrice", "sunlightIndex"]
+
+
+def global_timestamp(day, timestamp):
+    return day * DAY_LENGTH + timestamp
+
+
+class SymbolTable:
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names = list(names or [])
+        self.codes = {name: i for i, name in enumerate(self.names)}
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class StoredDay:
+    """Memory-mapped columns of one (round, day)."""
+
+    def __init__(self, store: "TickStore", round_num: int, day: int, entry: dict):
+        self.store = store
+        self.round_num = round_num
+        self.day = day
+        self.entry = entry
+        # kind -> file digest
+        self.digests: Dict[str, str] = entry["kinds"]
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+        self._timestamps: Optional[np.ndarray] = None
+
+    def has(self, kind: str) -> bool:
+        return kind in self.digests
+
+    def info(self, kind: str) -> dict:
+        return self.store.files[self.digests[kind]]
+
+    def column(self, kind: str, name: str) -> np.ndarray:
+        key = (kind, name)
+        array = self._columns.get(key)
+        if array is None:
+            array = np.load(self.store.object_path(self.info(kind)["columns"][name]), mmap_mode="r")
+            self._columns[key] = array
+        return array
+
+    def columns(self, kind: str) -> Dict[str, np.ndarray]:
+        return {name: self.column(kind, name) for name in self.info(kind)["columns"]}
+
+    def products(self, kind: str = PRICES) -> List[str]:
+        return list(self.info(kind).get("offsets", {}))
+
+    def product(self, kind: str, product: str) -> Dict[str, np.ndarray]:
+        """Columns of ``kind`` restricted to ``product``, as zero-copy views."""
+        start, stop = self.info(kind)["offsets"][product]
+        return {name: array[start:stop] for name, array in self.columns(kind).items()}
+
+    def frame(self, kind: str):
+        import pandas as pd
+
+        data = {name: np.asarray(array) for name, array in self.columns(kind).items()}
+        for name in ("product", "symbol"):
+            if name in data:
+                data[name] = np.asarray(self.store.products.names, dtype=object)[data[name]]
+        for name in ("buyer", "seller"):
+            if name in data:
+                data[name] = np.asarray(self.store.traders.names, dtype=object)[data[name]]
+        return pd.DataFrame(data)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Every timestamp with a book, a trade or an observation, ascending."""
+        if self._timestamps is None:
+            stamps = [self.column(kind, "timestamp") for kind in KINDS if self.has(kind)]
+            self._timestamps = np.unique(np.concatenate(stamps)) if stamps else np.empty(0, dtype=np.int32)
+        return self._timestamps
+
+    def symbols(self) -> List[str]:
+        """Every product with a book or a trade print that day, sorted like ``DayData.products``."""
+        names = set()
+        for kind in (PRICES, TRADES):
+            if self.has(kind):
+                names.update(self.products(kind))
+        return sorted(names)
+
+    def to_day_data(self) -> DayData:
+        prices = self._prices(self._order(PRICES)[0]) if self.has(PRICES) else {}
+        trades = self._trades(self._order(TRADES)[0]) if self.has(TRADES) else {}
+        observations = self._observations(self._order(OBSERVATIONS)[0]) if self.has(OBSERVATIONS) else {}
+        return DayData(self.round_num, self.day, prices, trades, observations)
+
+    def ticks(self, limit: Optional[int] = None, chunk: int = 1000) \
+            -> Iterator[Tuple[int, Dict[str, BookRow], List[TradeRow], Optional[ObservationRow]]]:
+        """The first ``limit`` ticks of ``to_day_data().ticks()``, read straight from the mapped columns.
+
+        Rows are copied out ``chunk`` timestamps at a time, so a replay holds one
+        block of Python objects and every process reading the day shares the
+        column pages through the page cache.
+        """
+        timestamps = self.timestamps[:limit]
+        orders = {kind: self._order(kind) for kind in KINDS if self.has(kind)}
+        readers = {PRICES: self._prices, TRADES: self._trades, OBSERVATIONS: self._observations}
+        for start in range(0, len(timestamps), chunk):
+            block = timestamps[start:start + chunk]
+            found = {PRICES: {}, TRADES: {}, OBSERVATIONS: {}}
+            for kind, (rows, stamps) in orders.items():
+                lo = np.searchsorted(stamps, block[0], side="left")
+                hi = np.searchsorted(stamps, block[-1], side="right")
+                found[kind] = readers[kind](rows[lo:hi])
+            for timestamp in block.tolist():
+                yield (timestamp, found[PRICES].get(timestamp, {}), found[TRADES].get(timestamp, []),
+                       found[OBSERVATIONS].get(timestamp))
+
+    def _order(self, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of ``kind`` in timestamp order, ties kept in stored (product) order, and their timestamps."""
+        stamps = self.column(kind, "timestamp")
+        rows = np.argsort(stamps, kind="stable")
+        return rows, stamps[rows]
+
+    def _prices(self, rows: np.ndarray) -> dict:
+        products = self.store.products.names
+        cols = self.columns(PRICES)
+        bid_lists = [(cols[f"bid_price_{n}"][rows].tolist(), cols[f"bid_volume_{n}"][rows].tolist())
+                     for n in range(1, PRICE_LEVELS + 1)]
+        ask_lists = [(cols[f"ask_price_{n}"][rows].tolist(), cols[f"ask_volume_{n}"][rows].tolist())
+                     for n in range(1, PRICE_LEVELS + 1)]
+        codes = cols["product"][rows].tolist()
+        mids = cols["mid_price"][rows].tolist()
+        prices: dict = {}
+        for i, timestamp in enumerate(cols["timestamp"][rows].tolist()):
+            bids = [(p[i], v[i]) for p, v in bid_lists if p[i] != MISSING]
+            asks = [(p[i], v[i]) for p, v in ask_lists if p[i] != MISSING]
+            prices.setdefault(timestamp, {})[products[codes[i]]] = (bids, asks, mids[i])
+        return prices
+
+    def _trades(self, rows: np.ndarray) -> dict:
+        products = self.store.products.names
+        traders = self.store.traders.names
+        cols = self.columns(TRADES)
+        trades: dict = {}
+        for timestamp, symbol, price, qty, buyer, seller in zip(
+                *(cols[name][rows].tolist() for name in ("timestamp", "symbol", "price", "quantity", "buyer", "seller"))):
+            trades.setdefault(timestamp, []).append((products[symbol], price, qty, traders[buyer], traders[seller]))
+        return trades
+
+    def _observations(self, rows: np.ndarray) -> dict:
+        cols = self.columns(OBSERVATIONS)
+        values = [cols[name][rows].tolist() for name in OBSERVATION_COLUMNS[2:]]
+        return {timestamp: tuple(v[i] for v in values) for i, timestamp in enumerate(cols["timestamp"][rows].tolist())}
+
+
+class TickStore:
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        path = os.path.join(root, MANIFEST)
+        manifest = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+        self.products = SymbolTable(manifest.get("products"))
+        # code 0 is the empty (anonymous) counterparty
+        self.traders = SymbolTable(manifest.get("traders") or [""])
+        # file digest -> {kind, columns: {name: object digest}, rows, offsets, sources}; a store
+        # written before the catalog has no files and its days are simply ingested again
+        self.files: Dict[str, dict] = manifest.get("files", {})
+        self.days: Dict[str, dict] = manifest.get("days", {}) if "files" in manifest else {}
+
+    @staticmethod
+    def key(round_num: int, day: int) -> str:
+        return f"{round_num}:{day}"
+
+    def save_manifest(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"products": self.products.names, "traders": self.traders.names, "files": self.files,
+                       "days": self.days}, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def contains(self, round_num: int, day: int) -> bool:
+        return self.key(round_num, day) in self.days
+
+    def open(self, round_num: int, day: int) -> StoredDay:
+        entry = self.days.get(self.key(round_num, day))
+        if entry is None:
+            raise KeyError(f"round {round_num} day {day} has not been ingested into {self.root}")
+        return StoredDay(self, round_num, day, entry)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, OBJECTS, f"{digest}.npy")
+
+    @staticmethod
+    def file_digest(kind: str, day: int, path: str) -> str:
+        sha = hashlib.sha256(f"{kind}:{day}:".encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def ingest(self, round_num: int, day: int, data_root: str = REPO_ROOT, force: bool = False) -> StoredDay:
+        if self.contains(round_num, day) and not force:
+            return self.open(round_num, day)
+        key = self.key(round_num, day)
+        entry = {"kinds": {}}
+        for kind in KINDS:
+            path = data_path(kind, round_num, day, data_root)
+            if not os.path.exists(path):
+                continue
+            digest = self.file_digest(kind, day, path)
+            if digest not in self.files or force:
+                columns, offsets = self._build(kind, path, day)
+                info = self._write(columns, offsets)
+                info["kind"] = kind
+                info["sources"] = self.files.get(digest, {}).get("sources", [])
+                self.files[digest] = info
+            if key not in self.files[digest]["sources"]:
+                self.files[digest]["sources"].append(key)
+            entry["kinds"][kind] = digest
+        # a re-ingested day whose file content changed no longer shares the old file
+        for kind, digest in self.days.get(key, {}).get("kinds", {}).items():
+            if entry["kinds"].get(kind) != digest and digest in self.files:
+                sources = self.files[digest]["sources"]
+                if key in sources:
+                    sources.remove(key)
+                if not sources:
+                    del self.files[digest]
+        self.days[key] = entry
+        self.save_manifest()
+        return StoredDay(self, round_num, day, entry)
+
+    def shared(self) -> Dict[str, List[str]]:
+        """Files that more than one (round, day) maps to, with those days."""
+        return {digest: info["sources"] for digest, info in self.files.items() if len(info["sources"]) > 1}
+
+    def usage(self) -> Tuple[int, int]:
+        """(bytes the stored columns would take without dedup, bytes they take)."""
+        sizes: Dict[str, int] = {}
+        referenced = 0
+        for info in self.files.values():
+            for digest in info["columns"].values():
+                if digest not in sizes:
+                    sizes[digest] = os.path.getsize(self.object_path(digest))
+                referenced += sizes[digest] * len(info["sources"])
+        return referenced, sum(sizes.values())
+
+    def ingest_round(self, round_num: int, data_root: str = REPO_ROOT, force: bool = False) -> List[StoredDay]:
+        return [self.ingest(round_num, day, data_root, force) for day in available_days(round_num, data_root)]
+
+    def _build(self, kind: str, path: str, day: int):
+        if kind == PRICES:
+            rows = []
+            for timestamp, books in read_prices(path).items():
+                for product, (bids, asks, mid) in books.items():
+                    levels = []
+                    for side in (bids, asks):
+                        padded = side + [(MISSING, MISSING)] * (PRICE_LEVELS - len(side))
+                        levels.extend([p for p, _ in padded] + [v for _, v in padded])
+                    rows.append([timestamp, global_timestamp(day, timestamp), self.products.code(product)] + levels + [mid])
+            rows.sort(key=lambda r: (r[2], r[0]))
+            dtypes = [np.int32, np.int64, np.int16] + [np.int32] * (4 * PRICE_LEVELS) + [np.float64]
+            columns = self._columnize(PRICE_COLUMNS, dtypes, rows)
+            return columns, self._offsets(columns["product"])
+        if kind == TRADES:
+            rows = []
+            for timestamp, trades in read_trades(path).items():
+                for symbol, price, qty, buyer, seller in trades:
+                    rows.append([timestamp, global_timestamp(day, timestamp), self.products.code(symbol), price, qty,
+                                 self.traders.code(buyer), self.traders.code(seller)])
+            rows.sort(key=lambda r: (r[2], r[0]))
+            dtypes = [np.int32, np.int64, np.int16, np.int32, np.int32, np.int16, np.int16]
+            columns = self._columnize(TRADE_COLUMNS, dtypes, rows)
+            return columns, self._offsets(columns["symbol"])
+        rows = [[timestamp, global_timestamp(day, timestamp)] + list(values)
+                for timestamp, values in sorted(read_observations(path).items())]
+        dtypes = [np.int32, np.int64] + [np.float64] * (len(OBSERVATION_COLUMNS) - 2)
+        return self._columnize(OBSERVATION_COLUMNS, dtypes, rows), None
+
+    @staticmethod
+    def _columnize(names, dtypes, rows) -> Dict[str, np.ndarray]:
+        if not rows:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in zip(names, dtypes)}
+        return {name: np.array(values, dtype=dtype) for name, dtype, values in zip(names, dtypes, zip(*rows))}
+
+    def _offsets(self, codes: np.ndarray) -> Dict[str, List[int]]:
+        offsets = {}
+        unique, starts = np.unique(codes, return_index=True)
+        stops = list(starts[1:]) + [len(codes)]
+        for code, start, stop in zip(unique.tolist(), starts.tolist(), stops):
+            offsets[self.products.names[code]] = [int(start), int(stop)]
+        return offsets
+
+    def _write(self, columns: Dict[str, np.ndarray], offsets) -> dict:
+        os.makedirs(os.path.join(self.root, OBJECTS), exist_ok=True)
+        stored = {}
+        for name, array in columns.items():
+            array = np.ascontiguousarray(array)
+            sha = hashlib.sha256(f"{array.dtype.str}:{array.shape}:".encode())
+            sha.update(array.tobytes())
+            digest = stored[name] = sha.hexdigest()
+            path = self.object_path(digest)
+            if not os.path.exists(path):
+                np.save(path + ".tmp.npy", array)
+                os.replace(path + ".tmp.npy", path)
+        entry = {"columns": stored, "rows": int(len(next(iter(columns.values()))))}
+        if offsets is not None:
+            entry["offsets"] = offsets
+        return entry
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest round CSVs into the columnar tick store")
+    parser.add_argument("rounds", type=int, nargs="+")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--force", action="store_true", help="re-ingest days that are already stored")
+    args = parser.parse_args()
+
+    store = TickStore(args.root)
+    for round_num in args.rounds:
+        for stored in store.ingest_round(round_num, force=args.force):
+            rows = {kind: stored.info(kind)["rows"] for kind in stored.digests}
+            print(f"Round {round_num} day {stored.day}: {rows}")
+    for digest, sources in store.shared().items():
+        info = store.files[digest]
+        print(f"{info['kind']} {digest[:12]}: {info['rows']} rows stored once for {', '.join(sources)}")
+    referenced, stored = store.usage()
+    print(f"{stored / 1e6:.1f} MB of columns stored for {referenced / 1e6:.1f} MB referenced")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from backtester.data import REPO_ROOT, load_day
+from backtester.engine import load_trader
+
+
+@pytest.fixture(scope="session")
+def round5_path():
+    return os.path.join(REPO_ROOT, "Round 5", "round5_refined.py")
+
+
+@pytest.fixture(scope="module")
+def round5(round5_path):
+    """The Round 5 trader module and its datamodel, loaded once per test module."""
+    return load_trader(round5_path)
+
+
+@pytest.fixture(scope="session")
+def round1_day():
+    """The first 1,000 timestamps of Round 1 day -2, the only round that ships books."""
+    return load_day(1, -2).head(1000)
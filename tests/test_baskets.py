@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from backtester.data import REPO_ROOT
+from backtester.engine import load_trader
+
+BASKET = "PICNIC_BASKET2"
+
+
+@pytest.fixture(scope="module")
+def round2():
+    return load_trader(os.path.join(REPO_ROOT, "Round 2", "round2_rain_kelp_jams.py"))
+
+
+def make_state(datamodel, books, position=None, timestamp=0):
+    """``books`` maps a symbol to ((bid, volume), (ask, volume))."""
+    depths = {}
+    for symbol, ((bid, bid_volume), (ask, ask_volume)) in books.items():
+        depth = datamodel.OrderDepth()
+        depth.buy_orders = {bid: bid_volume}
+        depth.sell_orders = {ask: -ask_volume}
+        depths[symbol] = depth
+    return datamodel.TradingState("", timestamp, {}, depths, {}, {}, dict(position or {}),
+                                  datamodel.Observation({}, {}))
+
+
+def legs(croissant, jam, volume=50):
+    return {"CROISSANTS": ((croissant - 1, volume), (croissant + 1, volume)),
+            "JAMS": ((jam - 1, volume), (jam + 1, volume))}
+
+
+def test_synthetic_value_moves_with_the_legs_and_recovers_from_a_missing_leg(round2):
+    module, datamodel = round2
+    engine = module.BasketEngine({BASKET: module.BASKETS[BASKET]})
+    spread = engine.spreads[BASKET]
+    ticks = [legs(4300, 6600), legs(4302, 6600), legs(4302, 6595), {"CROISSANTS": ((4301, 5), (4303, 5))},
+             legs(4310, 6590)]
+    for books in ticks:
+        engine.update(make_state(datamodel, {**books, BASKET: ((30_400, 5), (30_404, 5))}))
+        if "JAMS" not in books:
+            assert spread.spread is None
+            continue
+        croissant = sum(books["CROISSANTS"][side][0] for side in (0, 1)) / 2
+        jam = sum(books["JAMS"][side][0] for side in (0, 1)) / 2
+        assert spread.synthetic_bid == 4 * books["CROISSANTS"][0][0] + 2 * books["JAMS"][0][0]
+        assert spread.synthetic_ask == 4 * books["CROISSANTS"][1][0] + 2 * books["JAMS"][1][0]
+        assert spread.spread == pytest.approx(30_402 - 4 * croissant - 2 * jam)
+
+
+def test_zscore_is_exponentially_weighted_and_waits_for_warmup(round2):
+    module, datamodel = round2
+    spread = module.BasketSpread(BASKET, module.BASKETS[BASKET], window=9, warmup=5)
+    alpha = 0.2
+    mean = var = None
+    basket_mids = [30_402, 30_410, 30_398, 30_405, 30_401, 30_420]
+    for i, mid in enumerate(basket_mids):
+        spread.observe(make_state(datamodel, {**legs(4300, 6600), BASKET: ((mid - 2, 5), (mid + 2, 5))}),
+                       {"CROISSANTS": (4299, 4301), "JAMS": (6599, 6601)})
+        value = mid - (4 * 4300 + 2 * 6600)
+        if mean is None:
+            mean, var = value, 0.0
+        else:
+            diff = value - mean
+            mean += alpha * diff
+            var = (1 - alpha) * (var + alpha * diff * diff)
+        assert spread.mean == pytest.approx(mean) and spread.var == pytest.approx(var)
+        if i + 1 < 5:
+            assert spread.zscore() is None
+    assert spread.zscore() == pytest.approx((value - mean) / var ** 0.5)
+
+
+def test_executable_size_is_limited_by_the_thinnest_leg_and_the_limits(round2):
+    module, datamodel = round2
+    trader = module.Trader()
+    spread = module.BasketSpread(BASKET, module.BASKETS[BASKET])
+    books = {"CROISSANTS": ((4299, 18), (4301, 40)), "JAMS": ((6599, 40), (6601, 40)),
+             BASKET: ((30_400, 30), (30_404, 30))}
+    state = make_state(datamodel, books)
+    # buying baskets sells 4 CROISSANTS each into an 18 lot bid
+    assert spread.executable_size(state, 1, trader.limits, {}, hedge=True) == 4
+    assert spread.executable_size(state, 1, trader.limits, {}, hedge=False) == 30
+    # JAMS (limit 350) already long 340: selling baskets buys 2 JAMS each
+    state = make_state(datamodel, books, {"JAMS": 340})
+    assert spread.executable_size(state, -1, trader.limits, {}, hedge=True) == 5
+    # what the other basket committed this tick counts against the shared legs
+    assert spread.executable_size(state, 1, trader.limits, {"CROISSANTS": -8}, hedge=True) == 2
+
+
+def test_trader_hedges_the_basket_by_default(round2):
+    module, datamodel = round2
+    trader = module.Trader()
+    spread = trader.baskets.spreads[BASKET]
+    spread.mean, spread.var, spread.count = 0.0, 4.0, 1_000
+    books = {**legs(4300, 6600), BASKET: ((30_420, 10), (30_424, 10))}
+    orders, _, _ = trader.run(make_state(datamodel, books))
+    assert [(o.price, o.quantity) for o in orders[BASKET]] == [(30_420, -10)]
+    assert [(o.price, o.quantity) for o in orders["CROISSANTS"]] == [(4301, 40)]
+    assert [(o.price, o.quantity) for o in orders["JAMS"]] == [(6601, 20)]
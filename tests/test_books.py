@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+from backtester.data import REPO_ROOT
+from backtester.engine import load_trader
+
+TRADERS = ["Round 2/round2_rain_kelp_jams.py", "Round 3/round3.py", "Round 4/round4_v1.py",
+           "Round 5/round5_refined.py"]
+
+
+@pytest.mark.parametrize("trader", TRADERS)
+def test_book_view_drops_levels_without_volume(trader):
+    module, datamodel = load_trader(os.path.join(REPO_ROOT, trader))
+    depth = datamodel.OrderDepth()
+    depth.buy_orders = {2001: 0, 2000: 5, 1999: 3}
+    depth.sell_orders = {2002: 0, 2003: -4}
+    view = module.BookView(depth)
+    assert view.bids == [(2000, 5), (1999, 3)]
+    assert view.asks == [(2003, 4)]
+    assert (view.best_bid, view.best_ask, view.mid) == (2000, 2003, 2001.5)
@@ -0,0 +1,50 @@
+import itertools
+import math
+import os
+
+from backtester.counterparty import CounterpartyIndex
+from backtester.data import REPO_ROOT, data_path, iter_trades
+from backtester.tickstore import TickStore
+
+HORIZONS = (100, 1_000, 10_000)
+
+
+def test_live_tracker_matches_the_offline_index(round5, tmp_path):
+    module, datamodel = round5
+    # the first few thousand Round 5 prints, copied into a data root of their own
+    path = data_path("trades", 5, 2, str(tmp_path))
+    os.makedirs(os.path.dirname(path))
+    with open(data_path("trades", 5, 2, REPO_ROOT)) as source, open(path, "w") as target:
+        target.writelines(itertools.islice(source, 4000))
+    index = CounterpartyIndex(TickStore(str(tmp_path / "store")), HORIZONS)
+    index.add_day(index.store.ingest(5, 2, data_root=str(tmp_path)))
+
+    tracker = module.CounterpartyTracker(HORIZONS)
+    for timestamp, prints in itertools.groupby(iter_trades(path), key=lambda item: item[0]):
+        market_trades = {}
+        for _, (symbol, price, quantity, buyer, seller) in prints:
+            market_trades.setdefault(symbol, []).append(
+                datamodel.Trade(symbol, price, quantity, buyer, seller, timestamp))
+        tracker.update(datamodel.TradingState("", timestamp + 100, {}, {}, {}, market_trades, {},
+                                              datamodel.Observation({}, {})))
+
+    compared = 0
+    for trader in index.traders():
+        for symbol in index.symbols(trader):
+            offline, live = index.stats(trader, symbol), tracker.stats(trader, symbol)
+            assert (live["trades"], live["bought"], live["sold"]) == \
+                (offline["trades"], offline["bought"], offline["sold"])
+            for key in ("markout", "hit_rate"):
+                for horizon in HORIZONS:
+                    expected, actual = offline[key][horizon], live[key][horizon]
+                    assert (math.isnan(expected) and math.isnan(actual)) or math.isclose(expected, actual)
+            compared += 1
+    assert compared > 20
+
+
+def test_counterparties_are_only_tracked_when_asked_for(round5):
+    module, _ = round5
+    assert module.Trader().counterparties is None
+    assert "counterparties" not in module.Trader().features.registry
+    tracked = module.Trader({"track_counterparties": 1})
+    assert tracked.features.registry["counterparties"] is tracked.counterparties
@@ -0,0 +1,69 @@
+import pytest
+
+from backtester.data import LIMITS, DayData
+from backtester.engine import Backtester
+
+
+class Recording:
+    """Wraps a trader and keeps the positions it was handed."""
+
+    def __init__(self, trader):
+        self.trader = trader
+        self.positions = []
+
+    def run(self, state):
+        self.positions.append(dict(state.position))
+        return self.trader.run(state)
+
+
+def test_replay_respects_limits_and_is_deterministic(round5, round1_day):
+    module, datamodel = round5
+    traders = []
+
+    def factory():
+        traders.append(Recording(module.Trader()))
+        return traders[-1]
+
+    first = Backtester(factory, datamodel).run_day(round1_day)
+    second = Backtester(factory, datamodel).run_day(round1_day)
+    assert first.pnl == second.pnl
+    assert first.position == second.position
+    assert first.volume == second.volume
+    assert any(first.volume.values())
+    for position in traders[0].positions + [first.position]:
+        for product, qty in position.items():
+            assert abs(qty) <= LIMITS[product]
+
+
+class Lifter:
+    """Buys 2 lots at the best ask every tick."""
+
+    def __init__(self, datamodel):
+        self.dm = datamodel
+
+    def run(self, state):
+        depth = state.order_depths["KELP"]
+        return {"KELP": [self.dm.Order("KELP", min(depth.sell_orders), 2)]}, 0, ""
+
+
+def test_pnl_is_cash_plus_position_at_the_last_mid(round5):
+    _, datamodel = round5
+    books = {
+        0: {"KELP": ([(99, 5)], [(101, 5)], 100.0)},
+        100: {"KELP": ([(101, 5)], [(103, 5)], 102.0)},
+        200: {"KELP": ([(104, 5)], [(106, 5)], 105.0)},
+    }
+    day = DayData(1, 0, books, {}, {})
+    result = Backtester(lambda: Lifter(datamodel), datamodel).run_day(day)
+    cash = -2 * (101 + 103 + 106)
+    assert result.position == {"KELP": 6}
+    assert result.volume == {"KELP": 6}
+    assert result.pnl["KELP"] == pytest.approx(cash + 6 * 105.0)
+
+
+def test_day_without_books_warns(round5):
+    module, datamodel = round5
+    trades = {0: [("KELP", 2000, 3, "", "")], 100: [("KELP", 2001, 1, "", "")]}
+    with pytest.warns(UserWarning, match="no order books"):
+        result = Backtester(module.Trader, datamodel).run_day(DayData(2, 0, {}, trades, {}))
+    assert not any(result.volume.values())
@@ -0,0 +1,53 @@
+import pytest
+
+
+def test_feature_without_compute_cannot_be_built(round5):
+    module, _ = round5
+
+    class Unfinished(module.Feature):
+        name = "unfinished"
+
+    with pytest.raises(TypeError):
+        Unfinished()
+
+
+def test_dependencies_are_planned_first_and_replanning_resets_symbols(round5):
+    module, _ = round5
+
+    class Doubled(module.Feature):
+        name = "doubled"
+        requires = ("mid",)
+
+        def compute(self, features, symbol):
+            return 2 * features.get("mid", symbol)
+
+    class Reader(module.Strategy):
+        features = ("doubled",)
+
+    cache = module.FeatureCache([module.MidFeature(), Doubled()])
+    strategies = [Reader("KELP", 50), Reader("SQUID_INK", 50)]
+    cache.plan(strategies)
+    assert cache.order == [("mid", "KELP"), ("doubled", "KELP"), ("mid", "SQUID_INK"), ("doubled", "SQUID_INK")]
+    cache.plan(strategies)
+    assert cache.registry["doubled"].symbols == ["KELP", "SQUID_INK"]
+
+
+def test_dependency_cycle_is_rejected(round5):
+    module, _ = round5
+
+    class Egg(module.Feature):
+        name = "egg"
+        requires = ("chicken",)
+
+        def compute(self, features, symbol):
+            return None
+
+    class Chicken(Egg):
+        name = "chicken"
+        requires = ("egg",)
+
+    class Reader(module.Strategy):
+        features = ("egg",)
+
+    with pytest.raises(ValueError, match="cycle"):
+        module.FeatureCache([Egg(), Chicken()]).plan([Reader("KELP", 50)])
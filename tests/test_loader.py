@@ -0,0 +1,37 @@
+import os
+
+from backtester.data import data_path
+from backtester.loader import day_sources
+
+HEADER = "timestamp;buyer;seller;symbol;currency;price;quantity\n"
+
+
+def write_trades(root, round_num, rows):
+    path = data_path("trades", round_num, 0, str(root))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(HEADER + "".join(f"{row}\n" for row in rows))
+    return path
+
+
+def trades_round(root, rounds=(1, 2)):
+    (day, sources), = day_sources(rounds, root=str(root))
+    return sources["trades"][0]
+
+
+def test_later_round_replaces_trades_it_extends(tmp_path):
+    write_trades(tmp_path, 1, ["0;;;KELP;SEASHELLS;2000.0;3", "100;;;KELP;SEASHELLS;2001.0;2"])
+    # same prints with names, in another order within a timestamp, plus a new product
+    write_trades(tmp_path, 2, ["0;;;SQUID_INK;SEASHELLS;1900.0;1", "0;Olivia;Caesar;KELP;SEASHELLS;2000.0;3",
+                               "100;Paris;;KELP;SEASHELLS;2001;2"])
+    assert trades_round(tmp_path) == 2
+
+
+def test_later_round_with_other_prints_is_ignored(tmp_path):
+    write_trades(tmp_path, 1, ["0;;;KELP;SEASHELLS;2000.0;3", "100;;;KELP;SEASHELLS;2001.0;2"])
+    write_trades(tmp_path, 2, ["0;;;KELP;SEASHELLS;2000.0;3"])
+    assert trades_round(tmp_path) == 1
+    # the cached verdict is dropped once the file changes
+    path = write_trades(tmp_path, 2, ["0;;;KELP;SEASHELLS;2000.0;3", "100;;;KELP;SEASHELLS;2001.0;2"])
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert trades_round(tmp_path) == 2
@@ -0,0 +1,79 @@
+import io
+import json
+from contextlib import redirect_stdout
+
+from backtester.engine import Backtester
+
+TICKS = 400
+
+
+def reference_flush(module, state, orders, conversions, trader_data, logs, max_log_length):
+    """The original template's Logger.flush, one json.dumps of the whole line."""
+
+    def to_json(value):
+        return json.dumps(value, cls=module.ProsperityEncoder, separators=(",", ":"))
+
+    def truncate(value, max_length):
+        return value if len(value) <= max_length else value[:max_length - 3] + "..."
+
+    def compress_state(trader_data_field):
+        return [
+            state.timestamp,
+            trader_data_field,
+            [[l.symbol, l.product, l.denomination] for l in state.listings.values()],
+            {s: [od.buy_orders, od.sell_orders] for s, od in state.order_depths.items()},
+            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp]
+             for trades in state.own_trades.values() for t in trades],
+            [[t.symbol, t.price, t.quantity, t.buyer, t.seller, t.timestamp]
+             for trades in state.market_trades.values() for t in trades],
+            state.position,
+            [state.observations.plainValueObservations,
+             {p: [o.bidPrice, o.askPrice, o.transportFees, o.exportTariff, o.importTariff, o.sugarPrice,
+                  o.sunlightIndex]
+              for p, o in state.observations.conversionObservations.items()}],
+        ]
+
+    compressed_orders = [[o.symbol, o.price, o.quantity] for ol in orders.values() for o in ol]
+    base_length = len(to_json([compress_state(""), compressed_orders, conversions, "", ""]))
+    max_item_length = (max_log_length - base_length) // 3
+    return to_json([
+        compress_state(truncate(state.traderData, max_item_length)),
+        compressed_orders,
+        conversions,
+        truncate(trader_data, max_item_length),
+        truncate(logs, max_item_length),
+    ]) + "\n"
+
+
+def test_flush_is_byte_identical_to_the_template(round5, round1_day, monkeypatch):
+    module, datamodel = round5
+    logger = module.logger
+    flush = logger.flush
+    lines = []
+
+    def checked_flush(state, orders, conversions, trader_data):
+        expected = reference_flush(module, state, orders, conversions, trader_data, "".join(logger.logs),
+                                   logger.max_log_length)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            flush(state, orders, conversions, trader_data)
+        lines.append((out.getvalue(), expected))
+
+    monkeypatch.setattr(logger, "flush", checked_flush)
+    Backtester(module.Trader, datamodel).run_day(round1_day.head(TICKS))
+    assert len(lines) == TICKS
+    for actual, expected in lines:
+        assert actual == expected
+
+
+def test_long_logs_are_truncated_to_the_budget(round5):
+    module, datamodel = round5
+    logger = module.Logger()
+    logger.print("x" * 10_000)
+    state = datamodel.TradingState("y" * 10_000, 0, {}, {}, {}, {}, {}, datamodel.Observation({}, {}))
+    out = io.StringIO()
+    with redirect_stdout(out):
+        logger.flush(state, {}, 0, "z" * 10_000)
+    line = out.getvalue()
+    assert len(line) <= logger.max_log_length + 1
+    assert line == reference_flush(module, state, {}, 0, "z" * 10_000, "x" * 10_000 + "\n", logger.max_log_length)
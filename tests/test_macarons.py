@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from backtester.data import REPO_ROOT
+from backtester.engine import load_trader
+
+MACARONS = "MAGNIFICENT_MACARONS"
+
+
+@pytest.fixture(scope="module")
+def round4():
+    return load_trader(os.path.join(REPO_ROOT, "Round 4", "round4_v1.py"))
+
+
+def make_state(datamodel, bids, asks, position=0, sunlight=60.0, sugar=200.0, foreign=(99, 100)):
+    """A macaron book plus a Pristine Cuisine quote with 1 transport fee and 1 tariff each way."""
+    depth = datamodel.OrderDepth()
+    depth.buy_orders = dict(bids)
+    depth.sell_orders = {price: -volume for price, volume in asks}
+    foreign_bid, foreign_ask = foreign
+    observation = datamodel.ConversionObservation(foreign_bid, foreign_ask, 1.0, 1.0, 1.0, sugar, sunlight)
+    return datamodel.TradingState("", 0, {}, {MACARONS: depth}, {}, {}, {MACARONS: position},
+                                  datamodel.Observation({}, {MACARONS: observation}))
+
+
+def arbitrage(module, **kwargs):
+    return module.MacaronArbitrage(MACARONS, conversion_limit=10, position_limit=75, **kwargs)
+
+
+def test_sells_locally_above_the_import_cost(round4):
+    module, datamodel = round4
+    strategy = arbitrage(module)
+    # import cost 100 + 1 + 1 = 102, so bids from 103 up are sold and the rest is quoted
+    state = make_state(datamodel, bids=[(106, 4), (104, 3), (102, 10)], asks=[(110, 5)])
+    orders, conversions = strategy.run(state)
+    assert strategy.import_cost == 102
+    assert [(order.price, order.quantity) for order in orders] == [(106, -4), (104, -3), (109, -3)]
+    assert conversions == 0
+
+
+def test_buys_locally_below_the_export_value(round4):
+    module, datamodel = round4
+    strategy = arbitrage(module)
+    # export value 120 - 1 - 1 = 118, less storage and edge leaves a 116.9 cap
+    state = make_state(datamodel, bids=[(105, 5)], asks=[(110, 6), (115, 8), (117, 5)], position=5,
+                       foreign=(120, 121))
+    orders, conversions = strategy.run(state)
+    assert strategy.export_value == 118
+    assert [(order.price, order.quantity) for order in orders] == [(110, 6), (115, 4)]
+    assert conversions == 5
+
+
+def test_opens_no_shorts_while_sunlight_is_scarce_and_falling(round4):
+    module, datamodel = round4
+    strategy = arbitrage(module)
+    bids, asks = [(106, 4), (104, 3)], [(110, 5)]
+    strategy.run(make_state(datamodel, bids, asks, sunlight=45.0))
+    orders, _ = strategy.run(make_state(datamodel, bids, asks, sunlight=44.0))
+    assert strategy.bullish()
+    assert all(order.quantity > 0 for order in orders)
+
+    rising = arbitrage(module)
+    rising.run(make_state(datamodel, bids, asks, sunlight=44.0))
+    orders, _ = rising.run(make_state(datamodel, bids, asks, sunlight=45.0))
+    assert not rising.bullish()
+    assert any(order.quantity < 0 for order in orders)
+
+
+def test_conversions_are_capped_at_the_conversion_limit(round4):
+    module, datamodel = round4
+    bids, asks = [(106, 40)], [(110, 40)]
+    for position, expected in ((-4, 4), (-10, 10), (-30, 10), (30, 10)):
+        orders, conversions = arbitrage(module).run(make_state(datamodel, bids, asks, position=position))
+        assert conversions == expected
+        assert sum(abs(order.quantity) for order in orders) <= 10
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from backtester.matching import QueueMatcher
+
+PRODUCT = "KELP"
+# (bids, asks), best first
+BOOK = ([(2000, 10), (1999, 5)], [(2003, 8)])
+
+
+def order(price, quantity):
+    return SimpleNamespace(symbol=PRODUCT, price=price, quantity=quantity)
+
+
+def match(orders, prints, book=BOOK):
+    trades = [(PRODUCT, price, quantity, "", "") for price, quantity in prints]
+    remaining = [[quantity] for _, quantity in prints]
+    return QueueMatcher().match(PRODUCT, orders, book, trades, remaining), remaining
+
+
+def test_print_smaller_than_volume_ahead_does_not_fill():
+    fills, remaining = match([order(2000, 3)], [(2000, 4)])
+    assert fills == []
+    assert remaining == [[4]]
+
+
+def test_volume_ahead_stays_consumed_for_the_rest_of_the_tick():
+    # 10 displayed lots sit ahead of us at 2000; 4 + 8 prints leave 2 for our order
+    fills, remaining = match([order(2000, 3)], [(2000, 4), (2000, 8)])
+    assert fills == [(2000, 2)]
+    assert remaining == [[4], [6]]
+
+
+def test_better_priced_order_jumps_the_displayed_queue():
+    fills, _ = match([order(2001, 3)], [(2000, 4)])
+    assert fills == [(2001, 3)]
+
+
+def test_marketable_order_takes_displayed_levels_first():
+    fills, _ = match([order(2003, 5), order(1999, -12)], [])
+    assert fills == [(2003, 5), (2000, -10), (1999, -2)]
+
+
+def test_print_on_the_ask_side_fills_a_resting_sell():
+    book = ([(2000, 10)], [(2003, 2)])
+    fills, _ = match([order(2003, -5)], [(2003, 4)], book)
+    assert fills == [(2003, -2)]
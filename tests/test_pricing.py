@@ -0,0 +1,52 @@
+import numpy as np
+
+STRIKES = np.array([9500, 9750, 10000, 10250, 10500], dtype=float)
+SIGMAS = np.array([0.12, 0.15, 0.2, 0.3, 0.45])
+
+
+def test_black_scholes_prices_expired_options_at_intrinsic(round5):
+    module, _ = round5
+    price, delta, gamma, vega = module.black_scholes_batch(10_000, STRIKES, 0.0, 0.2)
+    np.testing.assert_allclose(price, np.maximum(10_000 - STRIKES, 0))
+    np.testing.assert_array_equal(delta, (10_000 > STRIKES).astype(float))
+    assert not gamma.any() and not vega.any()
+
+
+def test_black_scholes_ladder_stays_within_no_arbitrage_bounds(round5):
+    module, _ = round5
+    price, delta, _, vega = module.black_scholes_batch(10_000, STRIKES, 0.02, 0.2)
+    assert (price > np.maximum(10_000 - STRIKES, 0)).all() and (price < 10_000).all()
+    assert (np.diff(price) < 0).all() and (np.diff(delta) < 0).all()
+    assert (vega > 0).all()
+
+
+def test_implied_vol_recovers_sigma(round5):
+    module, _ = round5
+    price = module.black_scholes_batch(10_000, STRIKES, 0.02, SIGMAS)[0]
+    iv = module.implied_vol_batch(price, 10_000, STRIKES, 0.02)
+    np.testing.assert_allclose(iv, SIGMAS, atol=1e-3)
+
+
+def test_implied_vol_warm_start_converges_to_same_answer(round5):
+    module, _ = round5
+    price = module.black_scholes_batch(10_000, STRIKES, 0.02, SIGMAS)[0]
+    cold = module.implied_vol_batch(price, 10_000, STRIKES, 0.02)
+    warm = module.implied_vol_batch(price, 10_000, STRIKES, 0.02, guess=SIGMAS * 1.5)
+    np.testing.assert_allclose(warm, cold, atol=1e-3)
+
+
+def test_implied_vol_is_nan_outside_no_arbitrage_bounds(round5):
+    module, _ = round5
+    St, K, T = 10_000.0, 9_500.0, 0.02
+    prices = np.array([
+        400.0,     # below intrinsic (500)
+        500.0,     # exactly intrinsic: no time value to solve for
+        10_000.0,  # at the spot
+        12_000.0,  # above the spot
+    ])
+    assert np.isnan(module.implied_vol_batch(prices, St, K, T)).all()
+
+
+def test_implied_vol_is_nan_at_expiry(round5):
+    module, _ = round5
+    assert np.isnan(module.implied_vol_batch(600.0, 10_000, 9_500, 0.0))
@@ -0,0 +1,17 @@
+from backtester.engine import Backtester
+from backtester.profiler import RUN, TickProfiler
+
+
+def test_sections_cover_features_and_trader_data(round5, round1_day):
+    module, datamodel = round5
+    profiler = TickProfiler()
+    trader = profiler.attach(module.Trader(), module)
+    Backtester(module.Trader, datamodel).run_day(round1_day.head(200), trader)
+
+    stats = profiler.stats()
+    assert stats[RUN]["calls"] == 200
+    for section in ("features.begin", "feature.mid", "feature.l2", "save_state", "logger.flush", "KELP.run"):
+        assert stats[section]["calls"] == 200
+    assert stats["load_state"]["calls"] == 1
+    for sections, total in zip(profiler.breakdown, profiler.totals):
+        assert sections["feature.mid"] <= sections["features.begin"] <= total
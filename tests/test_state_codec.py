@@ -0,0 +1,66 @@
+import base64
+import os
+from array import array
+
+import numpy as np
+import pytest
+
+from backtester.data import REPO_ROOT
+from backtester.engine import Backtester, load_trader
+
+
+def test_round_trip_of_nested_values(round5):
+    module, _ = round5
+    codec = module.StateCodec
+    value = [None, 3, -7, 0.25, [], [1, [None, 2.5, [array("d", [1.5, -2.0])]]], array("f", [0.5, 4.0])]
+    assert codec.decode(codec.encode(value)) == [None, 3, -7, 0.25, [], [1, [None, 2.5, [[1.5, -2.0]]]], [0.5, 4.0]]
+
+
+def test_tuples_decode_as_lists(round5):
+    codec = round5[0].StateCodec
+    assert codec.decode(codec.encode((1, (2, None)))) == [1, [2, None]]
+
+
+def test_payload_of_another_version_is_rejected(round5):
+    codec = round5[0].StateCodec
+    raw = bytearray(base64.b64decode(codec.encode([1, 2.0])))
+    raw[0] = codec.VERSION + 1
+    assert codec.decode(base64.b64encode(bytes(raw)).decode("ascii")) is None
+
+
+@pytest.mark.parametrize("payload", ["", "not base64!", base64.b64encode(b"").decode()])
+def test_empty_or_malformed_payload_decodes_to_none(round5, payload):
+    assert round5[0].StateCodec.decode(payload) is None
+
+
+@pytest.mark.parametrize("body", [b"q\x01", b"l\x02\x00n", b"?"])
+def test_truncated_or_unknown_tag_decodes_to_none(round5, body):
+    codec = round5[0].StateCodec
+    assert codec.decode(base64.b64encode(bytes([codec.VERSION]) + body).decode("ascii")) is None
+
+
+def test_strings_cannot_be_encoded(round5):
+    with pytest.raises(TypeError):
+        round5[0].StateCodec.encode(["name"])
+
+
+def test_numpy_scalars_and_bools_fall_back_to_numbers(round5):
+    codec = round5[0].StateCodec
+    assert codec.decode(codec.encode([np.float64(1.5), np.int64(-3), True])) == [1.5, -3, 1]
+
+
+@pytest.mark.parametrize("trader", ["Round 2/round2_rain_kelp_jams.py", "Round 3/round3.py",
+                                    "Round 4/round4_v1.py", "Round 5/round5_refined.py"])
+def test_fresh_trader_per_tick_matches_one_long_lived_trader(trader, round1_day):
+    module, datamodel = load_trader(os.path.join(REPO_ROOT, trader))
+
+    class Restarting:
+        """Builds a new Trader every tick, so all state goes through traderData."""
+
+        def run(self, state):
+            return module.Trader().run(state)
+
+    kept = Backtester(module.Trader, datamodel).run_day(round1_day)
+    restarted = Backtester(Restarting, datamodel).run_day(round1_day)
+    assert restarted.pnl == kept.pnl
+    assert restarted.position == kept.position
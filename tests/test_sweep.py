@@ -0,0 +1,29 @@
+import pytest
+
+from backtester import sweep
+from backtester.sweep import Sweep
+from backtester.tickstore import TickStore
+
+
+@pytest.fixture(scope="module")
+def stored(tmp_path_factory):
+    return TickStore(str(tmp_path_factory.mktemp("store"))).ingest(1, -2)
+
+
+def test_stored_ticks_match_the_day_data(stored):
+    day = stored.to_day_data()
+    assert list(stored.ticks(chunk=777)) == list(day.ticks())
+    assert list(stored.ticks(limit=250, chunk=100)) == list(day.head(250).ticks())
+    assert stored.symbols() == day.products
+    assert stored.timestamps.tolist() == day.timestamps
+
+
+def test_sweep_scores_the_same_from_the_store_and_the_csvs(round5_path, stored, monkeypatch):
+    candidates = [{"kelp_gamma": 0.01}, {"kelp_gamma": 0.2}]
+    scores = []
+    for store_root in (None, stored.store.root):
+        # the loaded days are per process, filled once per sweep
+        monkeypatch.setattr(sweep, "_DAYS", [])
+        results = Sweep(round5_path, 1, [-2], store_root=store_root, workers=1).evaluate(candidates, ticks=500)
+        scores.append([(result.params, result.pnl) for result in results])
+    assert scores[0] == scores[1]